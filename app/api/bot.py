@@ -1 +1,54 @@
 # Botzee AI mode endpoints
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.services.botzee_ai import choose_category, choose_keep, coalescing_stats
+from app.services.game_service import ROLLS_PER_TURN
+from .score import find_session
+
+router = APIRouter(prefix="/bot", tags=["bot"])
+
+
+class OpponentScorecard(BaseModel):
+    # Same shape as a game's "scorecard"; open categories are null or absent
+    scores: Dict[ScoreCategory, Optional[int]] = {}
+    yahtzee_bonuses: int = 0
+
+    def to_scorecard(self) -> Scorecard:
+        scorecard = Scorecard()
+        scorecard.scores.update(self.scores)
+        scorecard.yahtzee_bonuses = self.yahtzee_bonuses
+        return scorecard
+
+
+class MoveRequest(BaseModel):
+    opponents: List[OpponentScorecard] = []
+
+
+@router.post("/games/{game_id}/move")
+def bot_move(game_id: int, request: Optional[MoveRequest] = None) -> dict:
+    # Botzee's next move for the game's current dice: the dice to hold for a
+    # reroll, or the category to score once rerolling is no longer worth it.
+    # With opponents' scorecards Botzee plays to beat the best of them rather
+    # than for its average score.
+    opponents = [opponent.to_scorecard() for opponent in request.opponents] if request else []
+    session = find_session(game_id)
+    with session.lock:
+        if session.scorecard.is_complete():
+            raise HTTPException(status_code=409, detail="Game is over")
+        if session.rolls_left == ROLLS_PER_TURN:
+            return {"action": "roll"}
+        dice, rolls_left, scorecard = session.current_dice, session.rolls_left, session.scorecard
+        if rolls_left:
+            keep = choose_keep(dice, rolls_left, scorecard, opponents)
+            if len(keep) < len(dice):
+                return {"action": "keep", "keep": list(keep)}
+        return {"action": "score", "category": choose_category(dice, scorecard, opponents).value}
+
+
+@router.get("/stats")
+def bot_stats() -> dict:
+    return coalescing_stats()
@@ -0,0 +1,16 @@
+# Dice fairness endpoints
+from fastapi import APIRouter, HTTPException
+
+from app.game.fairness import get_fairness_monitor
+
+router = APIRouter(prefix="/dice", tags=["dice"])
+
+
+@router.get("/fairness")
+def fairness_snapshot() -> dict:
+    # Running face, transition and within-throw pair statistics over every
+    # die rolled by the server's workers, shared through their snapshot file
+    monitor = get_fairness_monitor()
+    if monitor is None:
+        raise HTTPException(status_code=503, detail="Dice fairness recording is off")
+    return monitor.snapshot()
@@ -1 +1,77 @@
 # Scorekeeping endpoints
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.game.scorecard import ScoreCategory
+from app.services.game_service import DEFAULT_PLAYER, GameSession, get_game_sessions
+from app.services.score_service import get_score_store
+
+router = APIRouter(prefix="/games", tags=["games"])
+
+
+class CreateRequest(BaseModel):
+    player: str = DEFAULT_PLAYER
+
+
+class RollRequest(BaseModel):
+    # Dice values to hold; empty for the first roll of a turn
+    keep: List[int] = []
+
+
+class ScoreRequest(BaseModel):
+    category: ScoreCategory
+
+
+def find_session(game_id: int) -> GameSession:
+    try:
+        return get_game_sessions().get(game_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No game {game_id}") from None
+
+
+@router.post("")
+def create_game(request: Optional[CreateRequest] = None) -> dict:
+    player = request.player if request else DEFAULT_PLAYER
+    return get_game_sessions().create(player).to_dict()
+
+
+@router.get("/{game_id}")
+def get_game(game_id: int) -> dict:
+    session = find_session(game_id)
+    with session.lock:
+        return session.to_dict()
+
+
+@router.post("/{game_id}/roll")
+def roll(game_id: int, request: RollRequest) -> dict:
+    session = find_session(game_id)
+    with session.lock:
+        try:
+            dice = session.roll(request.keep)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from None
+        return {"dice": dice, "rolls_left": session.rolls_left}
+
+
+@router.post("/{game_id}/score")
+def score(game_id: int, request: ScoreRequest) -> dict:
+    # Finished games are saved to the score store and dropped from memory;
+    # the response carries their final scorecard
+    session = find_session(game_id)
+    with session.lock:
+        try:
+            points = session.score(request.category)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from None
+        scorecard = session.scorecard
+        if scorecard.is_complete():
+            get_score_store().record_scorecards({session.player: scorecard})
+            get_game_sessions().discard(game_id)
+        return {
+            "score": points,
+            "total": scorecard.get_grand_total(),
+            "is_complete": scorecard.is_complete(),
+            "scorecard": scorecard.to_dict()
+        }
@@ -3,6 +3,8 @@ from random import randint
 from collections import Counter
 from dataclasses import dataclass
 
+from .fairness import record_dice
+
 
 @dataclass
 class DiceRoll:
@@ -58,6 +60,7 @@ class DiceManager:
     
     def roll_all_dice(self) -> DiceRoll:
         self.current_roll = [randint(1, 6) for _ in range(5)]
+        record_dice(self.current_roll)
         return DiceRoll(self.current_roll.copy())
     
     def reroll_dice(self, keep_indices: List[int]) -> DiceRoll:
@@ -68,9 +71,12 @@ class DiceManager:
             raise ValueError("Keep indices must be between 0 and 4")
         
         new_roll = self.current_roll.copy()
+        rerolled = []
         for i in range(5):
             if i not in keep_indices:
                 new_roll[i] = randint(1, 6)
+                rerolled.append(new_roll[i])
+        record_dice(rerolled)
         
         self.current_roll = new_roll
         return DiceRoll(self.current_roll.copy())
@@ -85,7 +91,7 @@ class DiceManager:
         for value in keep_values:
             try:
                 idx = available_dice.index(value)
-                keep_indices.append(self.current_roll.index(value, len(keep_indices)))
+                keep_indices.append(idx)
                 available_dice[idx] = -1
             except ValueError:
                 raise ValueError(f"Value {value} not found in current roll")
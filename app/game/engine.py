@@ -0,0 +1,358 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .fairness import get_fairness_monitor, record_throws
+from .game import GameState, RollResult, ScoreCategory
+
+
+CATEGORIES: List[ScoreCategory] = list(ScoreCategory)
+CATEGORY_INDEX: Dict[ScoreCategory, int] = {category: i for i, category in enumerate(CATEGORIES)}
+UPPER_COUNT = 6
+YAHTZEE_INDEX = CATEGORY_INDEX[ScoreCategory.YAHTZEE]
+EMPTY = -1
+
+# Base-6 place values turning an ordered roll into an index into the score table
+_PLACES = 6 ** np.arange(5)
+_score_table: Optional[np.ndarray] = None
+
+
+def score_table() -> np.ndarray:
+    # (7776, 13) scores for every ordered roll, built once per process from
+    # GameState's own scoring so both engines always agree
+    global _score_table
+    if _score_table is None:
+        calculate = GameState()._calculate_score
+        faces = (np.arange(6 ** 5)[:, None] // _PLACES) % 6 + 1
+        _score_table = np.array([
+            [calculate(category, roll) for category in CATEGORIES] for roll in faces.tolist()
+        ], dtype=np.int16)
+    return _score_table
+
+
+def roll_codes(dice: np.ndarray) -> np.ndarray:
+    return (dice.astype(np.int64) - 1) @ _PLACES
+
+
+class GameEngine:
+    # Every game lives in one slot of a set of preallocated arrays instead of
+    # its own objects: dice and turn state per game, scores per (game, player).
+    # Finished games give their slot back to a free list for reuse, and the
+    # arrays double in size if the pool runs out.
+    def __init__(self, capacity: int = 1024, max_players: int = 4, seed: Optional[int] = None):
+        if capacity < 1 or max_players < 1:
+            raise ValueError("Capacity and max players must be positive")
+        self.max_players = max_players
+        self.max_rolls_per_turn = 3
+        self.rng = np.random.default_rng(seed)
+        self.capacity = 0
+        self.dice = np.zeros((0, 5), dtype=np.int8)
+        self.current_roll = np.zeros(0, dtype=np.int8)
+        self.turn_complete = np.zeros(0, dtype=bool)
+        self.num_players = np.zeros(0, dtype=np.int8)
+        self.current_player = np.zeros(0, dtype=np.int8)
+        # Seat whose turn the dice and roll count belong to; the seat that
+        # just scored keeps seeing its dice until the next turn starts
+        self.dice_owner = np.zeros(0, dtype=np.int8)
+        self.in_use = np.zeros(0, dtype=bool)
+        self.scores = np.zeros((0, max_players, len(CATEGORIES)), dtype=np.int16)
+        self.yahtzee_bonuses = np.zeros((0, max_players), dtype=np.int16)
+        self._free: List[int] = []
+        self._grow(capacity)
+        score_table()
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - self.capacity
+        self.dice = np.concatenate([self.dice, np.zeros((extra, 5), dtype=np.int8)])
+        self.current_roll = np.concatenate([self.current_roll, np.zeros(extra, dtype=np.int8)])
+        self.turn_complete = np.concatenate([self.turn_complete, np.ones(extra, dtype=bool)])
+        self.num_players = np.concatenate([self.num_players, np.zeros(extra, dtype=np.int8)])
+        self.current_player = np.concatenate([self.current_player, np.zeros(extra, dtype=np.int8)])
+        self.dice_owner = np.concatenate([self.dice_owner, np.zeros(extra, dtype=np.int8)])
+        self.in_use = np.concatenate([self.in_use, np.zeros(extra, dtype=bool)])
+        self.scores = np.concatenate([
+            self.scores, np.full((extra, self.max_players, len(CATEGORIES)), EMPTY, dtype=np.int16)
+        ])
+        self.yahtzee_bonuses = np.concatenate([
+            self.yahtzee_bonuses, np.zeros((extra, self.max_players), dtype=np.int16)
+        ])
+        # Pop from the end, so lower slots are handed out first
+        self._free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.dice, self.current_roll, self.turn_complete, self.num_players,
+            self.current_player, self.dice_owner, self.in_use, self.scores, self.yahtzee_bonuses
+        ))
+
+    @property
+    def active_games(self) -> int:
+        return self.capacity - len(self._free)
+
+    def create_game(self, num_players: int = 1) -> int:
+        if not 1 <= num_players <= self.max_players:
+            raise ValueError(f"Games must have between 1 and {self.max_players} players")
+        if not self._free:
+            self._grow(self.capacity * 2)
+        game = self._free.pop()
+        self.dice[game] = 0
+        self.current_roll[game] = 0
+        self.turn_complete[game] = True
+        self.num_players[game] = num_players
+        self.current_player[game] = 0
+        self.dice_owner[game] = 0
+        self.in_use[game] = True
+        self.scores[game] = EMPTY
+        self.yahtzee_bonuses[game] = 0
+        return game
+
+    def release_game(self, game: int) -> None:
+        self._check_game(game)
+        self.in_use[game] = False
+        self._free.append(game)
+
+    def player_state(self, game: int, player: int = 0) -> "EngineGameState":
+        self._check_game(game)
+        if not 0 <= player < self.num_players[game]:
+            raise ValueError(f"Game {game} has no player {player}")
+        return EngineGameState(self, game, player)
+
+    def is_game_over(self, game: int) -> bool:
+        self._check_game(game)
+        return bool((self.scores[game, :self.num_players[game]] != EMPTY).all())
+
+    def _check_game(self, game: int) -> None:
+        if not 0 <= game < self.capacity or not self.in_use[game]:
+            raise ValueError(f"Game {game} is not active")
+
+    # Batch operations over many games at once; `games` is an array of slots
+    # and each game acts for its current player.
+
+    def start_turns(self, games: np.ndarray) -> None:
+        self.dice[games] = 0
+        self.current_roll[games] = 0
+        self.turn_complete[games] = False
+        self.dice_owner[games] = self.current_player[games]
+
+    def roll_games(self, games: np.ndarray, keep: Optional[np.ndarray] = None) -> np.ndarray:
+        # keep[i, j] holds die j of games[i]; ignored on a turn's first roll
+        if self.turn_complete[games].any():
+            raise ValueError("Cannot roll dice - turn is complete")
+        if (self.current_roll[games] >= self.max_rolls_per_turn).any():
+            raise ValueError("Maximum rolls per turn exceeded")
+        fresh = self.rng.integers(1, 7, size=(len(games), 5), dtype=np.int8)
+        held = self.current_roll[games] > 0
+        if keep is not None:
+            held = held[:, None] & keep
+        else:
+            held = np.zeros((len(games), 5), dtype=bool)
+        self.dice[games] = np.where(held, self.dice[games], fresh)
+        if get_fairness_monitor() is not None:
+            # Only the dice actually thrown, one batch for the whole call
+            record_throws([row[thrown].tolist() for row, thrown in zip(fresh, ~held)])
+        self.current_roll[games] += 1
+        return self.dice[games]
+
+    def score_games(self, games: np.ndarray, categories: np.ndarray) -> np.ndarray:
+        if self.turn_complete[games].any():
+            raise ValueError("Turn is already complete")
+        if (self.current_roll[games] == 0).any():
+            raise ValueError("No dice rolled")
+        players = self.current_player[games]
+        if (self.scores[games, players, categories] != EMPTY).any():
+            raise ValueError("Category already scored")
+        table = score_table()[roll_codes(self.dice[games])]
+        scores = table[np.arange(len(games)), categories]
+        bonus = (table[:, YAHTZEE_INDEX] == 50) & (self.scores[games, players, YAHTZEE_INDEX] == 50)
+        self.yahtzee_bonuses[games, players] += bonus
+        self.scores[games, players, categories] = scores
+        self.turn_complete[games] = True
+        self.current_player[games] = (players + 1) % self.num_players[games]
+        return scores
+
+    def total_scores(self, games: np.ndarray) -> np.ndarray:
+        # (len(games), max_players) grand totals, bonuses included
+        scores = np.maximum(self.scores[games], 0).astype(np.int32)
+        upper = scores[:, :, :UPPER_COUNT].sum(axis=2)
+        return (scores.sum(axis=2) + np.where(upper >= 63, 35, 0)
+                + self.yahtzee_bonuses[games].astype(np.int32) * 100)
+
+
+class EngineGameState:
+    # GameState-compatible view of one player in a GameEngine game. Reads go
+    # straight to the engine arrays, so `scorecard` and `current_dice` are
+    # fresh copies: mutating them does not change the game.
+    def __init__(self, engine: GameEngine, game: int, player: int = 0):
+        self.engine = engine
+        self.game = game
+        self.player = player
+
+    @property
+    def _is_active_player(self) -> bool:
+        return self.engine.current_player[self.game] == self.player
+
+    @property
+    def _owns_dice(self) -> bool:
+        return self.engine.dice_owner[self.game] == self.player
+
+    @property
+    def scorecard(self) -> Dict[ScoreCategory, Optional[int]]:
+        row = self.engine.scores[self.game, self.player].tolist()
+        return {category: None if score == EMPTY else score for category, score in zip(CATEGORIES, row)}
+
+    @property
+    def current_dice(self) -> List[int]:
+        if not self._owns_dice or self.engine.current_roll[self.game] == 0:
+            return []
+        return self.engine.dice[self.game].tolist()
+
+    @property
+    def current_roll(self) -> int:
+        return int(self.engine.current_roll[self.game]) if self._owns_dice else 0
+
+    @property
+    def max_rolls_per_turn(self) -> int:
+        return self.engine.max_rolls_per_turn
+
+    @property
+    def yahtzee_bonuses(self) -> int:
+        return int(self.engine.yahtzee_bonuses[self.game, self.player])
+
+    @property
+    def game_complete(self) -> bool:
+        return bool((self.engine.scores[self.game, self.player] != EMPTY).all())
+
+    @property
+    def turn_complete(self) -> bool:
+        return not self._is_active_player or bool(self.engine.turn_complete[self.game])
+
+    def start_turn(self) -> None:
+        if not self._is_active_player:
+            raise ValueError("It is not this player's turn")
+        self.engine.start_turns(np.array([self.game]))
+
+    def roll_dice(self, keep_dice: Optional[List[int]] = None) -> RollResult:
+        if self.turn_complete:
+            raise ValueError("Cannot roll dice - turn is complete")
+        if self.current_roll >= self.max_rolls_per_turn:
+            raise ValueError("Maximum rolls per turn exceeded")
+
+        if keep_dice is None:
+            keep_dice = []
+        keep = np.zeros((1, 5), dtype=bool)
+        if self.current_roll > 0:
+            if len(keep_dice) > 5:
+                raise ValueError("Cannot keep more than 5 dice")
+            # Same matching as GameState.roll_dice: each kept value claims the
+            # first unclaimed die showing it, and only 5 - len(keep_dice)
+            # dice are rerolled
+            dice = self.current_dice
+            for die_value in keep_dice:
+                for i, current_die in enumerate(dice):
+                    if current_die == die_value and not keep[0, i]:
+                        keep[0, i] = True
+                        break
+            rerolled = [i for i in range(5) if not keep[0, i]][:5 - len(keep_dice)]
+            keep[0] = True
+            keep[0, rerolled] = False
+
+        self.engine.roll_games(np.array([self.game]), keep)
+        return RollResult(
+            dice=self.current_dice,
+            roll_number=self.current_roll,
+            can_reroll=self.current_roll < self.max_rolls_per_turn
+        )
+
+    def score_turn(self, category: ScoreCategory) -> int:
+        if self.turn_complete:
+            raise ValueError("Turn is already complete")
+        if self.scorecard[category] is not None:
+            raise ValueError(f"Category {category.value} already scored")
+        if not self.current_dice:
+            raise ValueError("No dice rolled")
+        scores = self.engine.score_games(np.array([self.game]), np.array([CATEGORY_INDEX[category]]))
+        return int(scores[0])
+
+    def get_possible_scores(self) -> Dict[ScoreCategory, int]:
+        if not self.current_dice:
+            return {}
+        table = score_table()[roll_codes(self.engine.dice[self.game])].tolist()
+        return {category: table[i] for category, i in CATEGORY_INDEX.items()
+                if self.engine.scores[self.game, self.player, i] == EMPTY}
+
+    def get_upper_section_total(self) -> int:
+        return int(np.maximum(self.engine.scores[self.game, self.player, :UPPER_COUNT], 0).sum())
+
+    def get_upper_section_bonus(self) -> int:
+        return 35 if self.get_upper_section_total() >= 63 else 0
+
+    def get_lower_section_total(self) -> int:
+        return int(np.maximum(self.engine.scores[self.game, self.player, UPPER_COUNT:], 0).sum())
+
+    def get_total_score(self) -> int:
+        return (self.get_upper_section_total() + self.get_upper_section_bonus()
+                + self.get_lower_section_total() + self.yahtzee_bonuses * 100)
+
+    def get_available_categories(self) -> List[ScoreCategory]:
+        return [cat for cat, score in self.scorecard.items() if score is None]
+
+    def is_game_complete(self) -> bool:
+        return self.game_complete
+
+    def can_roll(self) -> bool:
+        return not self.turn_complete and self.current_roll < self.max_rolls_per_turn
+
+
+def benchmark(games: int = 10000, players: int = 2, seed: int = 0) -> Dict[str, float]:
+    # Plays `games` full games with a keep-nothing policy, first as one
+    # vectorised batch on a GameEngine, then as GameState objects, and
+    # reports memory and CPU per game for each.
+    import random
+    import sys
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(seed)
+    engine = GameEngine(capacity=games, max_players=players, seed=seed)
+    start = time.process_time()
+    slots = np.array([engine.create_game(players) for _ in range(games)])
+    for _ in range(len(CATEGORIES) * players):
+        engine.start_turns(slots)
+        for _ in range(engine.max_rolls_per_turn):
+            engine.roll_games(slots)
+        open_slots = engine.scores[slots, engine.current_player[slots]] == EMPTY
+        choice = (rng.random(open_slots.shape) * open_slots).argmax(axis=1)
+        engine.score_games(slots, choice)
+    engine_cpu = time.process_time() - start
+
+    random.seed(seed)
+    tracemalloc.start()
+    states = [[GameState() for _ in range(players)] for _ in range(games)]
+    state_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.process_time()
+    for seats in states:
+        for _ in range(len(CATEGORIES)):
+            for state in seats:
+                state.start_turn()
+                for _ in range(state.max_rolls_per_turn):
+                    state.roll_dice()
+                state.score_turn(random.choice(state.get_available_categories()))
+    state_cpu = time.process_time() - start
+
+    results = {
+        "engine_bytes_per_game": engine.nbytes / games,
+        "engine_cpu_us_per_game": engine_cpu / games * 1e6,
+        "gamestate_bytes_per_game": state_bytes / games,
+        "gamestate_cpu_us_per_game": state_cpu / games * 1e6,
+    }
+    for name, value in results.items():
+        print(f"{name}: {value:.1f}", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,302 @@
+# Running fairness statistics over every die the game rolls. Each die updates
+# a fixed set of counters in O(1), so the chi-square and serial correlation
+# figures are always current without re-reading the roll history.
+#
+# Recording is opt-in: until a process installs a monitor (the API server
+# does at startup, the UIs on load), record_dice does nothing, so tests,
+# benchmarks and simulations never touch the shared snapshot. Both the
+# Dice/GameState path and the vectorised GameEngine report their throws.
+import atexit
+import copy
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "dice_fairness.json")
+
+FACES = 6
+
+# Additive counters: what a snapshot file stores and what workers merge
+COUNTERS = ("faces", "transitions", "throws", "pairs", "matching_pairs", "total", "total_squares", "lag_products")
+
+
+def chi_square_p_value(statistic: float, degrees: int) -> float:
+    # Upper tail of the chi-square distribution, in closed form for the odd
+    # (5) and even (30) degrees of freedom used here
+    x = statistic / 2
+    if degrees % 2 == 0:
+        term = total = math.exp(-x)
+        for k in range(1, degrees // 2):
+            term *= x / k
+            total += term
+        return min(total, 1.0)
+    total = math.erfc(math.sqrt(x))
+    term = math.sqrt(x) * math.exp(-x) / math.gamma(1.5)
+    for k in range(1, (degrees + 1) // 2):
+        total += term
+        term *= x / (k + 0.5)
+    return min(total, 1.0)
+
+
+class FairnessMonitor:
+    # Dice are treated as one stream in the order they were thrown: face
+    # counts test uniformity, transitions between consecutive dice (and the
+    # lag-1 serial correlation) test independence across throws, and pairs
+    # of dice within the same throw test independence inside a throw.
+    #
+    # Without a path the counts live in memory only. With one, the monitor
+    # resumes from the snapshot there and a background thread merges the
+    # dice counted since into it every persist_interval seconds, or sooner
+    # once persist_every dice are waiting, so several worker processes can
+    # share one file without overwriting each other's counts. Recording a
+    # roll never waits on the file.
+    def __init__(self, path: Optional[str] = None, persist_every: int = 10_000,
+                 persist_interval: float = 60.0):
+        self.path = path
+        self.persist_every = persist_every
+        self.persist_interval = persist_interval
+        self._lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._reset()
+        if path and os.path.exists(path):
+            self._load(_read_state(path))
+        # Counters as last merged with the file; what has changed since is
+        # this process's share of the next merge
+        self._saved = self._state()
+        self._unsaved = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        if path:
+            self._thread = threading.Thread(target=self._persist_loop, name="fairness-writer", daemon=True)
+            self._thread.start()
+
+    def _reset(self) -> None:
+        self.faces = [0] * FACES
+        self.face_squares = 0
+        self.transitions = [[0] * FACES for _ in range(FACES)]
+        self.row_squares = [0] * FACES
+        self.throws = 0
+        self.pairs = 0
+        self.matching_pairs = 0
+        self.previous = 0
+        self.total = 0
+        self.total_squares = 0
+        self.lag_products = 0
+
+    def record(self, dice: Sequence[int]) -> None:
+        # Dice freshly thrown together; dice held over from the last roll
+        # must not be passed again
+        self.record_batch([dice])
+
+    def record_batch(self, throws: Sequence[Sequence[int]]) -> None:
+        # Several throws in the order they were made, under one acquisition
+        # of the lock
+        with self._lock:
+            for dice in throws:
+                if dice:
+                    self._count(dice)
+            due = self._unsaved >= self.persist_every
+        if due and self._thread is not None:
+            self._wake.set()
+
+    def _count(self, dice: Sequence[int]) -> None:
+        seen = [0] * FACES
+        for die in dice:
+            face = die - 1
+            count = self.faces[face]
+            self.face_squares += 2 * count + 1
+            self.faces[face] = count + 1
+            self.matching_pairs += seen[face]
+            seen[face] += 1
+            if self.previous:
+                row = self.transitions[self.previous - 1]
+                self.row_squares[self.previous - 1] += 2 * row[face] + 1
+                row[face] += 1
+                self.lag_products += self.previous * die
+            self.previous = die
+            self.total += die
+            self.total_squares += die * die
+        self.throws += 1
+        self.pairs += len(dice) * (len(dice) - 1) // 2
+        self._unsaved += len(dice)
+
+    def snapshot(self) -> Dict[str, any]:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, any]:
+        n = sum(self.faces)
+        chi_square = FACES * self.face_squares / n - n if n else 0.0
+        # Serial test: each row of the transition matrix should be uniform
+        # given the face before it
+        transition_chi_square = 0.0
+        for squares, row in zip(self.row_squares, self.transitions):
+            row_total = sum(row)
+            if row_total:
+                transition_chi_square += FACES * squares / row_total - row_total
+        # Knuth's serial correlation coefficient, near 0 for independent dice
+        denominator = n * self.total_squares - self.total * self.total
+        serial = (n * self.lag_products - self.total * self.total) / denominator if denominator else 0.0
+        return {
+            "dice": n,
+            "throws": self.throws,
+            "face_counts": list(self.faces),
+            "face_frequencies": [count / n for count in self.faces] if n else [0.0] * FACES,
+            "chi_square": chi_square,
+            "chi_square_p_value": chi_square_p_value(chi_square, FACES - 1) if n else 1.0,
+            "transition_counts": [list(row) for row in self.transitions],
+            "transition_chi_square": transition_chi_square,
+            "transition_p_value": chi_square_p_value(transition_chi_square, FACES * (FACES - 1)) if n > 1 else 1.0,
+            "pairs": self.pairs,
+            "matching_pair_rate": self.matching_pairs / self.pairs if self.pairs else 0.0,
+            "serial_correlation": serial
+        }
+
+    def persist(self) -> None:
+        # Adds the dice counted since the last merge to the file's counters
+        # under an exclusive file lock, then adopts the merged totals. Only
+        # the copies in and out hold the counter lock, so rolls keep being
+        # recorded while the file is read and written. The file is replaced
+        # atomically, so a crash mid-write leaves the previous snapshot in
+        # place.
+        import json
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._persist_lock, _file_lock(self.path):
+            with self._lock:
+                current, unsaved = self._state(), self._unsaved
+            state = current
+            if os.path.exists(self.path):
+                state = _merge(_read_state(self.path), current, self._saved)
+            merged = FairnessMonitor()
+            merged._load(state)
+            temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "w") as f:
+                json.dump({"saved_at": time.time(), "state": state, "snapshot": merged._snapshot()}, f)
+            os.replace(temporary, self.path)
+            with self._lock:
+                # Dice recorded while the file was written stay unsaved
+                self._load(_merge(state, self._state(), current))
+                self._saved = state
+                self._unsaved -= unsaved
+
+    def flush(self) -> None:
+        # Persists any dice counted since the last snapshot
+        if self.path and self._unsaved:
+            self.persist()
+
+    def close(self) -> None:
+        # Stops the background writer and persists what is left. Safe to
+        # call more than once.
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+            self._thread.join()
+        self.flush()
+
+    def _persist_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.persist_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except OSError:
+                # The counts stay in memory and the merge is retried next
+                # round
+                pass
+
+    def _state(self) -> Dict[str, any]:
+        return copy.deepcopy({name: getattr(self, name) for name in COUNTERS})
+
+    def _load(self, state: Dict[str, any]) -> None:
+        # `previous` stays this process's own last die: other workers' dice
+        # are separate streams
+        for name in COUNTERS:
+            setattr(self, name, copy.deepcopy(state[name]))
+        self.face_squares = sum(count * count for count in self.faces)
+        self.row_squares = [sum(count * count for count in row) for row in self.transitions]
+
+
+def _read_state(path: str) -> Dict[str, any]:
+    import json
+
+    with open(path) as f:
+        return json.load(f)["state"]
+
+
+def _merge(shared, current, saved):
+    # shared + (current - saved), counter by counter
+    if isinstance(shared, dict):
+        return {name: _merge(shared[name], current[name], saved[name]) for name in COUNTERS}
+    if isinstance(shared, list):
+        return [_merge(*values) for values in zip(shared, current, saved)]
+    return shared + current - saved
+
+
+@contextmanager
+def _file_lock(path: str):
+    # Serialises read-merge-write cycles across processes. Without fcntl
+    # (Windows) only one recording process per snapshot is supported.
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+_monitor: Optional[FairnessMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_fairness_monitor() -> Optional[FairnessMonitor]:
+    # Monitor counting this process's dice, or None while recording is off
+    return _monitor
+
+
+def set_fairness_monitor(monitor: Optional[FairnessMonitor]) -> Optional[FairnessMonitor]:
+    # Installs `monitor` for every die rolled from now on (None turns
+    # recording off) and returns the one it replaces, which is flushed
+    global _monitor
+    with _monitor_lock:
+        previous, _monitor = _monitor, monitor
+    if previous is not None and previous is not monitor:
+        previous.flush()
+    return previous
+
+
+def start_recording(path: Optional[str] = None) -> FairnessMonitor:
+    # Opts this process in to counting its dice into the shared snapshot at
+    # `path` (SNAPSHOT_PATH by default); a no-op when a monitor is already
+    # installed
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = FairnessMonitor(path or SNAPSHOT_PATH)
+            atexit.register(_monitor.close)
+        return _monitor
+
+
+def record_dice(dice: List[int]) -> None:
+    monitor = _monitor
+    if monitor is not None:
+        monitor.record(dice)
+
+
+def record_throws(throws: Sequence[Sequence[int]]) -> None:
+    # A batch of throws, such as one GameEngine.roll_games call
+    monitor = _monitor
+    if monitor is not None:
+        monitor.record_batch(throws)
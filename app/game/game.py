@@ -1,6 +1,9 @@
 from enum import Enum
 from typing import Dict, List, Optional, Set
 from dataclasses import dataclass
+from random import randint
+
+from .fairness import record_dice
 
 
 class ScoreCategory(Enum):
@@ -49,13 +52,12 @@ class GameState:
         if self.current_roll >= self.max_rolls_per_turn:
             raise ValueError("Maximum rolls per turn exceeded")
         
-        from random import randint
-        
         if keep_dice is None:
             keep_dice = []
         
         if self.current_roll == 0:
             self.current_dice = [randint(1, 6) for _ in range(5)]
+            record_dice(self.current_dice)
         else:
             if len(keep_dice) > 5:
                 raise ValueError("Cannot keep more than 5 dice")
@@ -74,6 +76,7 @@ class GameState:
             
             for pos in positions_to_reroll:
                 new_dice[pos] = randint(1, 6)
+            record_dice([new_dice[pos] for pos in positions_to_reroll])
             
             self.current_dice = new_dice
         
@@ -96,9 +99,9 @@ class GameState:
         
         score = self._calculate_score(category, self.current_dice)
         
-        if category == ScoreCategory.YAHTZEE and score == 50 and self.scorecard[ScoreCategory.YAHTZEE] is not None:
+        if (self._calculate_score(ScoreCategory.YAHTZEE, self.current_dice) == 50
+                and self.scorecard[ScoreCategory.YAHTZEE] == 50):
             self.yahtzee_bonuses += 1
-            score = 100
         
         self.scorecard[category] = score
         self.turn_complete = True
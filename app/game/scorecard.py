@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
+from functools import lru_cache
 from .dice import DiceRoll
 
 
@@ -79,6 +80,17 @@ class ScoreCalculator:
             category: ScoreCalculator.calculate_score(category, dice_roll)
             for category in ScoreCategory
         }
+    
+    @staticmethod
+    def get_score_table(dice: Tuple[int, ...]) -> Dict[ScoreCategory, int]:
+        # Scores only depend on the dice multiset, so every ordering of the
+        # same roll shares one cached table. Callers must not mutate it.
+        return _score_table(tuple(sorted(dice)))
+
+
+@lru_cache(maxsize=None)
+def _score_table(sorted_dice: Tuple[int, ...]) -> Dict[ScoreCategory, int]:
+    return ScoreCalculator.get_all_possible_scores(DiceRoll(list(sorted_dice)))
 
 
 class Scorecard:
@@ -102,17 +114,17 @@ class Scorecard:
         
         base_score = ScoreCalculator.calculate_score(category, dice_roll)
         
-        if category == ScoreCategory.YAHTZEE and dice_roll.is_yahtzee():
-            if self.scores[ScoreCategory.YAHTZEE] is not None:
-                self.yahtzee_bonuses += 1
-                bonus_entry = ScoreEntry(
-                    category=ScoreCategory.YAHTZEE,
-                    score=100,
-                    dice_used=dice_roll.values.copy(),
-                    is_bonus=True
-                )
-                self.score_entries.append(bonus_entry)
-                return 100
+        # Every further Yahtzee earns a 100 point bonus once the Yahtzee box
+        # holds 50, wherever the roll is scored
+        if dice_roll.is_yahtzee() and self.scores[ScoreCategory.YAHTZEE] == 50:
+            self.yahtzee_bonuses += 1
+            bonus_entry = ScoreEntry(
+                category=ScoreCategory.YAHTZEE,
+                score=100,
+                dice_used=dice_roll.values.copy(),
+                is_bonus=True
+            )
+            self.score_entries.append(bonus_entry)
         
         self.scores[category] = base_score
         entry = ScoreEntry(
@@ -170,47 +182,57 @@ class Scorecard:
         return self.scores[category]
     
     def get_expected_value_analysis(self, dice_roll: DiceRoll) -> Dict[ScoreCategory, Dict[str, any]]:
-        analysis = {}
-        possible_scores = ScoreCalculator.get_all_possible_scores(dice_roll)
+        # Expected final score for each open category if this roll is scored
+        # there, looked up in the precomputed optimal strategy table: one
+        # table read per category, bonuses included.
+        from app.game.transitions import roll_index
+        from app.solver.state import CATEGORY_INDEX, score_roll, scorecard_state
+        from app.solver.value_table import load_value_table
+        
+        table = load_value_table()
+        state = scorecard_state(self)
+        roll = roll_index(dice_roll.values)
+        possible_scores = ScoreCalculator.get_score_table(tuple(dice_roll.values))
+        current_total = self.get_grand_total()
         
+        analysis = {}
         for category in self.get_available_categories():
-            current_score = possible_scores[category]
-            
-            if category in ScoreCategory.upper_section():
-                target_value = {
-                    ScoreCategory.ONES: 1, ScoreCategory.TWOS: 2, ScoreCategory.THREES: 3,
-                    ScoreCategory.FOURS: 4, ScoreCategory.FIVES: 5, ScoreCategory.SIXES: 6
-                }[category]
-                max_possible = target_value * 5
-                efficiency = (current_score / max_possible) * 100 if max_possible > 0 else 0
-            else:
-                max_possible = {
-                    ScoreCategory.THREE_OF_A_KIND: 30, ScoreCategory.FOUR_OF_A_KIND: 30,
-                    ScoreCategory.FULL_HOUSE: 25, ScoreCategory.SMALL_STRAIGHT: 30,
-                    ScoreCategory.LARGE_STRAIGHT: 40, ScoreCategory.YAHTZEE: 50,
-                    ScoreCategory.CHANCE: 30
-                }[category]
-                efficiency = (current_score / max_possible) * 100 if max_possible > 0 else 0
-            
+            points, next_state = score_roll(state, CATEGORY_INDEX[category.value], roll)
             analysis[category] = {
-                "score": current_score,
-                "max_possible": max_possible,
-                "efficiency_percent": round(efficiency, 1),
-                "is_optimal": current_score == max_possible
+                "score": possible_scores[category],
+                "points": points,
+                "expected_final_score": current_total + points + table.value(next_state)
             }
         
+        best = max((entry["expected_final_score"] for entry in analysis.values()), default=0.0)
+        for entry in analysis.values():
+            entry["expected_loss"] = best - entry["expected_final_score"]
+            entry["is_optimal"] = entry["expected_final_score"] == best
+        
         return analysis
     
     def get_upper_section_progress(self) -> Dict[str, any]:
+        from app.solver.upper_bonus import load_upper_bonus_table
+        
         current_total = self.get_upper_section_total()
         needed_for_bonus = max(0, 63 - current_total)
         available_categories = [cat for cat in ScoreCategory.upper_section() 
                               if self.is_category_available(cat)]
+        # Five of a kind is the most any upper category can add: 5 x its face
+        max_attainable_total = current_total + sum(
+            5 * (ScoreCategory.upper_section().index(cat) + 1) for cat in available_categories
+        )
+        upper_filled = sum(
+            1 << i for i, cat in enumerate(ScoreCategory.upper_section())
+            if not self.is_category_available(cat)
+        )
         
         return {
             "current_total": current_total,
             "needed_for_bonus": needed_for_bonus,
-            "bonus_achievable": len(available_categories) > 0 and needed_for_bonus <= len(available_categories) * 5,
+            "max_attainable_total": max_attainable_total,
+            "bonus_achievable": max_attainable_total >= 63,
+            "bonus_probability": load_upper_bonus_table().probability(upper_filled, current_total),
             "available_categories": available_categories,
             "progress_percent": round((current_total / 63) * 100, 1)
         }
@@ -231,4 +253,24 @@ class Scorecard:
                 }
                 for entry in self.score_entries
             ]
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, any]) -> 'Scorecard':
+        # Inverse of to_dict; the derived "breakdown" and "is_complete" keys
+        # are ignored
+        scorecard = cls()
+        for category in ScoreCategory:
+            scorecard.scores[category] = data["scores"].get(category.value)
+        scorecard.yahtzee_bonuses = data.get("yahtzee_bonuses", 0)
+        scorecard.upper_section_bonus_earned = data.get("upper_section_bonus_earned", False)
+        scorecard.score_entries = [
+            ScoreEntry(
+                category=ScoreCategory(entry["category"]),
+                score=entry["score"],
+                dice_used=list(entry["dice"]),
+                is_bonus=entry.get("is_bonus", False)
+            )
+            for entry in data.get("entries", [])
+        ]
+        return scorecard
\ No newline at end of file
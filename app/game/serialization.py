@@ -0,0 +1,153 @@
+# Compact versioned binary encoding of Scorecard and GameState, for session
+# storage, event logs and client resyncs where to_dict's JSON is too heavy.
+#
+# Every blob starts with a format version byte and a kind byte. Then:
+#   Scorecard: filled-category mask (uint16), flags (uint8: bit 0 upper bonus
+#     earned), Yahtzee bonus count (uint8), one uint8 score per filled
+#     category in ScoreCategory order, entry count (uint8) and 4 bytes per
+#     ScoreEntry: category index with bit 4 set for bonus entries, score
+#     (uint8), and the five dice in base 6 (uint16).
+#   GameState: filled-category mask (uint16), flags (uint8: bit 0 game
+#     complete, bit 1 turn complete, bit 2 dice on the table), Yahtzee bonus
+#     count, current roll and rolls per turn (uint8 each), one uint8 score per
+#     filled category, then the dice in base 6 (uint16) when there are any.
+# A full scorecard with its entries is 70-100 bytes; a game state is at
+# most 24.
+import struct
+from typing import List, Sequence
+
+from .game import GameState, ScoreCategory as GameCategory
+from .scorecard import ScoreCategory, ScoreEntry, Scorecard
+
+
+FORMAT_VERSION = 1
+
+SCORECARD_KIND = ord("S")
+GAME_STATE_KIND = ord("G")
+
+_CATEGORIES = list(ScoreCategory)
+_CATEGORY_INDEX = {category: i for i, category in enumerate(_CATEGORIES)}
+_GAME_CATEGORIES = list(GameCategory)
+_BONUS_FLAG = 0x10
+
+_PREFIX = struct.Struct("<BB")
+_SCORECARD_HEAD = struct.Struct("<BBHBB")
+_GAME_STATE_HEAD = struct.Struct("<BBHBBBB")
+_ENTRY = struct.Struct("<BBH")
+_DICE = struct.Struct("<H")
+
+
+def _pack_dice(dice: Sequence[int]) -> int:
+    if len(dice) != 5 or not all(1 <= die <= 6 for die in dice):
+        raise ValueError(f"Cannot encode dice {list(dice)}")
+    code = 0
+    for die in reversed(dice):
+        code = code * 6 + die - 1
+    return code
+
+
+def _unpack_dice(code: int) -> List[int]:
+    return [code % 6 + 1, code // 6 % 6 + 1, code // 36 % 6 + 1, code // 216 % 6 + 1, code // 1296 + 1]
+
+
+def _pack_scores(scores: Sequence) -> bytes:
+    try:
+        return bytes(score for score in scores if score is not None)
+    except ValueError:
+        raise ValueError("Category scores must be between 0 and 255") from None
+
+
+def _check_prefix(blob: bytes, kind: int) -> None:
+    if len(blob) < _PREFIX.size:
+        raise ValueError("Blob is truncated")
+    version, blob_kind = _PREFIX.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported serialization version {version}; expected {FORMAT_VERSION}")
+    if blob_kind != kind:
+        raise ValueError(f"Blob holds a {chr(blob_kind)!r} record, not {chr(kind)!r}")
+
+
+def pack_scorecard(scorecard: Scorecard) -> bytes:
+    scores = [scorecard.scores[category] for category in _CATEGORIES]
+    mask = sum(1 << i for i, score in enumerate(scores) if score is not None)
+    if len(scorecard.score_entries) > 255 or scorecard.yahtzee_bonuses > 255:
+        raise ValueError("Scorecard has too many entries to encode")
+    parts = [
+        _SCORECARD_HEAD.pack(FORMAT_VERSION, SCORECARD_KIND, mask, int(scorecard.upper_section_bonus_earned),
+                             scorecard.yahtzee_bonuses),
+        _pack_scores(scores),
+        bytes((len(scorecard.score_entries),))
+    ]
+    for entry in scorecard.score_entries:
+        tag = _CATEGORY_INDEX[entry.category] | (_BONUS_FLAG if entry.is_bonus else 0)
+        try:
+            parts.append(_ENTRY.pack(tag, entry.score, _pack_dice(entry.dice_used)))
+        except struct.error:
+            raise ValueError(f"Cannot encode score {entry.score} for {entry.category.value}") from None
+    return b"".join(parts)
+
+
+def unpack_scorecard(blob: bytes) -> Scorecard:
+    _check_prefix(blob, SCORECARD_KIND)
+    try:
+        _, _, mask, flags, yahtzee_bonuses = _SCORECARD_HEAD.unpack_from(blob)
+        offset = _SCORECARD_HEAD.size
+        scorecard = Scorecard()
+        for i, category in enumerate(_CATEGORIES):
+            if mask >> i & 1:
+                scorecard.scores[category] = blob[offset]
+                offset += 1
+        count = blob[offset]
+        offset += 1
+        for tag, score, dice in _ENTRY.iter_unpack(blob[offset:offset + count * _ENTRY.size]):
+            scorecard.score_entries.append(
+                ScoreEntry(_CATEGORIES[tag & 0x0F], score, _unpack_dice(dice), bool(tag & _BONUS_FLAG))
+            )
+    except (IndexError, struct.error):
+        raise ValueError("Scorecard blob is truncated") from None
+    if len(scorecard.score_entries) != count or len(blob) != offset + count * _ENTRY.size:
+        raise ValueError("Scorecard blob has the wrong length")
+    scorecard.yahtzee_bonuses = yahtzee_bonuses
+    scorecard.upper_section_bonus_earned = bool(flags & 1)
+    return scorecard
+
+
+def pack_game_state(game: GameState) -> bytes:
+    scores = [game.scorecard[category] for category in _GAME_CATEGORIES]
+    mask = sum(1 << i for i, score in enumerate(scores) if score is not None)
+    flags = int(game.game_complete) | int(game.turn_complete) << 1 | int(bool(game.current_dice)) << 2
+    if max(game.yahtzee_bonuses, game.current_roll, game.max_rolls_per_turn) > 255:
+        raise ValueError("Game state counters must be between 0 and 255")
+    parts = [
+        _GAME_STATE_HEAD.pack(FORMAT_VERSION, GAME_STATE_KIND, mask, flags, game.yahtzee_bonuses,
+                              game.current_roll, game.max_rolls_per_turn),
+        _pack_scores(scores)
+    ]
+    if game.current_dice:
+        parts.append(_DICE.pack(_pack_dice(game.current_dice)))
+    return b"".join(parts)
+
+
+def unpack_game_state(blob: bytes) -> GameState:
+    _check_prefix(blob, GAME_STATE_KIND)
+    try:
+        _, _, mask, flags, yahtzee_bonuses, current_roll, max_rolls = _GAME_STATE_HEAD.unpack_from(blob)
+        offset = _GAME_STATE_HEAD.size
+        game = GameState()
+        for i, category in enumerate(_GAME_CATEGORIES):
+            if mask >> i & 1:
+                game.scorecard[category] = blob[offset]
+                offset += 1
+        if flags & 4:
+            game.current_dice = _unpack_dice(_DICE.unpack_from(blob, offset)[0])
+            offset += _DICE.size
+    except (IndexError, struct.error):
+        raise ValueError("Game state blob is truncated") from None
+    if len(blob) != offset:
+        raise ValueError("Game state blob has the wrong length")
+    game.yahtzee_bonuses = yahtzee_bonuses
+    game.current_roll = current_roll
+    game.max_rolls_per_turn = max_rolls
+    game.game_complete = bool(flags & 1)
+    game.turn_complete = bool(flags & 2)
+    return game
@@ -0,0 +1,108 @@
+from typing import Dict, List, Sequence, Tuple
+from itertools import combinations_with_replacement, product
+from collections import Counter
+from math import factorial
+from operator import mul
+
+
+# Dice order never matters for scoring, so a roll is the sorted tuple of its
+# five faces (252 of them) and a keep is any sorted sub-multiset of a roll
+# (462 of them, from keeping nothing up to keeping all five dice).
+ROLLS: List[Tuple[int, ...]] = list(combinations_with_replacement(range(1, 7), 5))
+ROLL_INDEX: Dict[Tuple[int, ...], int] = {roll: i for i, roll in enumerate(ROLLS)}
+
+KEEPS: List[Tuple[int, ...]] = [
+    keep for size in range(6) for keep in combinations_with_replacement(range(1, 7), size)
+]
+KEEP_INDEX: Dict[Tuple[int, ...], int] = {keep: i for i, keep in enumerate(KEEPS)}
+
+
+def _arrangements(dice: Tuple[int, ...]) -> int:
+    count = factorial(len(dice))
+    for repeats in Counter(dice).values():
+        count //= factorial(repeats)
+    return count
+
+
+def _build_keep_outcomes() -> Tuple[List[List[int]], List[List[float]]]:
+    outcome_rolls = []
+    outcome_probabilities = []
+    for keep in KEEPS:
+        rerolled = 5 - len(keep)
+        rolls = []
+        probabilities = []
+        for new_dice in combinations_with_replacement(range(1, 7), rerolled):
+            rolls.append(ROLL_INDEX[tuple(sorted(keep + new_dice))])
+            probabilities.append(_arrangements(new_dice) / 6 ** rerolled)
+        outcome_rolls.append(rolls)
+        outcome_probabilities.append(probabilities)
+    return outcome_rolls, outcome_probabilities
+
+
+def _build_roll_keeps() -> List[List[int]]:
+    roll_keeps = []
+    for roll in ROLLS:
+        keeps = {
+            KEEP_INDEX[tuple(die for die, kept in zip(roll, mask) if kept)]
+            for mask in product((False, True), repeat=5)
+        }
+        roll_keeps.append(sorted(keeps))
+    return roll_keeps
+
+
+# Sparse reroll transition matrix: row k lists the rolls reachable from keep k
+# and their probabilities. Every row sums to one.
+KEEP_OUTCOME_ROLLS, KEEP_OUTCOME_PROBABILITIES = _build_keep_outcomes()
+
+# The distinct keeps available from each roll (at most 32, fewer with pairs).
+ROLL_KEEPS: List[List[int]] = _build_roll_keeps()
+
+# Probability of each roll when all five dice are thrown.
+ROLL_PROBABILITIES: List[float] = [0.0] * len(ROLLS)
+for _roll, _probability in zip(KEEP_OUTCOME_ROLLS[0], KEEP_OUTCOME_PROBABILITIES[0]):
+    ROLL_PROBABILITIES[_roll] = _probability
+
+
+def roll_index(dice: Sequence[int]) -> int:
+    if len(dice) != 5:
+        raise ValueError("Dice roll must contain exactly 5 dice")
+    try:
+        return ROLL_INDEX[tuple(sorted(dice))]
+    except KeyError:
+        raise ValueError("All dice values must be between 1 and 6")
+
+
+def keep_index(kept_dice: Sequence[int]) -> int:
+    try:
+        return KEEP_INDEX[tuple(sorted(kept_dice))]
+    except KeyError:
+        raise ValueError("Kept dice must be at most 5 values between 1 and 6")
+
+
+def keep_values(roll_values: Sequence[float]) -> List[float]:
+    # Expected value of every keep when the remaining dice are rerolled once.
+    return [
+        sum(map(mul, probabilities, map(roll_values.__getitem__, rolls)))
+        for rolls, probabilities in zip(KEEP_OUTCOME_ROLLS, KEEP_OUTCOME_PROBABILITIES)
+    ]
+
+
+def best_roll_values(values_by_keep: Sequence[float]) -> List[float]:
+    # Value of every roll when the best keep for it is chosen.
+    lookup = values_by_keep.__getitem__
+    return [max(map(lookup, keeps)) for keeps in ROLL_KEEPS]
+
+
+def roll_values_with_rerolls(final_values: Sequence[float], rerolls: int) -> List[float]:
+    # final_values[r] is what roll r is worth once the turn's rolling is over;
+    # the result is what it is worth with `rerolls` optimal rerolls still left.
+    values = list(final_values)
+    for _ in range(rerolls):
+        values = best_roll_values(keep_values(values))
+    return values
+
+
+def expected_turn_value(final_values: Sequence[float], rolls: int = 3) -> float:
+    # Expected value before the first roll of a turn with `rolls` rolls.
+    values = roll_values_with_rerolls(final_values, rolls - 1)
+    return sum(map(mul, ROLL_PROBABILITIES, values))
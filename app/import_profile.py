@@ -0,0 +1,116 @@
+# Import-time profile of app modules. Each run imports the given modules in a
+# fresh interpreter under `python -X importtime` and reports what every module
+# it loaded cost, so a slow startup can be traced to the import behind it:
+#
+#   python -m app.import_profile                  # app.game and the API
+#   python -m app.import_profile app.services.botzee_ai --top 15
+#   python -m app.import_profile app.game --json
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Sequence
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GAME_MODULES = ["app.game", "app.game.dice", "app.game.scorecard", "app.game.game", "app.game.serialization"]
+DEFAULT_MODULES = GAME_MODULES + ["app.main"]
+
+# Modules that must never load as a side effect of importing app.game. The
+# vectorised engine is numpy in every method, so rather than deferring its
+# numpy import it is kept out of app.game's imports altogether: only its
+# benchmark and callers that host many games load it.
+HEAVY_MODULES = ["numpy", "pandas", "scipy", "sklearn", "streamlit", "sqlite3", "fastapi", "app.solver",
+                 "app.game.engine"]
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int           # 0 for modules imported directly by the run
+
+
+def measure_imports(modules: Sequence[str], runs: int = 1) -> List[ImportTiming]:
+    # Timings of every module the imports loaded, in load order. With several
+    # runs each module keeps its fastest, to damp noise from the machine.
+    best: Dict[str, ImportTiming] = {}
+    for _ in range(runs):
+        for timing in _import_once(modules):
+            kept = best.get(timing.module)
+            if kept is None or timing.cumulative_us < kept.cumulative_us:
+                best[timing.module] = timing
+    return list(best.values())
+
+
+def _import_once(modules: Sequence[str]) -> List[ImportTiming]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr}")
+    # Lines look like "import time:      1230 |       4344 |   app.game.dice",
+    # with two spaces of indent per nesting level; the site import comes
+    # first and is cut off at the first top-level requested module
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(name) - len(name.lstrip()) - 1) // 2))
+    start = 0
+    for i, timing in enumerate(timings):
+        if timing.depth == 0 and timing.module == "site":
+            start = i + 1
+    return timings[start:]
+
+
+def total_ms(timings: Sequence[ImportTiming]) -> float:
+    # Wall time of the run's imports: the cumulative cost of its top-level
+    # modules, everything they loaded included
+    return sum(timing.cumulative_us for timing in timings if timing.depth == 0) / 1000
+
+
+def heavy_modules(timings: Sequence[ImportTiming]) -> List[str]:
+    # The HEAVY_MODULES entries the run loaded
+    loaded = {timing.module for timing in timings}
+    return [heavy for heavy in HEAVY_MODULES
+            if heavy in loaded or any(module.startswith(heavy + ".") for module in loaded)]
+
+
+def report(timings: Sequence[ImportTiming], top: int = 25) -> Dict[str, any]:
+    slowest = sorted(timings, key=lambda timing: timing.self_us, reverse=True)[:top]
+    return {
+        "total_ms": total_ms(timings),
+        "modules_loaded": len(timings),
+        "heavy_modules": heavy_modules(timings),
+        "slowest": [
+            {"module": timing.module, "self_ms": timing.self_us / 1000, "cumulative_ms": timing.cumulative_us / 1000}
+            for timing in slowest
+        ]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the import cost of app modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="modules to import together")
+    parser.add_argument("--top", type=int, default=25, help="slowest modules to list")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to take the best timings from")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    result = report(measure_imports(args.modules, args.runs), args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['total_ms']:.1f} ms for {result['modules_loaded']} modules")
+        if result["heavy_modules"]:
+            print(f"heavy: {', '.join(result['heavy_modules'])}")
+        print(f"{'self ms':>9} {'total ms':>9}  module")
+        for row in result["slowest"]:
+            print(f"{row['self_ms']:9.2f} {row['cumulative_ms']:9.2f}  {row['module']}")
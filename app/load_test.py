@@ -0,0 +1,164 @@
+# Load generator for the API. Many concurrent asyncio clients each play whole
+# games the way the app does (start a game, roll, ask Botzee, reroll what it
+# keeps, score) and every request's latency is recorded under its endpoint.
+# Runs in-process over an ASGI transport by default, or against a running
+# `uvicorn app.main:app` with --url. The report is JSON on stdout:
+#
+#   python -m app.load_test --clients 200 --games 2
+#   python -m app.load_test --url http://localhost:8000 --out load.json
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from app.game.scorecard import ScoreCategory
+
+
+CREATE = "POST /games"
+ROLL = "POST /games/{game_id}/roll"
+BOT_MOVE = "POST /bot/games/{game_id}/move"
+SCORE = "POST /games/{game_id}/score"
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    # Nearest-rank percentile of already sorted samples
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.games = 0
+        self.failed_games = 0
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.samples[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> Dict[str, any]:
+        endpoints = {}
+        for endpoint, samples in self.samples.items():
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors[endpoint],
+                "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": 1000 * sum(ordered) / len(ordered),
+                    "p50": 1000 * percentile(ordered, 50),
+                    "p95": 1000 * percentile(ordered, 95),
+                    "p99": 1000 * percentile(ordered, 99),
+                    "max": 1000 * ordered[-1]
+                }
+            }
+        requests = sum(len(samples) for samples in self.samples.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "games": self.games,
+            "failed_games": self.failed_games,
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": requests / elapsed if elapsed else 0.0,
+            "endpoints": endpoints
+        }
+
+
+async def _request(client, recorder: LatencyRecorder, endpoint: str, url: str, body: Optional[dict] = None) -> dict:
+    import httpx
+
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=body)
+    except httpx.HTTPError:
+        recorder.record(endpoint, time.perf_counter() - start, False)
+        raise
+    recorder.record(endpoint, time.perf_counter() - start, response.is_success)
+    response.raise_for_status()
+    return response.json()
+
+
+async def play_game(client, recorder: LatencyRecorder) -> int:
+    # One full game following Botzee's advice; returns the final score
+    game_id = (await _request(client, recorder, CREATE, "/games"))["game_id"]
+    result = {}
+    for _ in ScoreCategory:
+        await _request(client, recorder, ROLL, f"/games/{game_id}/roll", {"keep": []})
+        while True:
+            move = await _request(client, recorder, BOT_MOVE, f"/bot/games/{game_id}/move")
+            if move["action"] != "keep":
+                break
+            await _request(client, recorder, ROLL, f"/games/{game_id}/roll", {"keep": move["keep"]})
+        result = await _request(client, recorder, SCORE, f"/games/{game_id}/score", {"category": move["category"]})
+    return result["total"]
+
+
+async def _client_loop(client, recorder: LatencyRecorder, games: int) -> None:
+    import httpx
+
+    for _ in range(games):
+        try:
+            await play_game(client, recorder)
+            recorder.games += 1
+        except (httpx.HTTPError, KeyError):
+            recorder.failed_games += 1
+
+
+async def run_load_test(clients: int = 50, games_per_client: int = 2, url: Optional[str] = None,
+                        timeout: float = 30.0) -> Dict[str, any]:
+    import httpx
+
+    scratch = None
+    if url is None:
+        from app.main import app
+        from app.services.score_service import ScoreStore, set_score_store
+
+        # Games finished in-process go to a throwaway database rather than
+        # the real score history
+        scratch = tempfile.TemporaryDirectory()
+        previous = set_score_store(ScoreStore(os.path.join(scratch.name, "scores.db")))
+        transport, base_url = httpx.ASGITransport(app=app), "http://botzee.test"
+    else:
+        transport, base_url = None, url
+    recorder = LatencyRecorder()
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=timeout, limits=limits) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(_client_loop(client, recorder, games_per_client) for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+    finally:
+        if scratch is not None:
+            set_score_store(previous).close()
+            scratch.cleanup()
+    report = recorder.report(elapsed)
+    report.update(target=url or "in-process", clients=clients)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive concurrent Botzee games against the API")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--games", type=int, default=2, help="games each client plays")
+    parser.add_argument("--url", help="base URL of a running server; in-process when omitted")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--out", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.clients, args.games, args.url, args.timeout))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if report["failed_games"]:
+        print(f"{report['failed_games']} games failed", file=sys.stderr)
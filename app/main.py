@@ -1 +1,23 @@
 # FastAPI entrypoint
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from app.api import bot, dice, score
+from app.game.fairness import start_recording
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A served app counts its dice in the fairness snapshot. In-process
+    # clients (tests, the load test) never run the lifespan, so their rolls
+    # stay out of it.
+    monitor = start_recording()
+    yield
+    monitor.flush()
+
+
+app = FastAPI(title="Botzee", lifespan=lifespan)
+app.include_router(dice.router)
+app.include_router(score.router)
+app.include_router(bot.router)
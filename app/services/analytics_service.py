@@ -0,0 +1,141 @@
+# Aggregate statistics over every stored game: per-category fill rates and
+# average scores, upper bonus hit rate and Yahtzee frequency. Input is read in
+# fixed-size chunks and reduced to small partial sums, so memory stays
+# constant however many games there are.
+import argparse
+import json
+import sqlite3
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.game.scorecard import ScoreCategory
+
+
+CATEGORY_ORDER = [category.value for category in ScoreCategory]
+PLAYER_COLUMNS = ["final_score", "upper_bonus", "yahtzee_bonuses"]
+
+
+class GameSummary:
+    # Running totals that chunks are folded into: one row per category of
+    # (entries, non-zero entries, points) and a handful of player-game sums
+    def __init__(self):
+        import pandas as pd
+
+        self.categories = pd.DataFrame(0, index=pd.Index(CATEGORY_ORDER, name="category"),
+                                       columns=["entries", "filled", "points"], dtype="int64")
+        self.player_games = 0
+        self.final_score_total = 0
+        self.bonus_hits = 0
+        self.yahtzee_bonuses = 0
+
+    def add_entries(self, entries) -> None:
+        # `entries` has category, score and is_bonus columns, one row per
+        # ScoreEntry. Bonus rows only feed the Yahtzee bonus count, which
+        # comes from the player rows, so they are dropped here.
+        scored = entries.loc[~entries["is_bonus"].astype(bool), ["category", "score"]]
+        partial = scored.assign(filled=scored["score"] > 0).groupby("category").agg(
+            entries=("score", "size"), filled=("filled", "sum"), points=("score", "sum")
+        )
+        self.categories = self.categories.add(partial.reindex(self.categories.index, fill_value=0), fill_value=0)
+
+    def add_players(self, players) -> None:
+        # `players` has final_score, upper_bonus and yahtzee_bonuses columns,
+        # one row per player per game
+        self.player_games += len(players)
+        self.final_score_total += int(players["final_score"].sum())
+        self.bonus_hits += int((players["upper_bonus"] > 0).sum())
+        self.yahtzee_bonuses += int(players["yahtzee_bonuses"].sum())
+
+    def report(self) -> Dict[str, any]:
+        games = self.player_games
+        categories = self.categories
+        entries = categories["entries"].where(categories["entries"] > 0)
+        fill_rates = (categories["filled"] / entries).fillna(0.0)
+        average_scores = (categories["points"] / entries).fillna(0.0)
+        yahtzees = int(categories.at[ScoreCategory.YAHTZEE.value, "filled"])
+        return {
+            "player_games": games,
+            "average_final_score": self.final_score_total / games if games else 0.0,
+            "upper_bonus_rate": self.bonus_hits / games if games else 0.0,
+            # Games with 50 in the Yahtzee box, and Yahtzees of any kind
+            # (the boxed one plus every bonus) per game
+            "yahtzee_rate": yahtzees / games if games else 0.0,
+            "yahtzees_per_game": (yahtzees + self.yahtzee_bonuses) / games if games else 0.0,
+            "categories": {
+                category: {
+                    "entries": int(categories.at[category, "entries"]),
+                    "fill_rate": float(fill_rates[category]),
+                    "average_score": float(average_scores[category])
+                }
+                for category in CATEGORY_ORDER
+            }
+        }
+
+
+def store_chunks(path: str, chunk_size: int = 200_000) -> Iterator[Tuple[Optional[object], Optional[object]]]:
+    # (entries, players) DataFrame pairs read straight from a score store
+    # database; each chunk fills one side only
+    import pandas as pd
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for entries in pd.read_sql_query("SELECT category, score, is_bonus FROM score_entries", conn,
+                                         chunksize=chunk_size):
+            yield entries, None
+        for players in pd.read_sql_query(f"SELECT {', '.join(PLAYER_COLUMNS)} FROM game_players", conn,
+                                         chunksize=chunk_size):
+            yield None, players
+    finally:
+        conn.close()
+
+
+def export_chunks(path: str, chunk_size: int = 20_000) -> Iterator[Tuple[object, object]]:
+    # (entries, players) DataFrame pairs from a JSON lines game log written
+    # by ScoreStore.export_games, `chunk_size` games at a time
+    import pandas as pd
+
+    from .score_service import open_text
+
+    with open_text(path, "r") as lines:
+        for games in pd.read_json(lines, lines=True, chunksize=chunk_size):
+            records = games["players"].explode().dropna().tolist()
+            players = pd.DataFrame.from_records(records, columns=PLAYER_COLUMNS + ["entries"])
+            entries = pd.DataFrame.from_records(
+                players["entries"].explode().dropna().tolist(), columns=["category", "score", "is_bonus"]
+            )
+            yield entries, players[PLAYER_COLUMNS]
+
+
+def summarize(chunks: Iterator[Tuple[Optional[object], Optional[object]]]) -> Dict[str, any]:
+    summary = GameSummary()
+    for entries, players in chunks:
+        if entries is not None and len(entries):
+            summary.add_entries(entries)
+        if players is not None and len(players):
+            summary.add_players(players)
+    return summary.report()
+
+
+def write_report(report: Dict[str, any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    from .score_service import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Summarise stored Botzee games")
+    parser.add_argument("--db", default=DB_PATH, help="score store database to read")
+    parser.add_argument("--export", help="read a JSON lines game export instead of the database")
+    parser.add_argument("--chunk-size", type=int, help="rows (database) or games (export) per chunk")
+    parser.add_argument("--out", default="game_summary.json", help="report file to write")
+    args = parser.parse_args()
+
+    if args.export:
+        chunks = export_chunks(args.export, args.chunk_size or 20_000)
+    else:
+        chunks = store_chunks(args.db, args.chunk_size or 200_000)
+    report = summarize(chunks)
+    write_report(report, args.out)
+    print(f"Summarised {report['player_games']} player games into {args.out}", file=sys.stderr)
@@ -1 +1,76 @@
-# Placeholder for calling the fine-tuned LLM
+# Botzee's move choices and keep hints for human players. The cheapest source
+# that covers the position answers: the opening book on the first turn, then
+# the strategy tables, which are exact for every position. (The endgame solver
+# gives the same moves, so it is left to the distribution and win probability
+# paths that need more than expected values.) Given the opponents'
+# scorecards, Botzee plays to beat them instead: the risk table that fits the
+# score it needs replaces both whenever it is not the plain expected value
+# table. Calling the fine-tuned LLM is still a placeholder.
+from typing import Dict, Sequence, Tuple
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import roll_index
+from app.solver.keep_ranker import KeepOption, best_category, rank_keeps
+from app.solver.opening_book import load_opening_book
+from app.solver.risk_tables import select_risk
+from app.solver.state import scorecard_state
+from .single_flight import SingleFlight
+
+
+# Concurrent requests for the same position share one computation. Keys are
+# canonical: (request kind, solver state, roll index, rolls left, risk), so
+# players holding the same dice in any order on equivalent scorecards
+# coalesce.
+_bot_flights = SingleFlight()
+_hint_flights = SingleFlight()
+
+
+def _canonical_key(kind: str, dice: Sequence[int], rolls_left: int, scorecard: Scorecard,
+                   risk: float = 0.0) -> Tuple:
+    return kind, scorecard_state(scorecard), roll_index(dice), rolls_left, risk
+
+
+def _is_opening(scorecard: Scorecard) -> bool:
+    return len(scorecard.get_available_categories()) == len(ScoreCategory)
+
+
+def choose_keep(dice: Sequence[int], rolls_left: int, scorecard: Scorecard,
+                opponents: Sequence[Scorecard] = ()) -> Tuple[int, ...]:
+    # Dice values for Botzee to hold before rerolling
+    risk = select_risk(scorecard, opponents)
+    if risk:
+        return _bot_flights.do(
+            _canonical_key("keep", dice, rolls_left, scorecard, risk),
+            lambda: rank_keeps(dice, rolls_left, scorecard, risk)[0].keep
+        )
+    if _is_opening(scorecard):
+        move = load_opening_book().best_keep(dice, rolls_left)
+        if move is not None:
+            return move[0]
+    return _bot_flights.do(
+        _canonical_key("keep", dice, rolls_left, scorecard),
+        lambda: rank_keeps(dice, rolls_left, scorecard)[0].keep
+    )
+
+
+def choose_category(dice: Sequence[int], scorecard: Scorecard,
+                    opponents: Sequence[Scorecard] = ()) -> ScoreCategory:
+    # Open category for Botzee to score its final dice in
+    risk = select_risk(scorecard, opponents)
+    return _bot_flights.do(
+        _canonical_key("category", dice, 0, scorecard, risk),
+        lambda: best_category(dice, scorecard, risk)
+    )
+
+
+def get_keep_hints(dice: Sequence[int], rolls_left: int, scorecard: Scorecard) -> Tuple[KeepOption, ...]:
+    # Every distinct keep for a human player's dice, best first
+    return _hint_flights.do(
+        _canonical_key("hints", dice, rolls_left, scorecard),
+        lambda: rank_keeps(dice, rolls_left, scorecard)
+    )
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    # Executed versus coalesced request counts, for the metrics endpoint
+    return {"bot": _bot_flights.stats(), "hints": _hint_flights.stats()}
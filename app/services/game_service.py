@@ -0,0 +1,131 @@
+# Single-player games played over the API. Each session holds a scorecard and
+# the dice of the turn in progress; sessions live in process memory and are
+# dropped once their scorecard is full, or once abandoned.
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from app.game.dice import DiceManager, DiceRoll
+from app.game.scorecard import ScoreCategory, Scorecard
+
+
+ROLLS_PER_TURN = 3
+
+# Abandoned games are dropped after an hour untouched, and the least
+# recently used go first once this many are open
+MAX_SESSIONS = 10_000
+IDLE_TIMEOUT = 3600.0
+
+DEFAULT_PLAYER = "Anonymous"
+
+
+class GameSession:
+    def __init__(self, game_id: int, player: str = DEFAULT_PLAYER):
+        self.game_id = game_id
+        self.player = player
+        self.scorecard = Scorecard()
+        self.dice = DiceManager()
+        self.rolls_left = ROLLS_PER_TURN
+        # Endpoints run on a thread pool, so two requests for the same game
+        # can arrive together
+        self.lock = threading.Lock()
+
+    @property
+    def current_dice(self) -> List[int]:
+        return self.dice.current_roll.copy()
+
+    def roll(self, keep: Optional[List[int]] = None) -> List[int]:
+        # First roll of a turn, or a reroll holding the dice values in `keep`
+        if self.scorecard.is_complete():
+            raise ValueError("Game is over")
+        if self.rolls_left == 0:
+            raise ValueError("No rolls left this turn")
+        if self.rolls_left == ROLLS_PER_TURN:
+            if keep:
+                raise ValueError("Cannot keep dice before the first roll")
+            self.dice.roll_all_dice()
+        else:
+            self.dice.reroll_by_value(keep or [])
+        self.rolls_left -= 1
+        return self.current_dice
+
+    def score(self, category: ScoreCategory) -> int:
+        if self.rolls_left == ROLLS_PER_TURN:
+            raise ValueError("Roll before scoring")
+        score = self.scorecard.score_category(category, DiceRoll(self.current_dice))
+        self.dice.current_roll = []
+        self.rolls_left = ROLLS_PER_TURN
+        return score
+
+    def to_dict(self) -> Dict[str, any]:
+        return {
+            "game_id": self.game_id,
+            "player": self.player,
+            "dice": self.current_dice,
+            "rolls_left": self.rolls_left,
+            "scorecard": self.scorecard.to_dict()
+        }
+
+
+class GameSessions:
+    # Sessions in least recently used order, each with the time it was last
+    # touched. Expired sessions are swept whenever a game is created, so the
+    # map never outgrows max_sessions.
+    def __init__(self, max_sessions: int = MAX_SESSIONS, idle_timeout: float = IDLE_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._sessions: "OrderedDict[int, GameSession]" = OrderedDict()
+        self._last_used: Dict[int, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, player: str = DEFAULT_PLAYER) -> GameSession:
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+            session = GameSession(next(self._ids), player)
+            self._sessions[session.game_id] = session
+            self._last_used[session.game_id] = now
+        return session
+
+    def get(self, game_id: int) -> GameSession:
+        with self._lock:
+            now = self._clock()
+            session = self._sessions.get(game_id)
+            if session is None or now - self._last_used[game_id] > self.idle_timeout:
+                if session is not None:
+                    self._drop(game_id)
+                raise KeyError(game_id)
+            self._sessions.move_to_end(game_id)
+            self._last_used[game_id] = now
+            return session
+
+    def discard(self, game_id: int) -> None:
+        with self._lock:
+            self._drop(game_id)
+
+    def _expire(self, now: float) -> None:
+        for game_id in list(self._sessions):
+            if now - self._last_used[game_id] <= self.idle_timeout:
+                break
+            self._drop(game_id)
+
+    def _drop(self, game_id: int) -> None:
+        self._sessions.pop(game_id, None)
+        self._last_used.pop(game_id, None)
+
+
+_sessions = GameSessions()
+
+
+def get_game_sessions() -> GameSessions:
+    return _sessions
@@ -0,0 +1,209 @@
+# Leaderboards over final game scores: rank, top-K and percentile queries for
+# all-time, daily and weekly windows, held in memory and rebuilt from the
+# score store on startup
+import threading
+import time
+from bisect import insort
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .score_service import GameRecord, ScoreStore, get_score_store
+
+
+# Highest possible grand total: five of a kind in every upper box (105) plus
+# the 35 bonus, the best of each lower box (235), and a 100 point bonus for
+# each of the twelve further Yahtzees
+MAX_SCORE = 1575
+
+WINDOWS = ("all", "daily", "weekly")
+DAY = 86_400
+
+
+class LeaderboardEntry(NamedTuple):
+    score: int
+    player: str
+    game_id: int
+    finished_at: float
+
+
+class ScoreCounts:
+    # Fenwick tree over score values. Scores are bounded integers, so every
+    # operation is O(log MAX_SCORE) and the memory is fixed however many games
+    # are counted.
+    def __init__(self):
+        self.tree = [0] * (MAX_SCORE + 2)
+        self.total = 0
+
+    def add(self, score: int) -> None:
+        i = min(max(score, 0), MAX_SCORE) + 1
+        while i < len(self.tree):
+            self.tree[i] += 1
+            i += i & -i
+        self.total += 1
+
+    def count_below(self, score: int) -> int:
+        i = min(max(score, 0), MAX_SCORE + 1)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def score_at(self, position: int) -> int:
+        # Score of the entry at 0-based `position` in ascending order
+        i = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            if i + step < len(self.tree) and self.tree[i + step] <= position:
+                i += step
+                position -= self.tree[i]
+            step >>= 1
+        return i
+
+
+class _Window:
+    def __init__(self, top_capacity: int):
+        self.counts = ScoreCounts()
+        self.top_capacity = top_capacity
+        # Best entries first; ties go to whoever got there first
+        self.top: List[Tuple[Tuple[int, float, int], LeaderboardEntry]] = []
+
+    def add(self, entry: LeaderboardEntry) -> None:
+        self.counts.add(entry.score)
+        item = ((-entry.score, entry.finished_at, entry.game_id), entry)
+        if len(self.top) < self.top_capacity or item < self.top[-1]:
+            insort(self.top, item)
+            if len(self.top) > self.top_capacity:
+                self.top.pop()
+
+
+class Leaderboard:
+    # Daily and weekly windows are keyed on UTC day and Monday-based week
+    # numbers. Only the newest `daily_windows` days and `weekly_windows`
+    # weeks are kept, so memory stays bounded as time passes.
+    def __init__(self, top_capacity: int = 1000, daily_windows: int = 7, weekly_windows: int = 4):
+        self.top_capacity = top_capacity
+        self.retention = {"daily": daily_windows, "weekly": weekly_windows}
+        self._windows: Dict[Tuple[str, int], _Window] = {}
+        self._last_game_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def window_key(window: str, at: float) -> Tuple[str, int]:
+        if window == "all":
+            return window, 0
+        day = int(at // DAY)
+        if window == "daily":
+            return window, day
+        if window == "weekly":
+            # 1 January 1970 was a Thursday
+            return window, (day + 3) // 7
+        raise ValueError(f"Unknown leaderboard window {window!r}; expected one of {WINDOWS}")
+
+    def add(self, entry: LeaderboardEntry) -> None:
+        with self._lock:
+            self._add(entry)
+
+    def _add(self, entry: LeaderboardEntry) -> None:
+        for window in WINDOWS:
+            key = self.window_key(window, entry.finished_at)
+            if key not in self._windows:
+                if not self._keep_window(key):
+                    continue
+                self._windows[key] = _Window(self.top_capacity)
+            self._windows[key].add(entry)
+
+    def add_games(self, ids: Sequence[int], games: Sequence[GameRecord]) -> None:
+        # ScoreStore listener: indexes every player of each committed game.
+        # Games already picked up by rebuild are skipped.
+        with self._lock:
+            for game_id, game in zip(ids, games):
+                if game_id <= self._last_game_id:
+                    continue
+                for record in game.players:
+                    self._add(LeaderboardEntry(record.final_score, record.player, game_id, game.finished_at))
+
+    def _keep_window(self, key: Tuple[str, int]) -> bool:
+        # Makes room for a new time window, dropping the oldest of its kind
+        # beyond retention. False when the window is older than all of them.
+        window, period = key
+        if window == "all":
+            return True
+        periods = sorted(p for w, p in self._windows if w == window)
+        if len(periods) < self.retention[window]:
+            return True
+        if period < periods[0]:
+            return False
+        del self._windows[window, periods[0]]
+        return True
+
+    def _window(self, window: str, at: Optional[float]) -> Optional[_Window]:
+        return self._windows.get(self.window_key(window, time.time() if at is None else at))
+
+    def size(self, window: str = "all", at: Optional[float] = None) -> int:
+        with self._lock:
+            counts = self._window(window, at)
+            return counts.counts.total if counts else 0
+
+    def rank(self, score: int, window: str = "all", at: Optional[float] = None) -> int:
+        # 1 + the number of entries with a strictly higher score
+        with self._lock:
+            entries = self._window(window, at)
+            if entries is None:
+                return 1
+            return 1 + entries.counts.total - entries.counts.count_below(score + 1)
+
+    def percentile(self, score: int, window: str = "all", at: Optional[float] = None) -> Optional[float]:
+        # Percentage of entries with a strictly lower score, or None when the
+        # window is empty
+        with self._lock:
+            entries = self._window(window, at)
+            if entries is None or not entries.counts.total:
+                return None
+            return 100.0 * entries.counts.count_below(score) / entries.counts.total
+
+    def score_at_percentile(self, percent: float, window: str = "all", at: Optional[float] = None) -> Optional[int]:
+        # Lowest score at or above `percent` percent of the window's entries
+        if not 0 <= percent <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        with self._lock:
+            entries = self._window(window, at)
+            if entries is None or not entries.counts.total:
+                return None
+            position = min(int(percent / 100 * entries.counts.total), entries.counts.total - 1)
+            return entries.counts.score_at(position)
+
+    def top(self, k: int = 100, window: str = "all", at: Optional[float] = None) -> List[LeaderboardEntry]:
+        if not 0 < k <= self.top_capacity:
+            raise ValueError(f"Top lists hold between 1 and {self.top_capacity} entries")
+        with self._lock:
+            entries = self._window(window, at)
+            return [entry for _, entry in entries.top[:k]] if entries else []
+
+    def rebuild(self, store: ScoreStore) -> None:
+        # Replaces the index with every final score in the store. Games the
+        # store commits meanwhile have higher ids than anything the scan
+        # sees, and their listener calls wait on the lock until it is done.
+        with self._lock:
+            self._windows = {}
+            self._last_game_id = 0
+            for game_id, finished_at, player, score in store.iter_final_scores():
+                self._add(LeaderboardEntry(score, player, game_id, finished_at))
+                self._last_game_id = game_id
+
+
+_leaderboard: Optional[Leaderboard] = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    # Process-wide leaderboard over the default score store: rebuilt from it
+    # on first use, then kept current by the store's writer
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            store = get_score_store()
+            leaderboard = Leaderboard()
+            store.add_listener(leaderboard.add_games)
+            leaderboard.rebuild(store)
+            _leaderboard = leaderboard
+        return _leaderboard
@@ -0,0 +1,89 @@
+# Exact odds of filling each category from the current dice
+from typing import Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+
+from app.game.scorecard import ScoreCategory, ScoreCalculator
+from app.game.transitions import (
+    KEEPS, ROLL_KEEPS, ROLLS, ROLL_PROBABILITIES, keep_values, roll_index, roll_values_with_rerolls
+)
+
+
+# A category counts as hit once it scores at least this much. Lower section
+# categories need any non-zero score; upper categories need three of their
+# face, the pace that earns the 63 point upper bonus.
+HIT_THRESHOLDS: Dict[ScoreCategory, int] = {
+    ScoreCategory.ONES: 3, ScoreCategory.TWOS: 6, ScoreCategory.THREES: 9,
+    ScoreCategory.FOURS: 12, ScoreCategory.FIVES: 15, ScoreCategory.SIXES: 18,
+    ScoreCategory.THREE_OF_A_KIND: 1, ScoreCategory.FOUR_OF_A_KIND: 1,
+    ScoreCategory.FULL_HOUSE: 1, ScoreCategory.SMALL_STRAIGHT: 1,
+    ScoreCategory.LARGE_STRAIGHT: 1, ScoreCategory.YAHTZEE: 1, ScoreCategory.CHANCE: 1
+}
+
+
+@lru_cache(maxsize=None)
+def _final_values(category: ScoreCategory) -> Tuple[List[float], List[float]]:
+    threshold = HIT_THRESHOLDS[category]
+    scores = [ScoreCalculator.get_score_table(roll)[category] for roll in ROLLS]
+    hits = [1.0 if score >= threshold else 0.0 for score in scores]
+    return hits, [float(score) for score in scores]
+
+
+@lru_cache(maxsize=None)
+def _roll_values(category: ScoreCategory, rerolls: int) -> Tuple[List[float], List[float]]:
+    # Hit probability and expected score of every roll with `rerolls` left,
+    # each under the keep policy that maximises that quantity.
+    if rerolls == 0:
+        return _final_values(category)
+    hits, scores = _roll_values(category, rerolls - 1)
+    return roll_values_with_rerolls(hits, 1), roll_values_with_rerolls(scores, 1)
+
+
+@lru_cache(maxsize=None)
+def _keep_values(category: ScoreCategory, rerolls: int) -> Tuple[List[float], List[float]]:
+    hits, scores = _roll_values(category, rerolls - 1)
+    return keep_values(hits), keep_values(scores)
+
+
+def _best_hit_keep(category: ScoreCategory, index: int, rerolls: int) -> List[int]:
+    # Keep that maximises the hit probability, ties broken by expected score
+    hits, scores = _keep_values(category, rerolls)
+    best = max(ROLL_KEEPS[index], key=lambda keep: (hits[keep], scores[keep]))
+    return list(KEEPS[best])
+
+
+def precompute() -> None:
+    for category in ScoreCategory:
+        for rerolls in range(3):
+            _roll_values(category, rerolls)
+            if rerolls:
+                _keep_values(category, rerolls)
+
+
+def get_category_odds(dice: Optional[Sequence[int]], rolls_left: int) -> Dict[ScoreCategory, Dict[str, any]]:
+    # With dice on the table `rolls_left` is the number of rerolls still
+    # allowed (0-2). Without dice it is the number of rolls in the turn (1-3)
+    # and the odds are averaged over the opening roll.
+    if dice:
+        if not 0 <= rolls_left <= 2:
+            raise ValueError("Rolls left must be between 0 and 2 once dice are rolled")
+        index = roll_index(dice)
+    elif not 1 <= rolls_left <= 3:
+        raise ValueError("Rolls left must be between 1 and 3 before the first roll")
+
+    odds = {}
+    for category in ScoreCategory:
+        if dice:
+            hits, scores = _roll_values(category, rolls_left)
+            odds[category] = {
+                "probability": hits[index],
+                "expected_score": scores[index],
+                "keep": _best_hit_keep(category, index, rolls_left) if rolls_left else None
+            }
+        else:
+            hits, scores = _roll_values(category, rolls_left - 1)
+            odds[category] = {
+                "probability": sum(p * hit for p, hit in zip(ROLL_PROBABILITIES, hits)),
+                "expected_score": sum(p * score for p, score in zip(ROLL_PROBABILITIES, scores)),
+                "keep": None
+            }
+    return odds
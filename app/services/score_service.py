@@ -1 +1,454 @@
-# Logic for managing scores
+# Durable storage for finished games, their per-turn ScoreEntry rows and
+# per-player aggregates, in a local SQLite database
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.game.scorecard import ScoreCategory, ScoreEntry, Scorecard
+
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "botzee.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    seat INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    final_score INTEGER NOT NULL,
+    upper_bonus INTEGER NOT NULL,
+    yahtzee_bonuses INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS score_entries (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    seat INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    dice TEXT NOT NULL,
+    is_bonus INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY,
+    games_played INTEGER NOT NULL,
+    games_won INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    yahtzee_bonuses INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_players_by_player ON game_players (player, game_id);
+CREATE INDEX IF NOT EXISTS games_by_finish ON games (finished_at);
+"""
+
+# Statement text is fixed, so sqlite3's per-connection statement cache
+# prepares each one once and reuses it for every batch
+INSERT_GAME = "INSERT INTO games (id, finished_at) VALUES (?, ?)"
+INSERT_PLAYER = "INSERT INTO game_players VALUES (?, ?, ?, ?, ?, ?, ?)"
+INSERT_ENTRY = "INSERT INTO score_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+UPSERT_STATS = """
+INSERT INTO player_stats VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    games_played = games_played + excluded.games_played,
+    games_won = games_won + excluded.games_won,
+    total_score = total_score + excluded.total_score,
+    best_score = MAX(best_score, excluded.best_score),
+    yahtzee_bonuses = yahtzee_bonuses + excluded.yahtzee_bonuses
+"""
+SELECT_PLAYERS = "SELECT seat, player FROM game_players WHERE game_id = ? ORDER BY seat"
+SELECT_ENTRIES = ("SELECT seat, category, score, dice, is_bonus FROM score_entries "
+                  "WHERE game_id = ? ORDER BY seat, position")
+
+
+@dataclass
+class PlayerRecord:
+    player: str
+    final_score: int
+    upper_bonus: int
+    yahtzee_bonuses: int
+    entries: List[ScoreEntry]
+
+
+@dataclass
+class GameRecord:
+    players: List[PlayerRecord]
+    finished_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_scorecards(cls, scorecards: Dict[str, Scorecard], finished_at: Optional[float] = None) -> "GameRecord":
+        players = [
+            PlayerRecord(
+                player=name,
+                final_score=card.get_grand_total(),
+                upper_bonus=card.get_upper_section_bonus(),
+                yahtzee_bonuses=card.yahtzee_bonuses,
+                entries=list(card.score_entries)
+            )
+            for name, card in scorecards.items()
+        ]
+        return cls(players, time.time() if finished_at is None else finished_at)
+
+    def to_json(self) -> Dict[str, any]:
+        # Line format of bulk exports; entries use Scorecard.to_dict's keys
+        return {
+            "finished_at": self.finished_at,
+            "players": [
+                {
+                    "player": record.player,
+                    "final_score": record.final_score,
+                    "upper_bonus": record.upper_bonus,
+                    "yahtzee_bonuses": record.yahtzee_bonuses,
+                    "entries": [
+                        {"category": entry.category.value, "score": entry.score,
+                         "dice": entry.dice_used, "is_bonus": entry.is_bonus}
+                        for entry in record.entries
+                    ]
+                }
+                for record in self.players
+            ]
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, any]) -> "GameRecord":
+        return cls(
+            players=[
+                PlayerRecord(
+                    player=record["player"],
+                    final_score=record["final_score"],
+                    upper_bonus=record["upper_bonus"],
+                    yahtzee_bonuses=record["yahtzee_bonuses"],
+                    entries=[
+                        ScoreEntry(ScoreCategory(entry["category"]), entry["score"], list(entry["dice"]),
+                                   entry["is_bonus"])
+                        for entry in record["entries"]
+                    ]
+                )
+                for record in data["players"]
+            ],
+            finished_at=data["finished_at"]
+        )
+
+
+def _game_rows(game_id: int, game: GameRecord):
+    best = max(record.final_score for record in game.players)
+    contested = len(game.players) > 1
+    for seat, record in enumerate(game.players):
+        # Shared top scores count as a win for everyone on them; a solo game
+        # has no winner
+        won = int(contested and record.final_score == best)
+        yield (game_id, seat, record.player, record.final_score, record.upper_bonus, record.yahtzee_bonuses, won), [
+            # Bonus entries are logged just before the turn they belong to
+            (game_id, seat, position, turn, entry.category.value, entry.score,
+             "".join(map(str, entry.dice_used)), int(entry.is_bonus))
+            for position, (turn, entry) in enumerate(_numbered_entries(record.entries))
+        ]
+
+
+def _numbered_entries(entries: Sequence[ScoreEntry]) -> Iterator[Tuple[int, ScoreEntry]]:
+    turn = 1
+    for entry in entries:
+        yield turn, entry
+        if not entry.is_bonus:
+            turn += 1
+
+
+def _insert_games(conn: sqlite3.Connection, games: Sequence[GameRecord]) -> List[int]:
+    # One write transaction for the whole batch. Ids are allocated under the
+    # write lock, so batches from the writer thread and bulk imports on other
+    # connections never collide.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM games").fetchone()[0]
+        ids = list(range(first_id, first_id + len(games)))
+        player_rows, entry_rows = [], []
+        stats: Dict[str, List[int]] = {}
+        for game_id, game in zip(ids, games):
+            for player_row, entries in _game_rows(game_id, game):
+                player_rows.append(player_row)
+                entry_rows.extend(entries)
+                _, _, name, score, _, yahtzee_bonuses, won = player_row
+                totals = stats.setdefault(name, [0, 0, 0, 0, 0])
+                totals[0] += 1
+                totals[1] += won
+                totals[2] += score
+                totals[3] = max(totals[3], score)
+                totals[4] += yahtzee_bonuses
+        conn.executemany(INSERT_GAME, [(game_id, game.finished_at) for game_id, game in zip(ids, games)])
+        conn.executemany(INSERT_PLAYER, player_rows)
+        conn.executemany(INSERT_ENTRY, entry_rows)
+        conn.executemany(UPSERT_STATS, [(name, *totals) for name, totals in stats.items()])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return ids
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Transactions are managed explicitly, hence isolation_level=None
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, cached_statements=64)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only syncs at checkpoints: a power cut can lose the
+    # last few batches but never corrupts the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ScoreStore:
+    # record_game only queues the game: a background writer thread drains
+    # the queue into one transaction per batch, so callers never wait on disk
+    # I/O. Reads use a separate connection, which WAL lets run alongside the
+    # writer.
+    def __init__(self, path: Optional[str] = None, batch_size: int = 500, flush_interval: float = 0.05):
+        self.path = path or DB_PATH
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._reader = connect(self.path)
+        self._read_lock = threading.Lock()
+        self._writer = connect(self.path)
+        self._queue: "queue.Queue[Optional[GameRecord]]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._listeners: List[Callable[[List[int], Sequence[GameRecord]], None]] = []
+        self._thread = threading.Thread(target=self._write_loop, name="score-writer", daemon=True)
+        self._thread.start()
+
+    def record_game(self, game: GameRecord) -> None:
+        if self._error is not None:
+            raise RuntimeError("Score writer stopped") from self._error
+        if not self._thread.is_alive():
+            raise RuntimeError("Score store is closed")
+        self._queue.put(game)
+
+    def add_listener(self, callback: Callable[[List[int], Sequence[GameRecord]], None]) -> None:
+        # Called with the new game ids and records after every committed
+        # batch, on the thread that committed it
+        self._listeners.append(callback)
+
+    def _committed(self, ids: List[int], games: Sequence[GameRecord]) -> None:
+        for callback in self._listeners:
+            callback(ids, games)
+
+    def record_scorecards(self, scorecards: Dict[str, Scorecard]) -> None:
+        self.record_game(GameRecord.from_scorecards(scorecards))
+
+    def flush(self) -> None:
+        # Block until every game queued so far is committed
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("Score writer stopped") from self._error
+
+    def close(self) -> None:
+        # Commits everything queued so far, then stops the writer. Safe to
+        # call more than once.
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._writer.close()
+        self._reader.close()
+
+    def _write_loop(self) -> None:
+        while True:
+            game = self._queue.get()
+            if game is None:
+                self._queue.task_done()
+                return
+            batch = [game]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    game = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if game is None:
+                    stop = True
+                    break
+                batch.append(game)
+            try:
+                self._committed(_insert_games(self._writer, batch), batch)
+            except BaseException as error:
+                self._error = error
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def load_game(self, game_id: int) -> Dict[str, Scorecard]:
+        # Scorecards of a stored game, rebuilt from its entries
+        with self._read_lock:
+            players = self._reader.execute(SELECT_PLAYERS, (game_id,)).fetchall()
+            entries = self._reader.execute(SELECT_ENTRIES, (game_id,)).fetchall()
+        if not players:
+            raise KeyError(f"No game with id {game_id}")
+        scorecards = {seat: Scorecard() for seat, _ in players}
+        for seat, category, score, dice, is_bonus in entries:
+            card = scorecards[seat]
+            entry = ScoreEntry(ScoreCategory(category), score, [int(value) for value in dice], bool(is_bonus))
+            card.score_entries.append(entry)
+            if entry.is_bonus:
+                card.yahtzee_bonuses += 1
+            else:
+                card.scores[entry.category] = score
+        for card in scorecards.values():
+            card.get_upper_section_bonus()
+        return {name: scorecards[seat] for seat, name in players}
+
+    def player_stats(self, player: str) -> Optional[Dict[str, any]]:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT games_played, games_won, total_score, best_score, yahtzee_bonuses "
+                "FROM player_stats WHERE player = ?", (player,)
+            ).fetchone()
+        if row is None:
+            return None
+        games_played, games_won, total_score, best_score, yahtzee_bonuses = row
+        return {
+            "games_played": games_played,
+            "games_won": games_won,
+            "average_score": total_score / games_played,
+            "best_score": best_score,
+            "yahtzee_bonuses": yahtzee_bonuses
+        }
+
+    def export_games(self, path: str, since: float = 0.0) -> int:
+        # Streams games finished at or after `since` to a JSON lines file
+        # (gzip-compressed when the path ends in .gz), one game per line, in
+        # constant memory. Returns the number of games written.
+        count = 0
+        with open_text(path, "w") as out:
+            for game in self._iter_games(since):
+                out.write(json.dumps(game.to_json(), separators=(",", ":")))
+                out.write("\n")
+                count += 1
+        return count
+
+    def import_games(self, path: str, batch_size: int = 20_000) -> int:
+        # Loads a file written by export_games in batches of `batch_size`
+        # games, one transaction each. Imported games get fresh ids.
+        conn = connect(self.path)
+        count = 0
+        try:
+            with open_text(path, "r") as lines:
+                batch = []
+                for line in lines:
+                    if line.strip():
+                        batch.append(GameRecord.from_json(json.loads(line)))
+                    if len(batch) >= batch_size:
+                        count += self._import_batch(conn, batch)
+                        batch = []
+                if batch:
+                    count += self._import_batch(conn, batch)
+        finally:
+            conn.close()
+        return count
+
+    def _import_batch(self, conn: sqlite3.Connection, batch: List[GameRecord]) -> int:
+        self._committed(_insert_games(conn, batch), batch)
+        return len(batch)
+
+    def iter_final_scores(self, since: float = 0.0) -> Iterator[Tuple[int, float, str, int]]:
+        # (game id, finished at, player, final score) for every player of
+        # every game finished at or after `since`, streamed in game id order
+        conn = connect(self.path)
+        try:
+            yield from conn.execute(
+                "SELECT g.id, g.finished_at, p.player, p.final_score "
+                "FROM games g JOIN game_players p ON p.game_id = g.id WHERE g.finished_at >= ? "
+                "ORDER BY g.id, p.seat", (since,)
+            )
+        finally:
+            conn.close()
+
+    def _iter_games(self, since: float) -> Iterator[GameRecord]:
+        # Walks games, players and entries as three cursors in game id order,
+        # merging them as it goes instead of querying per game
+        conn = connect(self.path)
+        try:
+            games = conn.execute("SELECT id, finished_at FROM games WHERE finished_at >= ? ORDER BY id", (since,))
+            players = conn.execute(
+                "SELECT p.game_id, p.seat, p.player, p.final_score, p.upper_bonus, p.yahtzee_bonuses "
+                "FROM game_players p JOIN games g ON g.id = p.game_id WHERE g.finished_at >= ? "
+                "ORDER BY p.game_id, p.seat", (since,)
+            )
+            entries = conn.execute(
+                "SELECT e.game_id, e.seat, e.category, e.score, e.dice, e.is_bonus "
+                "FROM score_entries e JOIN games g ON g.id = e.game_id WHERE g.finished_at >= ? "
+                "ORDER BY e.game_id, e.seat, e.position", (since,)
+            )
+            player_rows = _peekable(players)
+            entry_rows = _peekable(entries)
+            for game_id, finished_at in games:
+                records = []
+                for _, seat, name, score, upper_bonus, yahtzee_bonuses in _take_while(player_rows, game_id):
+                    record = PlayerRecord(name, score, upper_bonus, yahtzee_bonuses, [])
+                    for _, _, category, points, dice, is_bonus in _take_while(entry_rows, game_id, seat):
+                        record.entries.append(
+                            ScoreEntry(ScoreCategory(category), points, [int(value) for value in dice], bool(is_bonus))
+                        )
+                    records.append(record)
+                yield GameRecord(records, finished_at)
+        finally:
+            conn.close()
+
+
+class _peekable:
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self.head = next(self._rows, None)
+
+    def advance(self) -> tuple:
+        row, self.head = self.head, next(self._rows, None)
+        return row
+
+
+def _take_while(rows: _peekable, *prefix) -> Iterator[tuple]:
+    while rows.head is not None and rows.head[:len(prefix)] == prefix:
+        yield rows.advance()
+
+
+def open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+_store: Optional[ScoreStore] = None
+_store_lock = threading.Lock()
+
+
+def get_score_store() -> ScoreStore:
+    # Process-wide store on the default database, opened on first use. The
+    # writer is a daemon thread, so the store is closed at interpreter exit
+    # to commit games still in its queue.
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ScoreStore()
+            atexit.register(_store.close)
+        return _store
+
+
+def set_score_store(store: Optional[ScoreStore]) -> Optional[ScoreStore]:
+    # Replaces the process-wide store (None reopens the default database on
+    # next use) and returns the previous one, which the caller still owns
+    global _store
+    with _store_lock:
+        previous, _store = _store, store
+    return previous
@@ -0,0 +1,129 @@
+# Live win and tie probabilities for every player in a game. Once every
+# player is down to the endgame solver's last few categories the answer is
+# exact; earlier positions are estimated by playing the game out.
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from math import sqrt
+from typing import List, Optional, Sequence, Tuple
+
+from app.game.scorecard import Scorecard
+from app.solver.endgame import MAX_OPEN_CATEGORIES, remaining_score_distribution
+from app.solver.playouts import playout_scores
+from app.solver.state import SolverState, scorecard_state
+
+
+@dataclass(frozen=True)
+class WinEstimate:
+    win: float
+    win_interval: Tuple[float, float]
+    tie: float
+    tie_interval: Tuple[float, float]
+    rollouts: int
+    exact: bool = False
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    if not trials:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    # At p = 0 or 1 the interval's edge is exactly 0 or 1, not its rounding
+    low = 0.0 if successes == 0 else max(0.0, centre - margin)
+    high = 1.0 if successes == trials else min(1.0, centre + margin)
+    return low, high
+
+
+def _exact_distribution(state: SolverState):
+    # P(exactly i more points) under optimal play, for positions the endgame
+    # solver covers; None for earlier ones
+    if len(state.open_categories()) > MAX_OPEN_CATEGORIES:
+        return None
+    return remaining_score_distribution(state)
+
+
+def _exact_estimates(players: Tuple[Tuple[SolverState, int], ...], distributions) -> Tuple[WinEstimate, ...]:
+    # Final scores are independent, so player i wins with
+    # sum_s P_i(s) * prod_j P_j(< s) and shares the top score with
+    # sum_s P_i(s) * (prod_j P_j(<= s) - prod_j P_j(< s))
+    import numpy as np
+
+    size = max(total + len(distribution) for (_, total), distribution in zip(players, distributions))
+    finals = np.zeros((len(players), size))
+    for row, ((_, total), distribution) in enumerate(zip(players, distributions)):
+        finals[row, total:total + len(distribution)] = distribution
+    at_most = finals.cumsum(axis=1)
+    below = at_most - finals
+
+    estimates = []
+    for i in range(len(players)):
+        others = [j for j in range(len(players)) if j != i]
+        others_below = below[others].prod(axis=0)
+        win = float(finals[i] @ others_below)
+        tie = float(finals[i] @ (at_most[others].prod(axis=0) - others_below))
+        estimates.append(WinEstimate(win, (win, win), tie, (tie, tie), rollouts=0, exact=True))
+    return tuple(estimates)
+
+
+@lru_cache(maxsize=64)
+def _estimate(players: Tuple[Tuple[SolverState, int], ...], budget: float, max_rollouts: int,
+              batch_size: int, seed: Optional[int]) -> Tuple[WinEstimate, ...]:
+    # Exact once every player is in the endgame. Before that, each rollout
+    # draws the endgame players' remaining scores from their exact
+    # distributions and plays the others' remaining turns out under the
+    # strategy table.
+    import numpy as np
+
+    distributions = [_exact_distribution(state) for state, _ in players]
+    if all(distribution is not None for distribution in distributions):
+        return _exact_estimates(players, distributions)
+
+    rng = np.random.default_rng(seed)
+    cdfs = [None if distribution is None else distribution.cumsum() for distribution in distributions]
+    totals = np.array([total for _, total in players])
+
+    def remaining(state: SolverState, cdf, size: int):
+        if cdf is None:
+            return playout_scores(state, size, rng)
+        return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+    wins = np.zeros(len(players), dtype=np.int64)
+    ties = np.zeros(len(players), dtype=np.int64)
+    rollouts = 0
+    deadline = time.perf_counter() + budget
+    # The first batch always runs, so there is an answer even on a tiny budget
+    while rollouts < max_rollouts and (not rollouts or time.perf_counter() < deadline):
+        size = min(batch_size, max_rollouts - rollouts)
+        finals = np.stack([remaining(state, cdf, size) for (state, _), cdf in zip(players, cdfs)], axis=1) + totals
+        leaders = finals == finals.max(axis=1, keepdims=True)
+        shared = leaders.sum(axis=1, keepdims=True) > 1
+        wins += (leaders & ~shared).sum(axis=0)
+        ties += (leaders & shared).sum(axis=0)
+        rollouts += size
+
+    return tuple(
+        WinEstimate(
+            win=float(wins[i] / rollouts),
+            win_interval=wilson_interval(int(wins[i]), rollouts),
+            tie=float(ties[i] / rollouts),
+            tie_interval=wilson_interval(int(ties[i]), rollouts),
+            rollouts=rollouts
+        )
+        for i in range(len(players))
+    )
+
+
+def estimate_win_probabilities(scorecards: Sequence[Scorecard], budget: float = 0.2,
+                               max_rollouts: int = 20_000, batch_size: int = 200,
+                               seed: Optional[int] = None) -> List[WinEstimate]:
+    # P(each player finishes strictly ahead of everyone else) and P(they
+    # share the top score), with 95% intervals, assuming optimal play from
+    # here on. Exact answers have zero-width intervals and no rollouts.
+    # Results are cached on the scorecards' positions, so calling this after
+    # every scoring event only does work when a score changed.
+    if len(scorecards) < 2:
+        raise ValueError("Win probabilities need at least two players")
+    players = tuple((scorecard_state(card), card.get_grand_total()) for card in scorecards)
+    return list(_estimate(players, budget, max_rollouts, batch_size, seed))
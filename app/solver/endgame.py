@@ -0,0 +1,307 @@
+# Exact play for the last few open categories, solved on demand without the
+# full strategy table
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import KEEPS, ROLL_KEEPS, roll_index
+from .keep_ranker import KeepOption
+from .state import (
+    CATEGORIES, FULL_MASK, ROLL_SCORES, UPPER_BONUS, UPPER_BONUS_THRESHOLD, UPPER_INDICES, YAHTZEE_BONUS,
+    YAHTZEE_INDEX, SolverState, scorecard_state
+)
+
+
+MAX_OPEN_CATEGORIES = 5
+
+# Upper total standing in for every total from which the bonus can no longer
+# be reached; they all play out the same.
+UPPER_OUT_OF_REACH = -1
+
+# Remaining scores an endgame can produce: every turn a Yahtzee with its
+# bonus, plus the upper bonus
+DISTRIBUTION_SIZE = MAX_OPEN_CATEGORIES * (max(map(max, ROLL_SCORES)) + YAHTZEE_BONUS) + UPPER_BONUS + 1
+
+
+class EndgameKey(NamedTuple):
+    open_mask: int
+    upper_total: int
+    yahtzee_scored: bool
+
+
+def endgame_key(state: SolverState) -> EndgameKey:
+    # Collapse upper totals that cannot change the outcome: once the bonus is
+    # earned or out of reach, the exact total no longer matters
+    open_mask = FULL_MASK ^ state.filled
+    upper_total = state.upper_total
+    if upper_total < UPPER_BONUS_THRESHOLD:
+        reachable = sum(5 * (category + 1) for category in UPPER_INDICES if open_mask & (1 << category))
+        if upper_total + reachable < UPPER_BONUS_THRESHOLD:
+            upper_total = UPPER_OUT_OF_REACH
+    return EndgameKey(open_mask, upper_total, state.yahtzee_scored)
+
+
+def key_state(key: EndgameKey) -> SolverState:
+    # A representative state for the key; an out-of-reach bonus behaves like
+    # an upper total of zero, which cannot reach it either
+    return SolverState(FULL_MASK ^ key.open_mask, max(key.upper_total, 0), key.yahtzee_scored)
+
+
+@lru_cache(maxsize=None)
+def _kernels():
+    import numpy as np
+    from .kernels import reroll_operators
+
+    scores = np.array(ROLL_SCORES)
+    yahtzee_rolls = np.where(scores[:, YAHTZEE_INDEX] == 50, YAHTZEE_BONUS, 0)
+    return reroll_operators(), scores, yahtzee_rolls
+
+
+def _successors(state: SolverState, category: int) -> List[Tuple[int, SolverState]]:
+    # (score in the category, next state) for every score it can take that
+    # changes where the game goes next
+    filled = state.filled | (1 << category)
+    if category in UPPER_INDICES:
+        face = category + 1
+        return [
+            (count * face, SolverState(filled, min(state.upper_total + count * face, UPPER_BONUS_THRESHOLD),
+                                       state.yahtzee_scored))
+            for count in range(6)
+        ]
+    if category == YAHTZEE_INDEX:
+        return [(50, SolverState(filled, state.upper_total, True)), (0, SolverState(filled, state.upper_total, False))]
+    return [(None, SolverState(filled, state.upper_total, state.yahtzee_scored))]
+
+
+class EndgameSolver:
+    # Keeps solved endgame values in a bounded LRU on EndgameKey. Solving a
+    # position enumerates everything reachable from it, then fills in the
+    # missing values a layer at a time, fewest open categories first.
+    #
+    # The API serves requests from a thread pool, so the public methods hold
+    # a lock while they read or grow the LRUs; the underscored helpers they
+    # share assume it is held. Concurrent misses queue behind one solve
+    # rather than repeating it.
+    def __init__(self, max_entries: int = 20_000, max_distributions: int = 2_000):
+        self.max_entries = max_entries
+        self.max_distributions = max_distributions
+        self.values: "OrderedDict[EndgameKey, float]" = OrderedDict()
+        self.distributions: "OrderedDict[EndgameKey, object]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def value(self, state: SolverState) -> float:
+        # Expected points still to come from the start of a turn, bonuses
+        # included, under optimal play
+        with self.lock:
+            return self._value(state)
+
+    def _value(self, state: SolverState) -> float:
+        if state.is_complete():
+            return 0.0
+        key = endgame_key(state)
+        if key not in self.values:
+            self._solve(key)
+        self.values.move_to_end(key)
+        return self.values[key]
+
+    def final_roll_values(self, state: SolverState, solved: Optional[Dict[EndgameKey, float]] = None):
+        # numpy vector over rolls: the best open category's points plus the
+        # value of the position it leads to
+        with self.lock:
+            return self._final_roll_choices(state, solved)[0]
+
+    def _final_roll_choices(self, state: SolverState, solved: Optional[Dict[EndgameKey, float]] = None):
+        # For every roll, the value of its best category as final_roll_values
+        # gives it, the points that category earns and the index of the
+        # position it leads to in the returned list of successors
+        import numpy as np
+
+        _, scores, yahtzee_rolls = _kernels()
+        lookup = solved.get if solved is not None else (lambda key: None)
+        bonus = yahtzee_rolls if state.yahtzee_scored else 0
+        final = np.full(len(scores), -np.inf)
+        earned = np.zeros(len(scores), dtype=np.int64)
+        chosen = np.zeros(len(scores), dtype=np.int64)
+        successors = []
+        for category in state.open_categories():
+            column = scores[:, category]
+            points = column + bonus
+            for score, next_state in _successors(state, category):
+                if next_state.is_complete():
+                    following = 0.0
+                else:
+                    next_key = endgame_key(next_state)
+                    following = lookup(next_key)
+                    if following is None:
+                        following = self._value(next_state)
+                crossed = (category in UPPER_INDICES and state.upper_total < UPPER_BONUS_THRESHOLD
+                           <= next_state.upper_total)
+                gained = points + (UPPER_BONUS if crossed else 0)
+                better = gained + following > final
+                if score is not None:
+                    better &= column == score
+                final[better] = gained[better] + following
+                earned[better] = gained[better]
+                chosen[better] = len(successors)
+                successors.append(next_state)
+        return final, earned, chosen, successors
+
+    def distribution(self, state: SolverState):
+        # numpy vector whose entry i is P(exactly i more points), bonuses
+        # included, under the same optimal play as value(). Point masses stay
+        # exact: only the positions optimal play can reach are visited.
+        with self.lock:
+            return self._distribution(state)
+
+    def _distribution(self, state: SolverState):
+        import numpy as np
+
+        if state.is_complete():
+            done = np.zeros(DISTRIBUTION_SIZE)
+            done[0] = 1.0
+            return done
+        key = endgame_key(state)
+        distribution = self.distributions.get(key)
+        if distribution is None:
+            distribution = self._turn_distribution(key_state(key))
+            self.distributions[key] = distribution
+            while len(self.distributions) > self.max_distributions:
+                self.distributions.popitem(last=False)
+        self.distributions.move_to_end(key)
+        return distribution
+
+    def _turn_distribution(self, state: SolverState):
+        import numpy as np
+
+        if len(state.open_categories()) > MAX_OPEN_CATEGORIES:
+            raise ValueError(f"Endgames have at most {MAX_OPEN_CATEGORIES} open categories")
+        operators = _kernels()[0]
+        final, earned, chosen, successors = self._final_roll_choices(state)
+        # Optimal keeps with one and then two rerolls left, then the chance
+        # of the turn ending on each roll when following them
+        level = final
+        best_keeps = []
+        for _ in range(2):
+            by_keep = (level @ operators.transition)[operators.roll_keeps]
+            choice = by_keep.argmax(axis=1)
+            best_keeps.append(operators.roll_keeps[np.arange(len(level)), choice])
+            level = by_keep.max(axis=1)
+        ending = operators.first_roll
+        for keeps in reversed(best_keeps):
+            ending = operators.transition @ np.bincount(keeps, weights=ending, minlength=operators.transition.shape[1])
+
+        # Rolls scoring the same points into the same position share one
+        # shifted copy of that position's distribution
+        outcomes: Dict[Tuple[int, int], float] = {}
+        for roll in np.flatnonzero(ending):
+            outcome = (int(chosen[roll]), int(earned[roll]))
+            outcomes[outcome] = outcomes.get(outcome, 0.0) + ending[roll]
+        result = np.zeros(DISTRIBUTION_SIZE)
+        for (successor, points), mass in outcomes.items():
+            result[points:] += mass * self._distribution(successors[successor])[:DISTRIBUTION_SIZE - points]
+        return result
+
+    def _solve(self, root: EndgameKey) -> None:
+        import numpy as np
+        from .kernels import expected_turn_values
+
+        if bin(root.open_mask).count("1") > MAX_OPEN_CATEGORIES:
+            raise ValueError(f"Endgames have at most {MAX_OPEN_CATEGORIES} open categories")
+
+        # Every position reachable from the root that is not solved yet
+        pending = {root}
+        frontier = [root]
+        while frontier:
+            key = frontier.pop()
+            state = key_state(key)
+            for category in state.open_categories():
+                for _, next_state in _successors(state, category):
+                    if next_state.is_complete():
+                        continue
+                    next_key = endgame_key(next_state)
+                    if next_key not in pending and next_key not in self.values:
+                        pending.add(next_key)
+                        frontier.append(next_key)
+
+        operators = _kernels()[0]
+        solved: Dict[EndgameKey, float] = {}
+        by_layer: Dict[int, List[EndgameKey]] = {}
+        for key in pending:
+            by_layer.setdefault(bin(key.open_mask).count("1"), []).append(key)
+        for layer in sorted(by_layer):
+            keys = by_layer[layer]
+            final = np.stack([self._final_roll_choices(key_state(key), solved)[0] for key in keys])
+            solved.update(zip(keys, expected_turn_values(final, operators).tolist()))
+
+        for key, value in solved.items():
+            self.values[key] = value
+            self.values.move_to_end(key)
+        # The root is read straight after, so it must outlive the eviction
+        self.values.move_to_end(root)
+        while len(self.values) > self.max_entries:
+            self.values.popitem(last=False)
+
+    def rank_keeps(self, dice: Sequence[int], rolls_left: int, state: SolverState) -> Tuple[KeepOption, ...]:
+        if not 1 <= rolls_left <= 2:
+            raise ValueError("Keeps can only be ranked with 1 or 2 rerolls left")
+        operators = _kernels()[0]
+        with self.lock:
+            self._value(state)
+            level = self._final_roll_choices(state)[0]
+        for _ in range(rolls_left - 1):
+            level = (level @ operators.transition)[operators.roll_keeps].max(axis=1)
+        keep_values = level @ operators.transition
+        options = [KeepOption(KEEPS[keep], float(keep_values[keep])) for keep in ROLL_KEEPS[roll_index(dice)]]
+        options.sort(key=lambda option: option.expected_value, reverse=True)
+        return tuple(options)
+
+    def best_category(self, dice: Sequence[int], state: SolverState) -> ScoreCategory:
+        with self.lock:
+            return self._best_category(dice, state)
+
+    def _best_category(self, dice: Sequence[int], state: SolverState) -> ScoreCategory:
+        self._value(state)
+        roll = roll_index(dice)
+        _, scores, yahtzee_rolls = _kernels()
+        best = None
+        for category in state.open_categories():
+            points = int(scores[roll, category]) + (int(yahtzee_rolls[roll]) if state.yahtzee_scored else 0)
+            next_state = next(
+                following for score, following in _successors(state, category)
+                if score is None or score == scores[roll, category]
+            )
+            if category in UPPER_INDICES and state.upper_total < UPPER_BONUS_THRESHOLD <= next_state.upper_total:
+                points += UPPER_BONUS
+            value = points + self._value(next_state)
+            if best is None or value > best[0]:
+                best = (value, category)
+        return CATEGORIES[best[1]]
+
+
+_solver = EndgameSolver()
+
+
+def is_endgame(scorecard: Scorecard) -> bool:
+    return 0 < len(scorecard.get_available_categories()) <= MAX_OPEN_CATEGORIES
+
+
+def endgame_value(scorecard: Scorecard) -> float:
+    return _solver.value(scorecard_state(scorecard))
+
+
+def remaining_score_distribution(state: SolverState):
+    # Exact distribution of the points still to come, indexed by points, for
+    # states with at most MAX_OPEN_CATEGORIES open
+    return _solver.distribution(state)
+
+
+def rank_endgame_keeps(dice: Sequence[int], rolls_left: int, scorecard: Scorecard) -> Tuple[KeepOption, ...]:
+    # Same contract as keep_ranker.rank_keeps, for scorecards with at most
+    # MAX_OPEN_CATEGORIES open
+    return _solver.rank_keeps(dice, rolls_left, scorecard_state(scorecard))
+
+
+def best_endgame_category(dice: Sequence[int], scorecard: Scorecard) -> ScoreCategory:
+    return _solver.best_category(dice, scorecard_state(scorecard))
@@ -0,0 +1,184 @@
+# Batch grading of recorded turns against optimal play: how many points of
+# expected final score each keep and scoring decision gave up
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Sequence, Tuple
+
+from app.game.scorecard import ScoreCategory
+from app.game.transitions import KEEPS, ROLL_KEEPS, keep_index, roll_index
+from .state import CATEGORIES, CATEGORY_INDEX, SolverState, score_roll
+from .value_table import STATES_PER_MASK, UPPER_TOTALS, load_value_table
+
+
+class TurnRecord(NamedTuple):
+    # One turn as played. `rolls` holds the dice after each roll (1 to 3 of
+    # them) and `keeps` the dice held before each reroll, one fewer than
+    # `rolls`. Turns of a game must come in the order they were played.
+    game_id: Hashable
+    rolls: Sequence[Sequence[int]]
+    keeps: Sequence[Sequence[int]]
+    category: ScoreCategory
+
+
+class TurnBatch(NamedTuple):
+    # Columnar form of a list of turns; roll and keep indices are -1 where
+    # the turn stopped early
+    game: "np.ndarray"        # code into game_ids
+    turn: "np.ndarray"        # 1-based turn number within the game
+    filled: "np.ndarray"
+    upper: "np.ndarray"
+    yahtzee_scored: "np.ndarray"
+    rolls: "np.ndarray"       # (turns, 3) roll indices
+    keeps: "np.ndarray"       # (turns, 2) keep indices
+    category: "np.ndarray"    # CATEGORIES index
+    game_ids: List[Hashable]
+
+
+def encode_turns(turns: Iterable[TurnRecord]) -> TurnBatch:
+    # Validates each turn and replays every game to recover the scorecard
+    # state it started from
+    import numpy as np
+
+    states: Dict[Hashable, Tuple[int, SolverState]] = {}
+    codes: Dict[Hashable, int] = {}
+    columns = [[] for _ in range(8)]
+    for record in turns:
+        if not 1 <= len(record.rolls) <= 3 or len(record.keeps) != len(record.rolls) - 1:
+            raise ValueError(f"Game {record.game_id!r}: a turn needs 1-3 rolls and one keep between each")
+        code = codes.setdefault(record.game_id, len(codes))
+        played, state = states.get(record.game_id, (0, SolverState(0, 0, False)))
+        rolls = [roll_index(dice) for dice in record.rolls]
+        keeps = []
+        for step, (dice, kept, following) in enumerate(zip(record.rolls, record.keeps, record.rolls[1:])):
+            keep = keep_index(kept)
+            if keep not in ROLL_KEEPS[roll_index(dice)]:
+                raise ValueError(f"Game {record.game_id!r}: cannot keep {list(kept)} from {list(dice)}")
+            if Counter(kept) - Counter(following):
+                raise ValueError(f"Game {record.game_id!r}, turn {played + 1}: roll {step + 2} {list(following)} "
+                                 f"lost the kept {list(kept)}")
+            keeps.append(keep)
+        category = CATEGORY_INDEX[record.category.value]
+        if not state.is_open(category):
+            raise ValueError(f"Game {record.game_id!r}: {record.category.value} is already scored")
+
+        for column, value in zip(columns, (code, played + 1, state.filled, state.upper_total,
+                                           int(state.yahtzee_scored), category)):
+            column.append(value)
+        columns[6].append(rolls + [-1] * (3 - len(rolls)))
+        columns[7].append(keeps + [-1] * (2 - len(keeps)))
+        states[record.game_id] = (played + 1, score_roll(state, category, rolls[-1])[1])
+
+    game, turn, filled, upper, yahtzee_scored, category, rolls, keeps = (np.array(column) for column in columns)
+    return TurnBatch(game, turn, filled, upper, yahtzee_scored, rolls.reshape(-1, 3), keeps.reshape(-1, 2),
+                     category, list(codes))
+
+
+def grade_turns(batch: TurnBatch, chunk_size: int = 1024):
+    # Returns (per_turn, per_game) DataFrames. Every decision is priced in
+    # expected final score under optimal play from then on:
+    #   keep<i>_regret   best keep after roll i minus the keep made (NaN if
+    #                    the turn stopped before rerolling)
+    #   score_regret     best option on the last roll seen (rerolling too,
+    #                    if any were left) minus the category scored
+    #   regret           their sum
+    # best_keep<i> is the optimal keep after roll i as a dice string, and
+    # best_category the best box for the final dice. Work is shared between
+    # turns from the same scorecard state, in chunks of `chunk_size` states.
+    import numpy as np
+    import pandas as pd
+    from .kernels import category_values, reroll_operators
+
+    values = np.asarray(load_value_table().values, dtype=np.float64)
+    operators = reroll_operators()
+    n = len(batch.game)
+    roll_count = (batch.rolls >= 0).sum(axis=1)
+    last_roll = batch.rolls[np.arange(n), roll_count - 1]
+
+    # The scoring decision only needs the final roll's 13 category values
+    scored = category_values(batch.filled, batch.upper, batch.yahtzee_scored, values, rolls=last_roll)
+    chosen = scored[np.arange(n), batch.category]
+    best_category = scored.argmax(axis=1)
+    stop_best = scored.max(axis=1)
+
+    keep_regret = np.full((n, 2), np.nan)
+    best_keep = np.full((n, 2), -1)
+    # Keep decisions need whole keep-value tables for the turn's state
+    states = state_index_array(batch)
+    unique_states, position = np.unique(states, return_inverse=True)
+    for start in range(0, len(unique_states), chunk_size):
+        chunk = unique_states[start:start + chunk_size]
+        turns = np.nonzero((position >= start) & (position < start + len(chunk)))[0]
+        filled, slot = np.divmod(chunk, STATES_PER_MASK)
+        upper, yahtzee_scored = np.divmod(slot, 2)
+        final = category_values(filled, upper, yahtzee_scored, values).max(axis=1)
+        # keep_values[r][s, keep] and roll_values[r][s, roll] with r rerolls left
+        keep_values, roll_values = {}, {0: final}
+        for rerolls in (1, 2):
+            keep_values[rerolls] = roll_values[rerolls - 1] @ operators.transition
+            roll_values[rerolls] = keep_values[rerolls][:, operators.roll_keeps].max(axis=2)
+
+        rows = position[turns] - start
+        for step in range(2):
+            rerolls = 2 - step
+            roll = batch.rolls[turns, step]
+            seen = roll >= 0
+            candidates = operators.roll_keeps[roll[seen]]
+            candidate_values = keep_values[rerolls][rows[seen, None], candidates]
+            best_keep[turns[seen], step] = candidates[np.arange(len(candidates)), candidate_values.argmax(axis=1)]
+            kept = batch.keeps[turns, step] >= 0
+            made = turns[kept]
+            keep_regret[made, step] = (roll_values[rerolls][rows[kept], batch.rolls[made, step]]
+                                       - keep_values[rerolls][rows[kept], batch.keeps[made, step]])
+            # A turn that stopped here could have rerolled instead
+            stopped = seen & ~kept & (roll_count[turns] == step + 1)
+            stop_best[turns[stopped]] = roll_values[rerolls][rows[stopped], roll[stopped]]
+
+    score_regret = stop_best - chosen
+    regret = np.nansum(keep_regret, axis=1) + score_regret
+    labels = np.array(["".join(map(str, keep)) for keep in KEEPS] + [""])
+    per_turn = pd.DataFrame({
+        "game_id": pd.Categorical.from_codes(batch.game, pd.Index(batch.game_ids, dtype=object, tupleize_cols=False)),
+        "turn": batch.turn,
+        "keep1_regret": keep_regret[:, 0],
+        "keep2_regret": keep_regret[:, 1],
+        "score_regret": score_regret,
+        "regret": regret,
+        "best_keep1": labels[best_keep[:, 0]],
+        "best_keep2": labels[best_keep[:, 1]],
+        "best_category": pd.Categorical.from_codes(best_category, [category.value for category in CATEGORIES])
+    })
+    per_game = per_turn.groupby("game_id", observed=True, sort=False).agg(
+        turns=("turn", "size"), regret=("regret", "sum"), worst_turn_regret=("regret", "max")
+    ).reset_index()
+    return per_turn, per_game
+
+
+def state_index_array(batch: TurnBatch):
+    # Vectorised value_table.state_index
+    return (batch.filled * UPPER_TOTALS + batch.upper) * 2 + batch.yahtzee_scored
+
+
+def read_turns(path: str) -> Iterable[TurnRecord]:
+    # JSON lines, one turn per line: {"game_id", "rolls", "keeps", "category"}
+    with open(path) as lines:
+        for line in lines:
+            if line.strip():
+                turn = json.loads(line)
+                yield TurnRecord(turn["game_id"], turn["rolls"], turn.get("keeps", []),
+                                 ScoreCategory(turn["category"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade recorded turns against optimal play")
+    parser.add_argument("turns", help="JSON lines file of turns, in play order within each game")
+    parser.add_argument("--turns-out", default="turn_regret.csv")
+    parser.add_argument("--games-out", default="game_regret.csv")
+    args = parser.parse_args()
+
+    per_turn, per_game = grade_turns(encode_turns(read_turns(args.turns)))
+    per_turn.to_csv(args.turns_out, index=False)
+    per_game.to_csv(args.games_out, index=False)
+    print(f"Graded {len(per_turn)} turns from {len(per_game)} games; "
+          f"mean regret {per_turn['regret'].mean():.2f} points per turn", file=sys.stderr)
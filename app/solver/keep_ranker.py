@@ -0,0 +1,88 @@
+from typing import List, Sequence, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from math import exp, log
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import (
+    KEEPS, ROLL_KEEPS, ROLLS, keep_values, roll_index, roll_values_with_rerolls
+)
+from .risk_tables import load_risk_table
+from .state import CATEGORIES, SolverState, score_roll, scorecard_state
+
+
+@dataclass(frozen=True)
+class KeepOption:
+    keep: Tuple[int, ...]
+    expected_value: float
+
+
+def final_roll_values(state: SolverState, risk: float = 0.0) -> List[float]:
+    # What each roll is worth once rolling stops: the best open category to
+    # score it in, counting both its points and the optimal expected value of
+    # the rest of the game. With a non-zero risk the values are utilities,
+    # sign(risk) * exp(risk * points), of the risk table's certainty
+    # equivalents, so that averaging them over rerolls is meaningful.
+    table = load_risk_table(risk)
+    open_categories = state.open_categories()
+    values = []
+    for roll in range(len(ROLLS)):
+        best = float("-inf")
+        for category in open_categories:
+            points, next_state = score_roll(state, category, roll)
+            best = max(best, points + table.value(next_state))
+        values.append(best)
+    if risk:
+        sign = 1.0 if risk > 0 else -1.0
+        values = [sign * exp(risk * value) for value in values]
+    return values
+
+
+def _certainty_equivalent(utility: float, risk: float) -> float:
+    if not risk:
+        return utility
+    return log(utility if risk > 0 else -utility) / risk
+
+
+@lru_cache(maxsize=1024)
+def _keep_values(state: SolverState, rerolls: int, risk: float = 0.0) -> List[float]:
+    # Expected value (or utility) of all 462 keeps with `rerolls` rerolls
+    # left, shared by every roll ranked against this scorecard.
+    return keep_values(roll_values_with_rerolls(final_roll_values(state, risk), rerolls - 1))
+
+
+@lru_cache(maxsize=8192)
+def _ranked_keeps(roll: int, rerolls: int, state: SolverState, risk: float = 0.0) -> Tuple[KeepOption, ...]:
+    values = _keep_values(state, rerolls, risk)
+    options = [KeepOption(KEEPS[keep], _certainty_equivalent(values[keep], risk)) for keep in ROLL_KEEPS[roll]]
+    options.sort(key=lambda option: option.expected_value, reverse=True)
+    return tuple(options)
+
+
+def rank_keeps(dice: Sequence[int], rolls_left: int, scorecard: Scorecard,
+               risk: float = 0.0) -> Tuple[KeepOption, ...]:
+    # Every distinct keep for `dice`, best first, with `rolls_left` rerolls
+    # remaining. expected_value is the expected number of points still to be
+    # scored this game, bonuses included, under optimal play afterwards; at a
+    # non-zero risk level it is the certainty equivalent of those points.
+    if not 1 <= rolls_left <= 2:
+        raise ValueError("Keeps can only be ranked with 1 or 2 rerolls left")
+    state = scorecard_state(scorecard)
+    if state.is_complete():
+        raise ValueError("Scorecard is already complete")
+    return _ranked_keeps(roll_index(dice), rolls_left, state, risk)
+
+
+def best_category(dice: Sequence[int], scorecard: Scorecard, risk: float = 0.0) -> ScoreCategory:
+    # Open category to score `dice` in once rolling is over
+    state = scorecard_state(scorecard)
+    if state.is_complete():
+        raise ValueError("Scorecard is already complete")
+    table = load_risk_table(risk)
+    roll = roll_index(dice)
+
+    def value(category: int) -> float:
+        points, next_state = score_roll(state, category, roll)
+        return points + table.value(next_state)
+
+    return CATEGORIES[max(state.open_categories(), key=value)]
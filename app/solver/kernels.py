@@ -0,0 +1,101 @@
+# numpy kernels shared by the table builders, the endgame solver and playouts
+from typing import Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from app.game.transitions import (
+    KEEPS, KEEP_OUTCOME_PROBABILITIES, KEEP_OUTCOME_ROLLS, ROLLS, ROLL_KEEPS, ROLL_PROBABILITIES
+)
+from .state import (
+    CATEGORIES, ROLL_SCORES, UPPER_BONUS, UPPER_BONUS_THRESHOLD, UPPER_INDICES, YAHTZEE_BONUS, YAHTZEE_INDEX
+)
+from .value_table import UPPER_TOTALS
+
+SCORES = np.array(ROLL_SCORES)
+YAHTZEE_ROLL_BONUS = np.where(SCORES[:, YAHTZEE_INDEX] == 50, YAHTZEE_BONUS, 0)
+
+
+class RerollOperators(NamedTuple):
+    transition: np.ndarray   # (rolls, keeps): P(keep -> roll)
+    roll_keeps: np.ndarray   # (rolls, 32): keeps of each roll, padded with repeats
+    first_roll: np.ndarray   # (rolls,): P(roll) from five fresh dice
+
+
+def reroll_operators() -> RerollOperators:
+    transition = np.zeros((len(ROLLS), len(KEEPS)))
+    for keep, (rolls, probabilities) in enumerate(zip(KEEP_OUTCOME_ROLLS, KEEP_OUTCOME_PROBABILITIES)):
+        transition[rolls, keep] = probabilities
+    widest = max(len(keeps) for keeps in ROLL_KEEPS)
+    roll_keeps = np.array([keeps + keeps[:1] * (widest - len(keeps)) for keeps in ROLL_KEEPS])
+    return RerollOperators(transition, roll_keeps, np.array(ROLL_PROBABILITIES))
+
+
+def expected_turn_values(final: np.ndarray, operators: RerollOperators) -> np.ndarray:
+    # final[state, roll] is what ending the turn on roll is worth; returns the
+    # expected value of each state before its first roll, rerolling
+    # optimally twice.
+    level = final
+    for _ in range(2):
+        level = (level @ operators.transition)[:, operators.roll_keeps].max(axis=2)
+    return level @ operators.first_roll
+
+
+def _open_category_outcomes(filled: np.ndarray, upper: np.ndarray, yahtzee_scored: np.ndarray,
+                            rolls: np.ndarray = None) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    # For each category, the rows of the batch that have it open, the points
+    # they earn scoring each roll there (upper and Yahtzee bonuses included)
+    # and the strategy table index of the state that follows. This is the one
+    # vectorised copy of the bonus rules; state.score_roll is the scalar one.
+    scores = SCORES[None, :, :] if rolls is None else SCORES[rolls][:, None, :]
+    yahtzee_bonus = YAHTZEE_ROLL_BONUS[None, :] if rolls is None else YAHTZEE_ROLL_BONUS[rolls][:, None]
+    for category in range(len(CATEGORIES)):
+        rows = np.nonzero((filled >> category) & 1 == 0)[0]
+        if not len(rows):
+            continue
+        next_filled = filled[rows] | (1 << category)
+        row_upper = upper[rows]
+        row_yahtzee = yahtzee_scored[rows]
+        category_scores = scores[..., category] if rolls is None else scores[rows, :, category]
+        row_bonus = yahtzee_bonus if rolls is None else yahtzee_bonus[rows]
+        points = category_scores + row_yahtzee[:, None] * row_bonus
+        if category in UPPER_INDICES:
+            next_upper = np.minimum(row_upper[:, None] + category_scores, UPPER_BONUS_THRESHOLD)
+            points = points + np.where(
+                (row_upper[:, None] < UPPER_BONUS_THRESHOLD) & (next_upper >= UPPER_BONUS_THRESHOLD), UPPER_BONUS, 0
+            )
+            successors = (next_filled[:, None] * UPPER_TOTALS + next_upper) * 2 + row_yahtzee[:, None]
+        elif category == YAHTZEE_INDEX:
+            next_yahtzee = (category_scores == 50).astype(int)
+            successors = (next_filled * UPPER_TOTALS + row_upper)[:, None] * 2 + next_yahtzee
+        else:
+            successors = ((next_filled * UPPER_TOTALS + row_upper) * 2 + row_yahtzee)[:, None]
+        yield category, rows, points, successors
+
+
+def category_outcomes(filled: np.ndarray, upper: np.ndarray, yahtzee_scored: np.ndarray,
+                      rolls: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    # Points and successor state index of scoring each roll in each category
+    # from a batch of states, -1 successors marking filled categories. Both
+    # are (states, categories, rolls) over every roll, or (states,
+    # categories) when `rolls` gives one roll per state.
+    shape = (len(filled), len(CATEGORIES), len(ROLLS) if rolls is None else 1)
+    points = np.zeros(shape, dtype=np.int64)
+    successors = np.full(shape, -1, dtype=np.int64)
+    for category, rows, earned, following in _open_category_outcomes(filled, upper, yahtzee_scored, rolls):
+        points[rows, category] = earned
+        successors[rows, category] = following
+    if rolls is None:
+        return points, successors
+    return points[:, :, 0], successors[:, :, 0]
+
+
+def category_values(filled: np.ndarray, upper: np.ndarray, yahtzee_scored: np.ndarray, values: np.ndarray,
+                    rolls: np.ndarray = None) -> np.ndarray:
+    # What scoring each roll in each category is worth from a batch of
+    # states: the points plus `values` (indexed like the strategy table) of
+    # the state it leads to. Filled categories are -inf. Shaped like
+    # category_outcomes.
+    result = np.full((len(filled), len(CATEGORIES), len(ROLLS) if rolls is None else 1), -np.inf)
+    for category, rows, points, successors in _open_category_outcomes(filled, upper, yahtzee_scored, rolls):
+        result[rows, category] = points + values[successors]
+    return result if rolls is None else result[:, :, 0]
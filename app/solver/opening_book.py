@@ -0,0 +1,61 @@
+# Best keeps for the first turn of a game, when the scorecard is always empty
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.game.transitions import KEEPS, ROLLS, keep_index, roll_index
+from .table_file import read_table, write_table
+
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "opening_book.bin")
+
+# One block per rerolls-left count (2 after the first roll, 1 after the
+# second), each holding a (keep index, expected value) pair for every roll
+REROLLS = (2, 1)
+BOOK_SIZE = len(REROLLS) * len(ROLLS) * 2
+
+MAGIC = b"BTZO"
+
+
+class OpeningBook:
+    def __init__(self, entries: Sequence[float]):
+        if len(entries) != BOOK_SIZE:
+            raise ValueError(f"Opening book must have {BOOK_SIZE} entries, got {len(entries)}")
+        # Decoded once into plain dicts, so a lookup is a single dict access
+        self.moves: Dict[Tuple[int, int], Tuple[Tuple[int, ...], float]] = {}
+        for block, rerolls in enumerate(REROLLS):
+            for roll in range(len(ROLLS)):
+                offset = (block * len(ROLLS) + roll) * 2
+                self.moves[rerolls, roll] = (KEEPS[int(entries[offset])], float(entries[offset + 1]))
+
+    def best_keep(self, dice: Sequence[int], rolls_left: int) -> Optional[Tuple[Tuple[int, ...], float]]:
+        # (dice to keep, expected final score) on the opening turn, or None
+        # when `rolls_left` is not covered by the book
+        return self.moves.get((rolls_left, roll_index(dice)))
+
+
+def build_book_entries():
+    from app.game.scorecard import Scorecard
+    from .keep_ranker import rank_keeps
+
+    entries = []
+    for rerolls in REROLLS:
+        for dice in ROLLS:
+            best = rank_keeps(dice, rerolls, Scorecard())[0]
+            entries.extend((keep_index(best.keep), best.expected_value))
+    return entries
+
+
+@lru_cache(maxsize=None)
+def load_opening_book(path: Optional[str] = None) -> OpeningBook:
+    path = path or BOOK_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; build it with `python -m app.solver.opening_book`")
+    return OpeningBook(read_table(path, MAGIC))
+
+
+if __name__ == "__main__":
+    entries = build_book_entries()
+    write_table(BOOK_PATH, MAGIC, entries)
+    print(f"Wrote {BOOK_SIZE // 2} opening moves to {BOOK_PATH}", file=sys.stderr)
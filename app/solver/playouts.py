@@ -0,0 +1,81 @@
+# Monte Carlo playouts of the rest of a game under optimal play, a batch of
+# games at a time: every turn rolls real dice, holds the keep the strategy
+# table rates best and scores the best category, bonuses included
+from functools import lru_cache
+
+from .state import SolverState
+from .value_table import STATES_PER_MASK, UPPER_TOTALS, load_value_table
+
+
+@lru_cache(maxsize=None)
+def _kernels():
+    import numpy as np
+    from .kernels import reroll_operators
+
+    operators = reroll_operators()
+    # Cumulative P(roll) from fresh dice and from each keep, for inverse
+    # transform sampling
+    first_cdf = operators.first_roll.cumsum()
+    keep_cdfs = operators.transition.T.cumsum(axis=1)
+    return operators, first_cdf, keep_cdfs, np.asarray(load_value_table().values)
+
+
+def _sample(cdfs, rng):
+    # One roll index per row of cumulative probabilities
+    import numpy as np
+
+    drawn = (cdfs < rng.random(len(cdfs))[:, None]).sum(axis=1)
+    return np.minimum(drawn, cdfs.shape[1] - 1)
+
+
+def _best_keeps(rolls, keep_values):
+    # The highest valued keep of each game's roll
+    import numpy as np
+
+    roll_keeps = _kernels()[0].roll_keeps[rolls]
+    rows = np.arange(len(rolls))
+    return roll_keeps[rows, keep_values[rows[:, None], roll_keeps].argmax(axis=1)]
+
+
+def play_turn(filled, upper, yahtzee_scored, rng):
+    # Plays one turn of every game in the batch; returns the points scored
+    # and the next (filled, upper, yahtzee_scored)
+    import numpy as np
+    from .kernels import category_outcomes, category_values
+
+    operators, first_cdf, keep_cdfs, values = _kernels()
+    rows = np.arange(len(filled))
+    # Games sharing a position share its solution; early on that is most of
+    # the batch
+    positions, game_position = np.unique((filled * UPPER_TOTALS + upper) * 2 + yahtzee_scored, return_inverse=True)
+    by_category = category_values(
+        positions // STATES_PER_MASK, positions // 2 % UPPER_TOTALS, positions % 2, values
+    )
+    # Value of each keep with no reroll after it, then with one
+    last_keeps = by_category.max(axis=1) @ operators.transition
+    first_keeps = np.take(last_keeps, operators.roll_keeps, axis=1).max(axis=2) @ operators.transition
+
+    roll = np.minimum(np.searchsorted(first_cdf, rng.random(len(filled))), len(first_cdf) - 1)
+    roll = _sample(keep_cdfs[_best_keeps(roll, first_keeps[game_position])], rng)
+    roll = _sample(keep_cdfs[_best_keeps(roll, last_keeps[game_position])], rng)
+
+    category = by_category[game_position, :, roll].argmax(axis=1)
+    points, successors = category_outcomes(filled, upper, yahtzee_scored, rolls=roll)
+    following = successors[rows, category]
+    return points[rows, category], following // STATES_PER_MASK, following // 2 % UPPER_TOTALS, following % 2
+
+
+def playout_scores(state: SolverState, size: int, rng):
+    # Remaining points of `size` independent playouts from `state`
+    import numpy as np
+
+    filled = np.full(size, state.filled, dtype=np.int64)
+    upper = np.full(size, state.upper_total, dtype=np.int64)
+    yahtzee_scored = np.full(size, int(state.yahtzee_scored), dtype=np.int64)
+    total = np.zeros(size, dtype=np.int64)
+    # Every game in the batch fills one category per turn, so they all
+    # finish together
+    for _ in state.open_categories():
+        points, filled, upper, yahtzee_scored = play_turn(filled, upper, yahtzee_scored, rng)
+        total += points
+    return total
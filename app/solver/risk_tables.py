@@ -0,0 +1,82 @@
+# Risk-sensitive strategy tables for playing to beat an opponent rather than
+# to maximise the average score
+import os
+import sys
+from functools import lru_cache
+from typing import Sequence
+
+from app.game.scorecard import Scorecard
+from .score_distribution import load_score_distribution
+from .state import scorecard_state
+from .table_file import read_table, write_table
+from .value_table import ValueTable, build_values, load_value_table
+
+
+ML_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml")
+
+# Risk levels with a precomputed table; 0 is the plain expected value table.
+# Maximising E[exp(risk * score)] is roughly maximising mean + risk * variance
+# / 2, which is what maximising P(score >= T) looks like for a target T about
+# risk * variance above the mean: from an empty scorecard these tables aim
+# near 225, 285 and 315 points. Steeper levels mostly chase Yahtzee bonuses
+# and lose more often at every target.
+RISK_LEVELS = (-0.01, 0.0, 0.01, 0.02)
+
+MAGIC = b"BTZR"
+
+
+def table_path(risk: float) -> str:
+    return os.path.join(ML_DIR, f"risk_table_{risk:+.2f}.bin")
+
+
+@lru_cache(maxsize=None)
+def load_risk_table(risk: float) -> ValueTable:
+    # Certainty equivalent of every state at this risk level
+    if risk == 0.0:
+        return load_value_table()
+    if risk not in RISK_LEVELS:
+        raise ValueError(f"No table for risk level {risk}; choose from {RISK_LEVELS}")
+    path = table_path(risk)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; build it with `python -m app.solver.risk_tables`")
+    return ValueTable(read_table(path, MAGIC))
+
+
+def target_risk(scorecard: Scorecard, target: int) -> float:
+    # Risk level whose tables best fit needing a final score of `target`:
+    # the shortfall against the expected final score over the variance of
+    # what is still to come, snapped to the nearest precomputed level
+    state = scorecard_state(scorecard)
+    if state.is_complete():
+        return 0.0
+    needed = target - scorecard.get_grand_total()
+    mean = load_value_table().value(state)
+    distribution = load_score_distribution()
+    # Half the central 70% range is about one standard deviation
+    spread = (distribution.percentile(state, 0.85) - distribution.percentile(state, 0.15)) / 2.07
+    ideal = (needed - mean) / max(spread, 1.0) ** 2
+    return min(RISK_LEVELS, key=lambda risk: abs(risk - ideal))
+
+
+def opponent_target(opponents: Sequence[Scorecard]) -> int:
+    # Final score needed to beat the best opponent, taking each at their
+    # current total plus what optimal play expects them to add
+    table = load_value_table()
+    return max(
+        round(opponent.get_grand_total() + table.value(scorecard_state(opponent))) for opponent in opponents
+    ) + 1
+
+
+def select_risk(scorecard: Scorecard, opponents: Sequence[Scorecard]) -> float:
+    if not opponents:
+        return 0.0
+    return target_risk(scorecard, opponent_target(opponents))
+
+
+if __name__ == "__main__":
+    for risk in RISK_LEVELS:
+        if risk == 0.0:
+            continue
+        values = build_values(progress=True, risk=risk)
+        write_table(table_path(risk), MAGIC, values)
+        print(f"risk {risk:+.2f}: certainty equivalent from an empty scorecard {values[0]:.2f}", file=sys.stderr)
@@ -0,0 +1,318 @@
+# Distribution of the remaining score for every solver state under optimal
+# (expected value maximising) play, for questions like P(final score >= 250).
+# Early states read a quantile sketch from the precomputed table; states the
+# endgame solver covers are answered from their exact distribution instead,
+# since their few point masses do not survive bucketing.
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import List, Optional
+
+from app.game.scorecard import Scorecard
+from app.game.transitions import ROLLS
+from .state import (
+    CATEGORIES, FULL_MASK, ROLL_SCORES, UPPER_BONUS, UPPER_BONUS_THRESHOLD, UPPER_INDICES, YAHTZEE_BONUS,
+    YAHTZEE_INDEX, SolverState, scorecard_state
+)
+from .value_table import STATES_PER_MASK, TABLE_SIZE, UPPER_TOTALS, load_value_table, state_index
+
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "score_distribution.bin")
+
+MAGIC = b"BTZD"
+VERSION = 1
+# magic, version, state count, quantile count, block count
+HEADER = struct.Struct("<4sIIII")
+
+# Histograms are propagated in buckets of BUCKET_WIDTH points; the last
+# bucket is open-ended, so remaining scores of 640 or more share it.
+BUCKET_WIDTH = 5
+BUCKETS = 128
+
+# Each state is stored as its remaining score at these quantiles, in
+# QUANTILE_UNIT point steps that fit a byte, denser towards the tails where
+# threshold questions live.
+QUANTILES = (
+    0.0, 0.001, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5,
+    0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 0.99, 0.995, 0.999, 1.0
+)
+QUANTILE_UNIT = 2.5
+
+
+def reachable_upper_totals():
+    # reachable[upper_mask, total]: whether some real scorecard with those
+    # upper categories filled has that (capped) upper total
+    import numpy as np
+
+    reachable = np.zeros((1 << len(UPPER_INDICES), UPPER_TOTALS), dtype=bool)
+    for mask in range(1 << len(UPPER_INDICES)):
+        totals = {0}
+        for category in UPPER_INDICES:
+            if mask & (1 << category):
+                face = category + 1
+                totals = {min(total + count * face, UPPER_BONUS_THRESHOLD) for total in totals for count in range(6)}
+        reachable[mask, sorted(totals)] = True
+    return reachable
+
+
+def build_distributions(chunk_size: int = 512, progress: bool = False):
+    # Backward induction like value_table.build_values, but following the
+    # optimal policy from the value table and carrying each state's
+    # cumulative histogram instead of its mean. Only the layer being solved
+    # and the one after it are kept in memory, and states no scorecard can
+    # reach are skipped.
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    from .kernels import category_outcomes, reroll_operators
+
+    operators = reroll_operators()
+    values = np.asarray(load_value_table().values, dtype=np.float64)
+    reachable = reachable_upper_totals()
+    slots = np.arange(STATES_PER_MASK)
+    levels = np.array(QUANTILES)
+    sketches = np.zeros((TABLE_SIZE, len(QUANTILES)), dtype=np.uint8)
+    keep_count = operators.transition.shape[1]
+
+    masks_by_layer = [[] for _ in range(len(CATEGORIES) + 1)]
+    for mask in range(FULL_MASK + 1):
+        masks_by_layer[bin(mask).count("1")].append(mask)
+
+    # A full scorecard has nothing left to score
+    next_cdfs = np.ones((STATES_PER_MASK, BUCKETS), dtype=np.float32)
+    next_positions = np.zeros(FULL_MASK + 1, dtype=np.int64)
+    shift_pad = (max(map(max, ROLL_SCORES)) + UPPER_BONUS + YAHTZEE_BONUS) // BUCKET_WIDTH + 2
+    point_range = shift_pad * BUCKET_WIDTH
+
+    masks_per_chunk = max(1, chunk_size // STATES_PER_MASK)
+    for layer in reversed(range(len(CATEGORIES))):
+        masks = masks_by_layer[layer]
+        positions = np.zeros(FULL_MASK + 1, dtype=np.int64)
+        positions[masks] = np.arange(len(masks))
+        cdfs = np.zeros((len(masks) * STATES_PER_MASK, BUCKETS), dtype=np.float32)
+        padded = np.concatenate([np.zeros((len(next_cdfs), shift_pad), dtype=np.float32), next_cdfs], axis=1)
+        # windows[row, j] is the successor CDF shifted up by shift_pad - j buckets
+        windows = sliding_window_view(padded, BUCKETS, axis=1)
+
+        for start in range(0, len(masks), masks_per_chunk):
+            chunk = np.array(masks[start:start + masks_per_chunk])
+            filled = np.repeat(chunk, STATES_PER_MASK)
+            upper = np.tile(slots // 2, len(chunk))
+            yahtzee_scored = np.tile(slots % 2, len(chunk))
+            live = reachable[filled & ((1 << len(UPPER_INDICES)) - 1), upper] & (
+                (yahtzee_scored == 0) | ((filled >> YAHTZEE_INDEX) & 1 == 1)
+            )
+            filled, upper, yahtzee_scored = filled[live], upper[live], yahtzee_scored[live]
+            states = (filled * UPPER_TOTALS + upper) * 2 + yahtzee_scored
+
+            # Best category for every (state, final roll), with its points
+            # and the state it leads to
+            by_category_points, by_category_successors = category_outcomes(filled, upper, yahtzee_scored)
+            candidates = np.where(by_category_successors >= 0,
+                                  by_category_points + values[by_category_successors], -np.inf)
+            best = candidates.argmax(axis=1)[:, None, :]
+            final = np.take_along_axis(candidates, best, axis=1)[:, 0]
+            points = np.take_along_axis(by_category_points, best, axis=1)[:, 0]
+            successors = np.take_along_axis(by_category_successors, best, axis=1)[:, 0]
+
+            # Optimal keeps with one and then two rerolls left, then the
+            # distribution of the roll the turn ends on when following them
+            level = final
+            best_keeps = []
+            for _ in range(2):
+                by_keep = (level @ operators.transition)[:, operators.roll_keeps]
+                choice = by_keep.argmax(axis=2)
+                best_keeps.append(operators.roll_keeps[np.arange(len(ROLLS))[None, :], choice])
+                level = np.take_along_axis(by_keep, choice[:, :, None], axis=2)[:, :, 0]
+            offsets = np.arange(len(filled))[:, None] * keep_count
+            roll_probabilities = np.broadcast_to(operators.first_roll, final.shape)
+            for keeps in reversed(best_keeps):
+                keep_mass = np.bincount((offsets + keeps).ravel(), weights=roll_probabilities.ravel(),
+                                        minlength=len(filled) * keep_count)
+                roll_probabilities = keep_mass.reshape(len(filled), keep_count) @ operators.transition.T
+
+            # Mix the successors' histograms, each shifted by the points
+            # scored getting there. Rolls that lead to the same successor for
+            # the same points are merged first, and shifts that fall between
+            # buckets split their mass over the two neighbours.
+            key = ((np.arange(len(filled))[:, None] * len(next_cdfs)
+                    + positions_of(successors, next_positions)) * point_range + points)
+            outcomes, inverse = np.unique(key, return_inverse=True)
+            mass = np.bincount(inverse.ravel(), weights=roll_probabilities.ravel()).astype(np.float32)
+            owner, rest = np.divmod(outcomes, len(next_cdfs) * point_range)
+            successor_rows, outcome_points = np.divmod(rest, point_range)
+            whole, part = np.divmod(outcome_points, BUCKET_WIDTH)
+            fraction = (part / BUCKET_WIDTH).astype(np.float32)[:, None]
+            shifted = ((1 - fraction) * windows[successor_rows, shift_pad - whole]
+                       + fraction * windows[successor_rows, shift_pad - whole - 1])
+            firsts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            chunk_cdfs = np.add.reduceat(shifted * mass[:, None], firsts, axis=0)
+            chunk_cdfs[:, -1] = 1.0
+
+            cdfs[positions[filled] * STATES_PER_MASK + states % STATES_PER_MASK] = chunk_cdfs
+            sketches[states] = quantile_sketch(chunk_cdfs, levels)
+        next_cdfs, next_positions = cdfs, positions
+        if progress:
+            print(f"solved {len(masks)} scorecards with {layer} categories filled", file=sys.stderr)
+    return sketches
+
+
+def positions_of(states, positions):
+    # Row of each state in its layer's histogram array
+    return positions[states // STATES_PER_MASK] * STATES_PER_MASK + states % STATES_PER_MASK
+
+
+def quantile_sketch(cdfs, levels):
+    # Remaining score at each quantile level in QUANTILE_UNIT steps. Bucket b
+    # holds the mass at b * BUCKET_WIDTH points (shifts between buckets split
+    # it linearly, which keeps the mean exact), read here as spread evenly
+    # over the half bucket either side.
+    import numpy as np
+
+    cdfs = np.maximum.accumulate(cdfs, axis=1)
+    bucket = np.minimum((cdfs[:, None, :] < levels[None, :, None] - 1e-6).sum(axis=2), BUCKETS - 1)
+    below = np.where(bucket > 0, np.take_along_axis(cdfs, np.maximum(bucket - 1, 0), axis=1), 0.0)
+    at = np.take_along_axis(cdfs, bucket, axis=1)
+    within = np.clip((levels[None, :] - below) / np.maximum(at - below, 1e-12), 0.0, 1.0)
+    # The lowest quantile is the lower edge of the first occupied bucket
+    bucket[:, 0] = np.minimum((cdfs <= 1e-6).sum(axis=1), BUCKETS - 1)
+    within[:, 0] = 0.0
+    points = (bucket - 0.5 + within) * BUCKET_WIDTH
+    return np.clip(np.rint(points / QUANTILE_UNIT), 0, 255).astype(np.uint8)
+
+
+def write_sketches(path: str, sketches) -> None:
+    # Header, quantile levels, block offsets, then one zlib block per filled
+    # mask so a lookup only ever inflates a few kilobytes
+    blocks = [
+        zlib.compress(sketches[mask * STATES_PER_MASK:(mask + 1) * STATES_PER_MASK].tobytes(), 9)
+        for mask in range(FULL_MASK + 1)
+    ]
+    offsets = [0]
+    for block in blocks:
+        offsets.append(offsets[-1] + len(block))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sketches), len(QUANTILES), len(blocks)))
+        f.write(struct.pack(f"<{len(QUANTILES)}f", *QUANTILES))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for block in blocks:
+            f.write(block)
+
+
+class ScoreDistributionTable:
+    # Reads the memory-mapped table, inflating blocks on demand and keeping
+    # at most `cached_blocks` of them (about 2 KB each) decoded.
+    def __init__(self, path: str, cached_blocks: int = 256):
+        with open(path, "rb") as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, states, quantiles, blocks = HEADER.unpack_from(self.mapped)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} {MAGIC.decode()} table")
+        if states != TABLE_SIZE or quantiles != len(QUANTILES) or blocks != FULL_MASK + 1:
+            raise ValueError(f"{path} does not match this solver's state space")
+        self.offsets = struct.unpack_from(f"<{blocks + 1}I", self.mapped, HEADER.size + 4 * quantiles)
+        self.data_start = HEADER.size + 4 * quantiles + 4 * (blocks + 1)
+        if len(self.mapped) != self.data_start + self.offsets[-1]:
+            raise ValueError(f"{path} is truncated")
+        self._block = lru_cache(maxsize=cached_blocks)(self._inflate_block)
+
+    def _inflate_block(self, mask: int) -> bytes:
+        start = self.data_start + self.offsets[mask]
+        return zlib.decompress(self.mapped[start:self.data_start + self.offsets[mask + 1]])
+
+    def quantiles(self, state: SolverState) -> List[float]:
+        # Remaining score at each of QUANTILES
+        if state.is_complete():
+            return [0.0] * len(QUANTILES)
+        exact = exact_distribution(state)
+        if exact is not None:
+            cdf = exact.cumsum()
+            return [exact_percentile(cdf, quantile) for quantile in QUANTILES]
+        block = self._block(state.filled)
+        start = (state_index(state) % STATES_PER_MASK) * len(QUANTILES)
+        return [unit * QUANTILE_UNIT for unit in block[start:start + len(QUANTILES)]]
+
+    def percentile(self, state: SolverState, quantile: float) -> float:
+        if not 0.0 <= quantile <= 1.0:
+            raise ValueError("Quantile must be between 0 and 1")
+        exact = exact_distribution(state)
+        if exact is not None:
+            return exact_percentile(exact.cumsum(), quantile)
+        points = self.quantiles(state)
+        above = min(bisect_left(QUANTILES, quantile), len(QUANTILES) - 1)
+        if QUANTILES[above] == quantile or above == 0:
+            return points[above]
+        below = above - 1
+        share = (quantile - QUANTILES[below]) / (QUANTILES[above] - QUANTILES[below])
+        return points[below] + share * (points[above] - points[below])
+
+    def probability_at_least(self, state: SolverState, points: float) -> float:
+        # P(remaining score >= points)
+        if points <= 0:
+            return 1.0
+        exact = exact_distribution(state)
+        if exact is not None:
+            return float(exact[math.ceil(points):].sum())
+        quantile_points = self.quantiles(state)
+        above = bisect_right(quantile_points, points)
+        if above == 0:
+            return 1.0
+        if above == len(quantile_points):
+            return 0.0
+        below = above - 1
+        share = (points - quantile_points[below]) / (quantile_points[above] - quantile_points[below])
+        return 1.0 - (QUANTILES[below] + share * (QUANTILES[above] - QUANTILES[below]))
+
+
+def exact_distribution(state: SolverState):
+    # P(remaining score == i) for endgame states, None otherwise
+    from .endgame import MAX_OPEN_CATEGORIES, remaining_score_distribution
+
+    if state.is_complete() or len(state.open_categories()) > MAX_OPEN_CATEGORIES:
+        return None
+    return remaining_score_distribution(state)
+
+
+def exact_percentile(cdf, quantile: float) -> float:
+    # Smallest remaining score reached with probability at least `quantile`
+    # (with tolerance for rounding in the cumulative sum); 0 gives the
+    # lowest score with any chance at all
+    import numpy as np
+
+    if quantile == 0.0:
+        return float(np.flatnonzero(cdf > 0)[0])
+    return float(min(np.searchsorted(cdf, quantile - 1e-12), len(cdf) - 1))
+
+
+@lru_cache(maxsize=None)
+def load_score_distribution(path: Optional[str] = None) -> ScoreDistributionTable:
+    path = path or TABLE_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; build it with `python -m app.solver.score_distribution`")
+    return ScoreDistributionTable(path)
+
+
+def final_score_percentile(scorecard: Scorecard, quantile: float) -> float:
+    # Final score this scorecard reaches with probability 1 - quantile under
+    # optimal play, e.g. 0.5 for the median
+    table = load_score_distribution()
+    return scorecard.get_grand_total() + table.percentile(scorecard_state(scorecard), quantile)
+
+
+def final_score_probability(scorecard: Scorecard, target: int) -> float:
+    # P(final score >= target) under optimal play
+    table = load_score_distribution()
+    return table.probability_at_least(scorecard_state(scorecard), target - scorecard.get_grand_total())
+
+
+if __name__ == "__main__":
+    sketches = build_distributions(progress=True)
+    write_sketches(TABLE_PATH, sketches)
+    table = load_score_distribution()
+    empty = SolverState(0, 0, False)
+    print(f"median score under optimal play: {table.percentile(empty, 0.5):.1f}, "
+          f"P(score >= 250): {table.probability_at_least(empty, 250):.3f}", file=sys.stderr)
@@ -0,0 +1,202 @@
+# Online expectimax search for play where no precomputed table applies
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.game.dice import DiceRoll, get_optimal_keeps_for_category
+from app.game.game import GameState, ScoreCategory
+from app.game.transitions import (
+    KEEP_OUTCOME_PROBABILITIES, KEEP_OUTCOME_ROLLS, KEEPS, ROLL_KEEPS, ROLLS, expected_turn_value, keep_index,
+    roll_index
+)
+from .state import (
+    CATEGORIES, CATEGORY_INDEX, UPPER_BONUS, UPPER_BONUS_THRESHOLD, SolverState, score_roll, state_from_scores
+)
+from .upper_bonus import FULL_UPPER_MASK, load_upper_bonus_table
+from .value_table import state_index
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class SearchDecision:
+    # Exactly one of keep (dice values to hold for the next roll) and
+    # category (where to score the current dice) is set.
+    keep: Optional[Tuple[int, ...]]
+    category: Optional[ScoreCategory]
+    expected_value: float
+    depth: int
+    exact: bool
+
+
+@lru_cache(maxsize=None)
+def _category_means() -> Tuple[float, ...]:
+    from app.services.probability_service import get_category_odds
+
+    odds = get_category_odds(None, 3)
+    return tuple(odds[category]["expected_score"] for category in CATEGORIES)
+
+
+def heuristic_value(state: SolverState) -> float:
+    # Rough value of the rest of the game: what each open category averages
+    # when a whole turn chases it, plus the upper bonus weighted by the chance
+    # of making it.
+    means = _category_means()
+    value = sum(means[category] for category in state.open_categories())
+    upper_filled = state.filled & FULL_UPPER_MASK
+    if upper_filled != FULL_UPPER_MASK and state.upper_total < UPPER_BONUS_THRESHOLD:
+        value += UPPER_BONUS * load_upper_bonus_table().probability(upper_filled, state.upper_total)
+    return value
+
+
+class ExpectimaxSearch:
+    # Iterative deepening over whole turns: depth d searches the current turn
+    # and the next d turns exactly and scores the scorecards beyond them with
+    # `evaluate`. Turn values are kept in a transposition table keyed on the
+    # packed state and depth, so they are reused across iterations and moves.
+    def __init__(self, evaluate: Callable[[SolverState], float] = heuristic_value,
+                 table_size: int = 200_000):
+        self.evaluate = evaluate
+        self.table_size = table_size
+        self.table: Dict[int, float] = {}
+        self.deadline = float("inf")
+
+    def search(self, game: GameState, budget: float = 0.5) -> SearchDecision:
+        # Best decision for the dice in `game`, found within roughly `budget`
+        # seconds. Deeper iterations replace shallower ones as they finish;
+        # the depth 0 pass over this turn alone always completes (tens of
+        # milliseconds), so that is the floor on latency.
+        if game.turn_complete or not game.current_dice:
+            raise ValueError("No dice rolled")
+        state = state_from_scores(game.scorecard)
+        roll = roll_index(game.current_dice)
+        rerolls = game.max_rolls_per_turn - game.current_roll
+        max_depth = len(state.open_categories()) - 1
+
+        self.deadline = time.perf_counter() + budget
+        best = None
+        for depth in range(max_depth + 1):
+            try:
+                best = self._search_root(state, roll, rerolls, depth, best)
+            except SearchTimeout as timeout:
+                if timeout.args and timeout.args[0] is not None:
+                    best = timeout.args[0]
+                break
+        return best
+
+    def _search_root(self, state: SolverState, roll: int, rerolls: int, depth: int,
+                     previous: Optional[SearchDecision]) -> SearchDecision:
+        exact = depth >= len(state.open_categories()) - 1
+        scored = lambda category, value: SearchDecision(None, ScoreCategory(CATEGORIES[category].value),
+                                                        value, depth, exact)
+        if rerolls == 0:
+            moves = self._category_order(state, roll, previous)
+            decide = lambda category: scored(category, self._score_value(state, category, roll, depth))
+        else:
+            moves = self._keep_order(state, roll, previous)
+            memo: Dict[Tuple[bool, int, int], float] = {}
+            hold_all = keep_index(ROLLS[roll])
+
+            def decide(keep: int) -> SearchDecision:
+                if keep == hold_all:
+                    # Holding every die can do no better than scoring them now
+                    # or another keep of this roll, so it stands for scoring
+                    # now and names the category
+                    category, value = self._best_score(state, roll, depth)
+                    memo[(False, roll, 0)] = value
+                    return scored(category, value)
+                return SearchDecision(KEEPS[keep], None, self._keep_value(state, keep, rerolls, depth, memo),
+                                      depth, exact)
+
+        best = None
+        for move in moves:
+            try:
+                decision = decide(move)
+            except SearchTimeout:
+                # Moves are searched previous best first, so any move already
+                # searched at this depth that beats it is a safe improvement
+                raise SearchTimeout(best)
+            if best is None or decision.expected_value > best.expected_value:
+                best = decision
+        return best
+
+    def _category_order(self, state: SolverState, roll: int, previous: Optional[SearchDecision]) -> List[int]:
+        moves = sorted(state.open_categories(), key=lambda category: -score_roll(state, category, roll)[0])
+        if previous is not None and previous.category is not None:
+            first = CATEGORY_INDEX[previous.category.value]
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _keep_order(self, state: SolverState, roll: int, previous: Optional[SearchDecision]) -> List[int]:
+        # Previous best, then the keep the simple chasing heuristic suggests
+        # for each open category, then every other distinct keep
+        dice = DiceRoll(list(ROLLS[roll]))
+        ordered = []
+        if previous is not None:
+            ordered.append(keep_index(previous.keep if previous.keep is not None else ROLLS[roll]))
+        for category in state.open_categories():
+            positions = get_optimal_keeps_for_category(dice, CATEGORIES[category].value)
+            ordered.append(keep_index([dice.values[i] for i in positions]))
+        ordered.extend(ROLL_KEEPS[roll])
+        return list(dict.fromkeys(ordered))
+
+    # Keep and roll values within the current turn are memoised in `memo`,
+    # keyed on (is_keep, keep or roll index, rerolls left)
+
+    def _keep_value(self, state: SolverState, keep: int, rerolls: int, depth: int,
+                    memo: Dict[Tuple[bool, int, int], float]) -> float:
+        key = (True, keep, rerolls)
+        if key not in memo:
+            memo[key] = sum(
+                probability * self._roll_value(state, roll, rerolls - 1, depth, memo)
+                for roll, probability in zip(KEEP_OUTCOME_ROLLS[keep], KEEP_OUTCOME_PROBABILITIES[keep])
+            )
+        return memo[key]
+
+    def _roll_value(self, state: SolverState, roll: int, rerolls: int, depth: int,
+                    memo: Dict[Tuple[bool, int, int], float]) -> float:
+        key = (False, roll, rerolls)
+        if key not in memo:
+            if rerolls == 0:
+                memo[key] = self._best_score(state, roll, depth)[1]
+            else:
+                memo[key] = max(self._keep_value(state, keep, rerolls, depth, memo)
+                                for keep in ROLL_KEEPS[roll])
+        return memo[key]
+
+    def _best_score(self, state: SolverState, roll: int, depth: int) -> Tuple[int, float]:
+        # The open category that scores `roll` best and what it is worth
+        return max(((category, self._score_value(state, category, roll, depth))
+                    for category in state.open_categories()), key=lambda choice: choice[1])
+
+    def _score_value(self, state: SolverState, category: int, roll: int, depth: int) -> float:
+        points, next_state = score_roll(state, category, roll)
+        return points + self._turn_value(next_state, depth)
+
+    def _turn_value(self, state: SolverState, depth: int) -> float:
+        # Expected points still to come from the start of a turn in `state`,
+        # searching `depth` turns before falling back to `evaluate`
+        turns_left = len(state.open_categories())
+        if turns_left == 0:
+            return 0.0
+        depth = min(depth, turns_left)
+        key = state_index(state) << 4 | depth
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        if depth == 0:
+            value = self.evaluate(state)
+        else:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            final = [max(self._score_value(state, category, roll, depth - 1) for category in state.open_categories())
+                     for roll in range(len(ROLLS))]
+            value = expected_turn_value(final)
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = value
+        return value
@@ -0,0 +1,81 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from enum import Enum
+
+from app.game.scorecard import ScoreCategory, ScoreCalculator, Scorecard
+from app.game.transitions import ROLLS
+
+
+CATEGORIES: List[ScoreCategory] = list(ScoreCategory)
+CATEGORY_INDEX: Dict[str, int] = {category.value: i for i, category in enumerate(CATEGORIES)}
+UPPER_INDICES = range(6)
+YAHTZEE_INDEX = CATEGORY_INDEX["yahtzee"]
+FULL_MASK = (1 << len(CATEGORIES)) - 1
+
+UPPER_BONUS_THRESHOLD = 63
+UPPER_BONUS = 35
+YAHTZEE_BONUS = 100
+
+# ROLL_SCORES[roll][category] for every roll index in transitions.ROLLS
+ROLL_SCORES: List[List[int]] = [
+    [ScoreCalculator.get_score_table(roll)[category] for category in CATEGORIES]
+    for roll in ROLLS
+]
+
+
+class SolverState(NamedTuple):
+    # Everything about a scorecard that matters for the rest of the game:
+    # which categories are filled (bit i is CATEGORIES[i]), the upper section
+    # total capped at the bonus threshold, and whether Yahtzee scored 50.
+    filled: int
+    upper_total: int
+    yahtzee_scored: bool
+
+    def is_open(self, category_index: int) -> bool:
+        return not self.filled & (1 << category_index)
+
+    def open_categories(self) -> List[int]:
+        return [i for i in range(len(CATEGORIES)) if self.is_open(i)]
+
+    def is_complete(self) -> bool:
+        return self.filled == FULL_MASK
+
+
+def state_from_scores(scores: Dict[Enum, Optional[int]]) -> SolverState:
+    # Accepts both Scorecard.scores and GameState.scorecard, whose keys are
+    # two different ScoreCategory enums sharing the same values.
+    filled = 0
+    upper_total = 0
+    yahtzee_scored = False
+    for category, score in scores.items():
+        if score is None:
+            continue
+        index = CATEGORY_INDEX[category.value]
+        filled |= 1 << index
+        if index in UPPER_INDICES:
+            upper_total += score
+        elif index == YAHTZEE_INDEX:
+            yahtzee_scored = score == 50
+    return SolverState(filled, min(upper_total, UPPER_BONUS_THRESHOLD), yahtzee_scored)
+
+
+def scorecard_state(scorecard: Scorecard) -> SolverState:
+    return state_from_scores(scorecard.scores)
+
+
+def score_roll(state: SolverState, category_index: int, roll: int) -> Tuple[int, SolverState]:
+    # Points earned by scoring `roll` in an open category, including the upper
+    # bonus when this score completes it and any Yahtzee bonus, and the state
+    # that follows.
+    score = ROLL_SCORES[roll][category_index]
+    points = score
+    if state.yahtzee_scored and ROLL_SCORES[roll][YAHTZEE_INDEX] == 50:
+        points += YAHTZEE_BONUS
+    upper_total = state.upper_total
+    yahtzee_scored = state.yahtzee_scored
+    if category_index in UPPER_INDICES:
+        upper_total = min(upper_total + score, UPPER_BONUS_THRESHOLD)
+        if state.upper_total < UPPER_BONUS_THRESHOLD <= upper_total:
+            points += UPPER_BONUS
+    elif category_index == YAHTZEE_INDEX:
+        yahtzee_scored = score == 50
+    return points, SolverState(state.filled | (1 << category_index), upper_total, yahtzee_scored)
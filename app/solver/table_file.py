@@ -0,0 +1,42 @@
+# Binary layout shared by the precomputed solver tables: a 4 byte magic, the
+# format version and the entry count, then one little-endian float32 per entry.
+import mmap
+import struct
+import sys
+from array import array
+from typing import Sequence
+
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+
+
+def write_table(path: str, magic: bytes, values) -> None:
+    import numpy as np
+
+    data = np.asarray(values, dtype="<f4")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(magic, VERSION, len(data)))
+        f.write(data.tobytes())
+
+
+def read_table(path: str, magic: bytes) -> Sequence[float]:
+    # The file is memory-mapped read-only rather than read, so opening it
+    # costs only the header check and every process on the host (uvicorn
+    # workers, Streamlit sessions) pages in the same physical copy.
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    file_magic, version, count = HEADER.unpack_from(mapped)
+    if file_magic != magic or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} {magic.decode()} table")
+    if len(mapped) != HEADER.size + count * 4:
+        raise ValueError(f"{path} is truncated")
+    values = memoryview(mapped)[HEADER.size:].cast("f")
+    if sys.byteorder == "big":
+        # Native floats are needed for lookups, so big-endian hosts fall back
+        # to a private swapped copy
+        swapped = array("f", values.tobytes())
+        swapped.byteswap()
+        return swapped
+    return values
@@ -0,0 +1,79 @@
+# Probability of earning the upper section bonus when chasing it
+import os
+import sys
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from app.game.transitions import ROLLS
+from .state import ROLL_SCORES, UPPER_BONUS_THRESHOLD, UPPER_INDICES
+from .table_file import read_table, write_table
+
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "upper_bonus_table.bin")
+
+UPPER_TOTALS = UPPER_BONUS_THRESHOLD + 1
+FULL_UPPER_MASK = (1 << len(UPPER_INDICES)) - 1
+TABLE_SIZE = (FULL_UPPER_MASK + 1) * UPPER_TOTALS
+
+MAGIC = b"BTZU"
+
+
+def bonus_index(upper_filled: int, upper_total: int) -> int:
+    return upper_filled * UPPER_TOTALS + min(upper_total, UPPER_BONUS_THRESHOLD)
+
+
+class UpperBonusTable:
+    def __init__(self, probabilities: Sequence[float]):
+        if len(probabilities) != TABLE_SIZE:
+            raise ValueError(f"Upper bonus table must have {TABLE_SIZE} entries, got {len(probabilities)}")
+        self.probabilities = probabilities
+
+    def probability(self, upper_filled: int, upper_total: int) -> float:
+        # P(upper total reaches 63) when every remaining turn goes to an open
+        # upper category, choosing keeps and categories to maximise that chance.
+        if upper_total >= UPPER_BONUS_THRESHOLD:
+            return 1.0
+        return self.probabilities[bonus_index(upper_filled, upper_total)]
+
+
+def build_bonus_probabilities():
+    # Backward induction over (filled upper mask, upper total): 64 * 64 states
+    import numpy as np
+    from .kernels import expected_turn_values, reroll_operators
+
+    operators = reroll_operators()
+    scores = np.array(ROLL_SCORES)
+    totals = np.arange(UPPER_TOTALS)
+
+    probabilities = np.zeros(TABLE_SIZE)
+    probabilities[bonus_index(FULL_UPPER_MASK, UPPER_BONUS_THRESHOLD)] = 1.0
+    for layer in reversed(range(len(UPPER_INDICES))):
+        masks = np.array([mask for mask in range(FULL_UPPER_MASK) if bin(mask).count("1") == layer])
+        filled = np.repeat(masks, UPPER_TOTALS)
+        total = np.tile(totals, len(masks))
+
+        final = np.full((len(filled), len(ROLLS)), -np.inf)
+        for category in UPPER_INDICES:
+            rows = np.nonzero((filled >> category) & 1 == 0)[0]
+            next_total = np.minimum(total[rows, None] + scores[None, :, category], UPPER_BONUS_THRESHOLD)
+            successors = (filled[rows] | (1 << category))[:, None] * UPPER_TOTALS + next_total
+            final[rows] = np.maximum(final[rows], probabilities[successors])
+
+        values = expected_turn_values(final, operators)
+        values[total == UPPER_BONUS_THRESHOLD] = 1.0
+        probabilities[filled * UPPER_TOTALS + total] = values
+    return probabilities
+
+
+@lru_cache(maxsize=None)
+def load_upper_bonus_table(path: Optional[str] = None) -> UpperBonusTable:
+    path = path or TABLE_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; build it with `python -m app.solver.upper_bonus`")
+    return UpperBonusTable(read_table(path, MAGIC))
+
+
+if __name__ == "__main__":
+    probabilities = build_bonus_probabilities()
+    write_table(TABLE_PATH, MAGIC, probabilities)
+    print(f"P(upper bonus) chasing it from an empty scorecard: {probabilities[0]:.4f}", file=sys.stderr)
@@ -0,0 +1,93 @@
+# Optimal expected remaining score for every solver state
+import os
+import sys
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from .state import CATEGORIES, FULL_MASK, UPPER_BONUS_THRESHOLD, SolverState
+from .table_file import read_table, write_table
+
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml", "strategy_table.bin")
+
+UPPER_TOTALS = UPPER_BONUS_THRESHOLD + 1
+STATES_PER_MASK = UPPER_TOTALS * 2
+TABLE_SIZE = (FULL_MASK + 1) * STATES_PER_MASK
+
+MAGIC = b"BTZV"
+
+
+def state_index(state: SolverState) -> int:
+    return (state.filled * UPPER_TOTALS + state.upper_total) * 2 + state.yahtzee_scored
+
+
+class ValueTable:
+    def __init__(self, values: Sequence[float]):
+        if len(values) != TABLE_SIZE:
+            raise ValueError(f"Value table must have {TABLE_SIZE} entries, got {len(values)}")
+        self.values = values
+
+    def value(self, state: SolverState) -> float:
+        # Expected points still to come from `state` under optimal play,
+        # bonuses included.
+        return self.values[state_index(state)]
+
+    def expected_game_score(self) -> float:
+        return self.value(SolverState(0, 0, False))
+
+
+def build_values(chunk_size: int = 1024, progress: bool = False, risk: float = 0.0):
+    # Backward induction over all 2^13 * 64 * 2 states, one filled-category
+    # count at a time so every successor is already solved. Each batch of
+    # states is one vectorised pass: best category per final roll, then two
+    # rounds of (expected value of every keep, best keep per roll).
+    #
+    # With a non-zero risk the rolls maximise expected utility
+    # sign(risk) * exp(risk * points) instead, and each state stores its
+    # certainty equivalent: the sure number of points worth the same.
+    # Positive risk gambles for high scores, negative risk protects a floor.
+    import numpy as np
+    from .kernels import category_values, expected_turn_values, reroll_operators
+
+    operators = reroll_operators()
+
+    values = np.zeros(TABLE_SIZE)
+    slots = np.arange(STATES_PER_MASK)
+    masks_by_layer = [[] for _ in CATEGORIES]
+    for mask in range(FULL_MASK):
+        masks_by_layer[bin(mask).count("1")].append(mask)
+
+    masks_per_chunk = max(1, chunk_size // STATES_PER_MASK)
+    for layer in reversed(range(len(CATEGORIES))):
+        masks = masks_by_layer[layer]
+        for start in range(0, len(masks), masks_per_chunk):
+            chunk = np.array(masks[start:start + masks_per_chunk])
+            filled = np.repeat(chunk, STATES_PER_MASK)
+            upper = np.tile(slots // 2, len(chunk))
+            yahtzee_scored = np.tile(slots % 2, len(chunk))
+            final = category_values(filled, upper, yahtzee_scored, values).max(axis=1)
+
+            if risk:
+                sign = np.sign(risk)
+                expected = expected_turn_values(sign * np.exp(risk * final), operators)
+                turn_values = np.log(sign * expected) / risk
+            else:
+                turn_values = expected_turn_values(final, operators)
+            values[filled * STATES_PER_MASK + np.tile(slots, len(chunk))] = turn_values
+        if progress:
+            print(f"solved {len(masks)} scorecards with {layer} categories filled", file=sys.stderr)
+    return values
+
+
+@lru_cache(maxsize=None)
+def load_value_table(path: Optional[str] = None) -> ValueTable:
+    path = path or TABLE_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; build it with `python -m app.solver.value_table`")
+    return ValueTable(read_table(path, MAGIC))
+
+
+if __name__ == "__main__":
+    values = build_values(progress=True)
+    write_table(TABLE_PATH, MAGIC, values)
+    print(f"expected score under optimal play: {values[0]:.4f}")
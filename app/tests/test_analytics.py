@@ -0,0 +1,71 @@
+# Tests for the chunked game analytics, reading the score store and its
+# exports
+import random
+
+import pytest
+
+from app.game.dice import DiceRoll
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.services.analytics_service import export_chunks, store_chunks, summarize
+from app.services.score_service import ScoreStore
+
+
+def random_game(rng: random.Random) -> Scorecard:
+    card = Scorecard()
+    for category in rng.sample(list(ScoreCategory), len(ScoreCategory)):
+        if rng.random() < 0.1:
+            dice = [rng.randint(1, 6)] * 5
+        else:
+            dice = [rng.randint(1, 6) for _ in range(5)]
+        card.score_category(category, DiceRoll(dice))
+    return card
+
+
+@pytest.fixture
+def stored_games(tmp_path):
+    rng = random.Random(0)
+    path = str(tmp_path / "scores.db")
+    store = ScoreStore(path)
+    cards = []
+    for _ in range(40):
+        game = {"alice": random_game(rng), "bob": random_game(rng)}
+        cards.extend(game.values())
+        store.record_scorecards(game)
+    store.flush()
+    yield store, path, cards
+    store.close()
+
+
+def test_database_and_export_give_the_same_report(stored_games, tmp_path):
+    store, path, _ = stored_games
+    export = str(tmp_path / "games.jsonl.gz")
+    store.export_games(export)
+    # Small chunks, so the partial sums really are folded together
+    assert summarize(store_chunks(path, chunk_size=97)) == summarize(export_chunks(export, chunk_size=7))
+
+
+def test_report_matches_the_scorecards(stored_games):
+    _, path, cards = stored_games
+    report = summarize(store_chunks(path, chunk_size=97))
+    assert report["player_games"] == len(cards)
+    assert report["average_final_score"] == pytest.approx(sum(card.get_grand_total() for card in cards) / len(cards))
+    assert report["upper_bonus_rate"] == pytest.approx(
+        sum(card.get_upper_section_bonus() > 0 for card in cards) / len(cards)
+    )
+    yahtzees = sum(card.scores[ScoreCategory.YAHTZEE] == 50 for card in cards)
+    assert report["yahtzee_rate"] == pytest.approx(yahtzees / len(cards))
+    assert report["yahtzees_per_game"] == pytest.approx(
+        (yahtzees + sum(card.yahtzee_bonuses for card in cards)) / len(cards)
+    )
+    chance = report["categories"][ScoreCategory.CHANCE.value]
+    assert chance["entries"] == len(cards) and chance["fill_rate"] == 1.0
+    assert chance["average_score"] == pytest.approx(
+        sum(card.scores[ScoreCategory.CHANCE] for card in cards) / len(cards)
+    )
+
+
+def test_empty_database_reports_zeros(tmp_path):
+    path = str(tmp_path / "empty.db")
+    ScoreStore(path).close()
+    report = summarize(store_chunks(path))
+    assert report["player_games"] == 0 and report["average_final_score"] == 0.0
@@ -0,0 +1,61 @@
+# Tests for Botzee's move choices when playing against opponents
+import pytest
+from fastapi.testclient import TestClient
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.main import app
+from app.services.botzee_ai import choose_category, choose_keep
+from app.services.game_service import get_game_sessions
+from app.solver.risk_tables import select_risk
+
+DICE = [5, 1, 3, 4, 3]
+
+FILLED = {
+    ScoreCategory.ONES: 3,
+    ScoreCategory.TWOS: 6,
+    ScoreCategory.THREES: 9,
+    ScoreCategory.FOUR_OF_A_KIND: 20,
+    ScoreCategory.SMALL_STRAIGHT: 30,
+}
+
+
+def scorecard(chance: int, yahtzee: bool = False) -> Scorecard:
+    # 68 points plus Chance, with seven categories still open unless a
+    # Yahtzee is already in
+    card = Scorecard()
+    card.scores.update(FILLED)
+    card.scores[ScoreCategory.CHANCE] = chance
+    if yahtzee:
+        card.scores[ScoreCategory.YAHTZEE] = 50
+    return card
+
+
+def test_trailing_gambles_and_leading_plays_safe():
+    mine = scorecard(22)
+    trailing, leading = [scorecard(22, yahtzee=True)], [scorecard(5)]
+    assert select_risk(mine, trailing) > 0 > select_risk(mine, leading)
+    # Behind, Botzee chases three of a kind or better; ahead, it takes the
+    # straight draw its average-maximising play would
+    assert choose_keep(DICE, 2, mine, trailing) == (3, 3)
+    assert choose_keep(DICE, 2, mine, leading) == (3, 4, 5)
+    assert choose_keep(DICE, 2, mine) == (3, 4, 5)
+
+
+def test_no_opponents_is_plain_expected_value_play():
+    mine = scorecard(22)
+    assert select_risk(mine, []) == 0.0
+    assert choose_category([6, 6, 6, 6, 2], mine, []) == choose_category([6, 6, 6, 6, 2], mine)
+
+
+@pytest.mark.parametrize("opponent, keep", [(scorecard(22, yahtzee=True), [3, 3]), (scorecard(5), [3, 4, 5])])
+def test_move_endpoint_takes_opponent_scorecards(opponent, keep):
+    session = get_game_sessions().create()
+    session.scorecard = scorecard(22)
+    session.dice.current_roll = list(DICE)
+    session.rolls_left = 2
+    client = TestClient(app)
+
+    move = client.post(f"/bot/games/{session.game_id}/move", json={"opponents": [opponent.to_dict()]}).json()
+    assert move == {"action": "keep", "keep": keep}
+    assert client.post(f"/bot/games/{session.game_id}/move").json() == {"action": "keep", "keep": [3, 4, 5]}
+    get_game_sessions().discard(session.game_id)
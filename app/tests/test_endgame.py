@@ -0,0 +1,71 @@
+# Tests for the on-demand endgame solver, against the full strategy table
+import random
+import sys
+import threading
+
+import pytest
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.solver.endgame import MAX_OPEN_CATEGORIES, EndgameSolver, best_endgame_category, rank_endgame_keeps
+from app.solver.keep_ranker import best_category, rank_keeps
+from app.solver.state import CATEGORIES, FULL_MASK, SolverState
+from app.solver.value_table import load_value_table
+
+
+def endgame_states(count: int, seed: int = 0, max_open: int = MAX_OPEN_CATEGORIES):
+    rng = random.Random(seed)
+    states = []
+    for _ in range(count):
+        filled = FULL_MASK
+        for category in rng.sample(range(len(CATEGORIES)), rng.randint(1, max_open)):
+            filled &= ~(1 << category)
+        states.append(SolverState(filled, rng.randint(0, 63), rng.random() < 0.5))
+    return states
+
+
+def test_values_agree_with_the_strategy_table():
+    solver = EndgameSolver()
+    table = load_value_table()
+    for state in endgame_states(40):
+        assert solver.value(state) == pytest.approx(table.value(state), abs=1e-4)
+
+
+def test_moves_agree_with_the_keep_ranker():
+    scorecard = Scorecard()
+    for category in ScoreCategory:
+        if category not in (ScoreCategory.SIXES, ScoreCategory.FULL_HOUSE, ScoreCategory.YAHTZEE):
+            scorecard.scores[category] = 0
+    assert best_endgame_category([6, 6, 6, 2, 2], scorecard) == best_category([6, 6, 6, 2, 2], scorecard)
+    endgame, table = rank_endgame_keeps([6, 6, 3, 3, 2], 2, scorecard), rank_keeps([6, 6, 3, 3, 2], 2, scorecard)
+    assert endgame[0].keep == table[0].keep
+    assert endgame[0].expected_value == pytest.approx(table[0].expected_value, abs=1e-4)
+
+
+def test_concurrent_lookups_through_a_small_lru():
+    # Every thread keeps missing and evicting; none may see a torn cache
+    solver = EndgameSolver(max_entries=20, max_distributions=20)
+    table = load_value_table()
+    states = endgame_states(30, seed=1, max_open=3)
+    errors = []
+
+    def lookups(offset: int):
+        try:
+            for state in states[offset:] + states[:offset]:
+                assert solver.value(state) == pytest.approx(table.value(state), abs=1e-4)
+                assert solver.distribution(state).sum() == pytest.approx(1.0)
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads as often as possible so interleavings actually happen
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=lookups, args=(offset,)) for offset in range(0, 30, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(solver.values) <= 20 and len(solver.distributions) <= 20
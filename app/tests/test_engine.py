@@ -0,0 +1,57 @@
+# Tests for the multi-game engine and its GameState facade
+import numpy as np
+import pytest
+
+from app.game.engine import EMPTY, GameEngine
+from app.game.game import ScoreCategory
+
+
+def test_next_seat_sees_no_dice_until_its_turn_starts():
+    engine = GameEngine(capacity=2, seed=1)
+    game = engine.create_game(num_players=2)
+    first, second = engine.player_state(game, 0), engine.player_state(game, 1)
+
+    first.start_turn()
+    first.roll_dice()
+    dice = first.current_dice
+    first.score_turn(ScoreCategory.CHANCE)
+
+    # Like GameState, the seat that scored still shows its dice
+    assert first.current_dice == dice and first.current_roll == 1 and first.turn_complete
+    assert second.current_dice == [] and second.current_roll == 0
+    assert second.get_possible_scores() == {}
+    assert second.turn_complete
+
+    second.start_turn()
+    assert first.current_dice == [] and first.current_roll == 0
+    assert second.current_dice == [] and second.can_roll()
+    second.roll_dice()
+    assert len(second.current_dice) == 5 and second.current_roll == 1
+    assert first.current_dice == []
+
+
+def test_facade_plays_a_whole_game():
+    engine = GameEngine(capacity=1, seed=2)
+    game = engine.create_game()
+    state = engine.player_state(game)
+    for _ in ScoreCategory:
+        state.start_turn()
+        state.roll_dice()
+        kept = state.current_dice[:2]
+        state.roll_dice(kept)
+        assert sorted(state.current_dice[:2]) == sorted(kept)
+        state.score_turn(state.get_available_categories()[0])
+    assert state.is_game_complete() and engine.is_game_over(game)
+    assert state.get_total_score() == int(engine.total_scores(np.array([game]))[0, 0])
+
+
+def test_slots_are_reused_and_the_pool_grows():
+    engine = GameEngine(capacity=1)
+    first = engine.create_game()
+    second = engine.create_game()
+    assert engine.capacity == 2 and engine.active_games == 2
+    engine.release_game(first)
+    assert engine.create_game() == first
+    assert (engine.scores[first] == EMPTY).all()
+    with pytest.raises(ValueError):
+        engine.player_state(second, 1)
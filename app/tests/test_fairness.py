@@ -0,0 +1,136 @@
+# Tests for the dice fairness monitor: statistics, opt-in recording and
+# merging snapshots written by several workers
+import json
+import random
+import threading
+
+import numpy as np
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.game import fairness
+from app.game.dice import DiceManager
+from app.game.engine import GameEngine
+from app.game.fairness import FairnessMonitor, set_fairness_monitor
+
+
+@pytest.fixture
+def monitor():
+    # In-memory monitor installed for one test, whatever was there before
+    monitor = FairnessMonitor()
+    previous = set_fairness_monitor(monitor)
+    yield monitor
+    set_fairness_monitor(previous)
+
+
+def test_statistics_of_a_known_sequence():
+    monitor = FairnessMonitor()
+    monitor.record([1, 2, 3, 4, 5, 6])
+    monitor.record([6, 6])
+    snapshot = monitor.snapshot()
+    assert snapshot["dice"] == 8 and snapshot["throws"] == 2
+    assert snapshot["face_counts"] == [1, 1, 1, 1, 1, 3]
+    # sum((count - 8/6)^2 / (8/6)) over the faces
+    assert snapshot["chi_square"] == pytest.approx(6 * 14 / 8 - 8)
+    assert snapshot["transition_counts"][5] == [0, 0, 0, 0, 0, 2]
+    assert snapshot["pairs"] == 16 and snapshot["matching_pair_rate"] == pytest.approx(1 / 16)
+
+
+def test_fair_dice_pass():
+    monitor = FairnessMonitor()
+    rng = random.Random(0)
+    for _ in range(5_000):
+        monitor.record([rng.randint(1, 6) for _ in range(5)])
+    snapshot = monitor.snapshot()
+    assert snapshot["chi_square_p_value"] > 0.001 and snapshot["transition_p_value"] > 0.001
+    assert abs(snapshot["serial_correlation"]) < 0.02
+
+
+def test_rolls_are_not_recorded_until_a_monitor_is_installed(monitor):
+    set_fairness_monitor(None)
+    DiceManager().roll_all_dice()
+    assert fairness.get_fairness_monitor() is None
+    set_fairness_monitor(monitor)
+    manager = DiceManager()
+    manager.roll_all_dice()
+    manager.reroll_by_value(manager.current_roll[:2])
+    assert monitor.snapshot()["dice"] == 8
+
+
+def test_engine_rolls_are_recorded(monitor):
+    engine = GameEngine(seed=0)
+    games = np.array([engine.create_game() for _ in range(4)])
+    engine.start_turns(games)
+    engine.roll_games(games)
+    keep = np.zeros((4, 5), dtype=bool)
+    keep[:, :3] = True
+    engine.roll_games(games, keep)
+    snapshot = monitor.snapshot()
+    assert snapshot["throws"] == 8 and snapshot["dice"] == 4 * 5 + 4 * 2
+    assert sum(snapshot["face_counts"]) == 28
+
+
+def test_recording_never_writes_the_file(tmp_path):
+    # Rolls only wake the writer; the merge happens on its thread
+    path = tmp_path / "fairness.json"
+    monitor = FairnessMonitor(str(path), persist_every=5, persist_interval=3600.0)
+    persisted = threading.Event()
+    writers = []
+    persist = monitor.persist
+
+    def recording_persist():
+        writers.append(threading.current_thread())
+        persist()
+        persisted.set()
+
+    monitor.persist = recording_persist
+    monitor.record([1, 2, 3, 4, 5])
+    assert persisted.wait(5.0)
+    assert threading.current_thread() not in writers
+    with open(path) as f:
+        assert json.load(f)["snapshot"]["dice"] == 5
+    monitor.record([6])
+    monitor.close()
+    with open(path) as f:
+        assert json.load(f)["snapshot"]["dice"] == 6
+
+
+def test_workers_merge_into_one_snapshot(tmp_path):
+    path = str(tmp_path / "fairness.json")
+    first, second = FairnessMonitor(path), FairnessMonitor(path)
+    first.record([1, 1, 2])
+    second.record([6, 6])
+    first.persist()
+    second.persist()
+    first.record([3])
+    first.persist()
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["snapshot"]["face_counts"] == [2, 1, 1, 0, 0, 2]
+    assert saved["snapshot"]["throws"] == 3
+    # A restarted worker resumes from everyone's counts
+    restarted = FairnessMonitor(path)
+    assert restarted.snapshot()["face_counts"] == [2, 1, 1, 0, 0, 2]
+    for worker in (first, second, restarted):
+        worker.close()
+
+
+def test_served_app_records_and_in_process_clients_do_not(tmp_path, monkeypatch):
+    from app.main import app
+
+    previous = set_fairness_monitor(None)
+    path = str(tmp_path / "fairness.json")
+    monkeypatch.setattr(fairness, "SNAPSHOT_PATH", path)
+    monkeypatch.setattr(fairness.atexit, "register", lambda function: None)
+    try:
+        client = TestClient(app)
+        assert client.get("/dice/fairness").status_code == 503
+        with TestClient(app) as served:
+            game = served.post("/games").json()
+            served.post(f"/games/{game['game_id']}/roll", json={"keep": []})
+            assert served.get("/dice/fairness").json()["dice"] == 5
+        with open(path) as f:
+            assert json.load(f)["snapshot"]["dice"] == 5
+    finally:
+        set_fairness_monitor(previous)
@@ -0,0 +1,69 @@
+# Tests for API game sessions: idle expiry, the session cap and saving
+# finished games
+import pytest
+from fastapi.testclient import TestClient
+
+from app.game.scorecard import ScoreCategory
+from app.main import app
+from app.services.game_service import GameSessions
+from app.services.score_service import ScoreStore, set_score_store
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def client_scores(result):
+    return {ScoreCategory(name): points for name, points in result["scorecard"]["scores"].items()}
+
+
+def test_idle_sessions_expire():
+    clock = Clock()
+    sessions = GameSessions(idle_timeout=10.0, clock=clock)
+    idle, active = sessions.create(), sessions.create()
+    clock.now = 8.0
+    sessions.get(active.game_id)
+    clock.now = 15.0
+    assert sessions.get(active.game_id) is active
+    with pytest.raises(KeyError):
+        sessions.get(idle.game_id)
+    assert len(sessions) == 1
+    # Creating a game sweeps anything else that has gone idle
+    clock.now = 30.0
+    sessions.create()
+    assert len(sessions) == 1
+
+
+def test_cap_evicts_the_least_recently_used():
+    sessions = GameSessions(max_sessions=3, clock=Clock())
+    first, second, third = (sessions.create() for _ in range(3))
+    sessions.get(first.game_id)
+    fourth = sessions.create()
+    assert len(sessions) == 3
+    with pytest.raises(KeyError):
+        sessions.get(second.game_id)
+    assert [sessions.get(s.game_id) for s in (first, third, fourth)] == [first, third, fourth]
+
+
+def test_finished_games_are_saved_to_the_score_store(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"), flush_interval=0.0)
+    previous = set_score_store(store)
+    try:
+        client = TestClient(app)
+        game = client.post("/games", json={"player": "alice"}).json()
+        assert game["player"] == "alice"
+        for category in ScoreCategory:
+            client.post(f"/games/{game['game_id']}/roll", json={"keep": []})
+            result = client.post(f"/games/{game['game_id']}/score", json={"category": category.value}).json()
+        assert result["is_complete"]
+        assert client.get(f"/games/{game['game_id']}").status_code == 404
+        store.flush()
+        assert store.player_stats("alice")["best_score"] == result["total"]
+        assert store.load_game(1)["alice"].scores == client_scores(result)
+    finally:
+        set_score_store(previous)
+        store.close()
@@ -0,0 +1,87 @@
+# Tests for regret grading, against the keep ranker and the strategy table
+import math
+
+import pytest
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import roll_index
+from app.solver.grader import TurnRecord, encode_turns, grade_turns
+from app.solver.keep_ranker import best_category, rank_keeps
+from app.solver.state import CATEGORY_INDEX, SolverState, score_roll
+from app.solver.value_table import load_value_table
+
+
+def grade(*turns):
+    return grade_turns(encode_turns(turns))
+
+
+def scored_value(dice, category):
+    points, state = score_roll(SolverState(0, 0, False), CATEGORY_INDEX[category.value], roll_index(dice))
+    return points + load_value_table().value(state)
+
+
+def test_optimal_turns_have_no_regret():
+    scorecard = Scorecard()
+    first, second, third = [1, 3, 4, 6, 6], [2, 3, 6, 6, 6], [3, 6, 6, 6, 6]
+    keep1 = rank_keeps(first, 2, scorecard)[0].keep
+    keep2 = rank_keeps(second, 1, scorecard)[0].keep
+    category = best_category(third, scorecard)
+    per_turn, per_game = grade(TurnRecord("g", [first, second, third], [keep1, keep2], category))
+    assert per_turn.loc[0, "regret"] == pytest.approx(0.0, abs=1e-3)
+    assert per_turn.loc[0, "best_keep1"] == "".join(map(str, keep1))
+    assert per_turn.loc[0, "best_category"] == category.value
+    assert per_game.loc[0, "regret"] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_regrets_match_the_keep_ranker_and_value_table():
+    dice = [6, 6, 6, 6, 6]
+    # Rerolling a Yahtzee, then scoring the result in Chance
+    keeps = {option.keep: option.expected_value for option in rank_keeps(dice, 2, Scorecard())}
+    final = [1, 2, 3, 4, 6]
+    per_turn, _ = grade(TurnRecord(1, [dice, final], [()], ScoreCategory.CHANCE))
+    assert per_turn.loc[0, "keep1_regret"] == pytest.approx(keeps[tuple(dice)] - keeps[()], abs=1e-3)
+    assert math.isnan(per_turn.loc[0, "keep2_regret"])
+    # Stopping on the second roll gave up the third as well as a better box
+    best = rank_keeps(final, 1, Scorecard())[0].expected_value
+    assert per_turn.loc[0, "score_regret"] == pytest.approx(
+        best - scored_value(final, ScoreCategory.CHANCE), abs=1e-3
+    )
+
+
+def test_games_are_replayed_turn_by_turn():
+    yahtzee = [5] * 5
+    per_turn, per_game = grade(
+        TurnRecord("a", [yahtzee], [], ScoreCategory.YAHTZEE),
+        TurnRecord("b", [yahtzee], [], ScoreCategory.CHANCE),
+        TurnRecord("a", [yahtzee], [], ScoreCategory.FIVES),
+    )
+    assert per_turn["turn"].tolist() == [1, 1, 2]
+    # Game a's second Yahtzee earns the 100 point bonus in any box; Fives
+    # also banks 25 towards the upper bonus
+    assert per_turn.loc[2, "best_category"] == ScoreCategory.FIVES.value
+    assert per_game.set_index("game_id")["turns"].to_dict() == {"a": 2, "b": 1}
+
+
+@pytest.mark.parametrize("turn", [
+    TurnRecord("g", [], [], ScoreCategory.CHANCE),
+    TurnRecord("g", [[1, 2, 3, 4, 5], [1, 2, 3, 4, 5]], [], ScoreCategory.CHANCE),
+    TurnRecord("g", [[1, 2, 3, 4, 5], [1, 2, 3, 4, 5]], [[6]], ScoreCategory.CHANCE),
+])
+def test_rejects_malformed_turns(turn):
+    with pytest.raises(ValueError):
+        encode_turns([turn])
+
+
+def test_rejects_scoring_a_box_twice():
+    turn = TurnRecord("g", [[1, 1, 1, 1, 1]], [], ScoreCategory.ONES)
+    with pytest.raises(ValueError):
+        encode_turns([turn, turn])
+
+
+def test_rejects_a_roll_that_drops_the_kept_dice():
+    # Holding the sixes and then rolling no sixes means the log is out of
+    # order or corrupt, on the second turn of the game here
+    first = TurnRecord("g", [[1, 1, 1, 1, 1]], [], ScoreCategory.ONES)
+    turn = TurnRecord("g", [[6, 6, 2, 3, 4], [6, 6, 1, 1, 5], [6, 2, 2, 3, 3]], [[6, 6], [6, 6]], ScoreCategory.CHANCE)
+    with pytest.raises(ValueError, match="turn 2: roll 3"):
+        encode_turns([first, turn])
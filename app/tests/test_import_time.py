@@ -0,0 +1,20 @@
+# Tests for the import cost of app.game, which both UIs load at startup
+import os
+
+import pytest
+
+from app.import_profile import GAME_MODULES, heavy_modules, measure_imports, total_ms
+
+# Wall-clock limits flake on loaded machines, so the budget (in ms) is only
+# checked when set, e.g. BOTZEE_IMPORT_BUDGET_MS=50 on a quiet machine
+IMPORT_BUDGET_MS = os.environ.get("BOTZEE_IMPORT_BUDGET_MS")
+
+
+@pytest.mark.skipif(not IMPORT_BUDGET_MS, reason="set BOTZEE_IMPORT_BUDGET_MS to time app.game's import")
+def test_app_game_import_stays_within_budget():
+    timings = measure_imports(GAME_MODULES, runs=3)
+    assert total_ms(timings) < float(IMPORT_BUDGET_MS), sorted(timings, key=lambda timing: -timing.self_us)[:10]
+
+
+def test_app_game_import_loads_no_heavy_modules():
+    assert heavy_modules(measure_imports(GAME_MODULES)) == []
@@ -0,0 +1,51 @@
+# Tests for the exhaustive keep ranker
+import pytest
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import ROLL_KEEPS, roll_index
+from app.solver.keep_ranker import best_category, rank_keeps
+
+
+def scorecard_with_open(*open_categories: ScoreCategory) -> Scorecard:
+    # Every other category scored zero, so no bonus is still reachable
+    scorecard = Scorecard()
+    for category in ScoreCategory:
+        if category not in open_categories:
+            scorecard.scores[category] = 0
+    return scorecard
+
+
+def test_chance_with_one_reroll_keeps_fours_and_up():
+    # A rerolled die is worth 3.5, so every die of 4 or more is held
+    best = rank_keeps([1, 2, 4, 5, 6], 1, scorecard_with_open(ScoreCategory.CHANCE))[0]
+    assert best.keep == (4, 5, 6)
+    assert best.expected_value == pytest.approx(15 + 2 * 3.5)
+
+
+def test_chance_with_two_rerolls_keeps_fives_and_up():
+    # With two rerolls left a die is worth E[max(die, 3.5)] = 4.25
+    best = rank_keeps([1, 2, 4, 5, 6], 2, scorecard_with_open(ScoreCategory.CHANCE))[0]
+    assert best.keep == (5, 6)
+    assert best.expected_value == pytest.approx(11 + 3 * 4.25)
+
+
+def test_every_distinct_keep_is_ranked_best_first():
+    dice = [2, 2, 5, 5, 6]
+    options = rank_keeps(dice, 2, Scorecard())
+    assert len(options) == len(ROLL_KEEPS[roll_index(dice)])
+    assert len({option.keep for option in options}) == len(options)
+    values = [option.expected_value for option in options]
+    assert values == sorted(values, reverse=True)
+
+
+def test_yahtzee_is_held_and_scored():
+    scorecard = Scorecard()
+    assert rank_keeps([4] * 5, 2, scorecard)[0].keep == (4,) * 5
+    assert best_category([4] * 5, scorecard) == ScoreCategory.YAHTZEE
+
+
+def test_rejects_complete_scorecards_and_bad_roll_counts():
+    with pytest.raises(ValueError):
+        rank_keeps([1, 2, 3, 4, 5], 3, Scorecard())
+    with pytest.raises(ValueError):
+        rank_keeps([1, 2, 3, 4, 5], 1, scorecard_with_open())
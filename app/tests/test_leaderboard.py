@@ -0,0 +1,71 @@
+# Tests for the leaderboard, against plain sorted lists of the same scores
+import random
+from bisect import bisect_left, bisect_right
+
+import pytest
+
+from app.services.leaderboard_service import DAY, MAX_SCORE, Leaderboard, LeaderboardEntry, ScoreCounts
+from app.services.score_service import GameRecord, PlayerRecord, ScoreStore
+
+
+def test_fenwick_counts_match_a_sorted_list():
+    rng = random.Random(0)
+    counts = ScoreCounts()
+    scores = []
+    for _ in range(2_000):
+        score = rng.choice([rng.randint(0, 400), rng.randint(0, MAX_SCORE)])
+        counts.add(score)
+        scores.append(score)
+    scores.sort()
+    for score in list(range(0, 420, 7)) + [MAX_SCORE, MAX_SCORE + 1]:
+        assert counts.count_below(score) == bisect_left(scores, score)
+    for position in range(0, len(scores), 37):
+        assert counts.score_at(position) == scores[position]
+    assert counts.score_at(len(scores) - 1) == scores[-1]
+
+
+def test_rank_percentile_and_top_match_a_sorted_list():
+    rng = random.Random(1)
+    board = Leaderboard(top_capacity=10)
+    entries = [LeaderboardEntry(rng.randint(150, 350), f"p{i % 7}", i + 1, 1_000.0 + i) for i in range(500)]
+    for entry in entries:
+        board.add(entry)
+    scores = sorted(entry.score for entry in entries)
+    at = entries[-1].finished_at
+    for score in (149, 200, 250, 300, 351):
+        assert board.rank(score, at=at) == 1 + len(scores) - bisect_right(scores, score)
+        assert board.percentile(score, at=at) == pytest.approx(100 * bisect_left(scores, score) / len(scores))
+    assert board.score_at_percentile(50, at=at) == scores[250]
+    best = sorted(entries, key=lambda entry: (-entry.score, entry.finished_at, entry.game_id))[:10]
+    assert board.top(10, at=at) == best
+    assert board.size(at=at) == 500
+
+
+def test_time_windows_and_retention():
+    board = Leaderboard(daily_windows=2)
+    for day in range(4):
+        board.add(LeaderboardEntry(200 + day, "alice", day + 1, day * DAY + 60))
+    assert board.size("all", at=0) == 4
+    assert board.size("daily", at=3 * DAY) == 1
+    assert board.size("daily", at=0) == 0
+    assert board.top(1, "daily", at=2 * DAY)[0].score == 202
+    with pytest.raises(ValueError):
+        board.rank(200, window="monthly")
+
+
+def test_rebuild_and_listener_skip_duplicates(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"), flush_interval=0.0)
+    try:
+        game = GameRecord([PlayerRecord("alice", 250, 35, 0, []), PlayerRecord("bob", 240, 0, 0, [])], 1_000.0)
+        store.record_game(game)
+        store.flush()
+        board = Leaderboard()
+        store.add_listener(board.add_games)
+        board.rebuild(store)
+        board.add_games([1], [game])
+        store.record_game(GameRecord([PlayerRecord("carol", 300, 35, 0, [])], 1_000.0))
+        store.flush()
+        assert board.size(at=1_000.0) == 3
+        assert [entry.player for entry in board.top(3, at=1_000.0)] == ["carol", "alice", "bob"]
+    finally:
+        store.close()
@@ -0,0 +1,36 @@
+# Tests for the opening book, against the keep ranker it was built from
+import random
+
+import pytest
+
+from app.game.scorecard import Scorecard
+from app.game.transitions import ROLLS
+from app.solver.opening_book import BOOK_SIZE, OpeningBook, load_opening_book
+from app.solver.keep_ranker import rank_keeps
+
+
+@pytest.mark.parametrize("rolls_left", [2, 1])
+def test_book_moves_match_the_keep_ranker(rolls_left):
+    book = load_opening_book()
+    for dice in random.Random(rolls_left).sample(ROLLS, 40):
+        keep, expected = book.best_keep(list(reversed(dice)), rolls_left)
+        best = rank_keeps(dice, rolls_left, Scorecard())[0]
+        assert expected == pytest.approx(best.expected_value, abs=1e-3)
+        # Ties may go either way; the book's keep must be as good as the best
+        ranked = {option.keep: option.expected_value for option in rank_keeps(dice, rolls_left, Scorecard())}
+        assert ranked[keep] == pytest.approx(best.expected_value, abs=1e-3)
+
+
+def test_yahtzee_is_kept_and_values_bracket_the_game():
+    book = load_opening_book()
+    keep, expected = book.best_keep([4, 4, 4, 4, 4], 2)
+    assert keep == (4, 4, 4, 4, 4)
+    values = [book.best_keep(dice, 2)[1] for dice in ROLLS]
+    # The opening turn's average over first rolls is the optimal game score
+    assert min(values) < 253.97 < max(values)
+
+
+def test_only_the_opening_rerolls_are_covered():
+    assert load_opening_book().best_keep([1, 2, 3, 4, 5], 0) is None
+    with pytest.raises(ValueError):
+        OpeningBook([0.0] * (BOOK_SIZE - 1))
@@ -0,0 +1,44 @@
+# Tests for playouts under the strategy table, against the exact endgame
+# distributions and the value table
+import numpy as np
+import pytest
+
+from app.game.scorecard import ScoreCategory
+from app.solver.endgame import remaining_score_distribution
+from app.solver.playouts import playout_scores
+from app.solver.state import CATEGORIES, FULL_MASK, SolverState
+from app.solver.value_table import load_value_table
+
+SIZE = 20_000
+
+
+def only_open(*categories, upper_total=0, yahtzee_scored=False) -> SolverState:
+    filled = FULL_MASK
+    for category in categories:
+        filled &= ~(1 << CATEGORIES.index(category))
+    return SolverState(filled, upper_total, yahtzee_scored)
+
+
+def test_yahtzee_only_scores_zero_or_fifty():
+    scores = playout_scores(only_open(ScoreCategory.YAHTZEE), SIZE, np.random.default_rng(0))
+    assert set(scores.tolist()) == {0, 50}
+    assert (scores == 50).mean() == pytest.approx(0.04602864, abs=4 * (0.046 * 0.954 / SIZE) ** 0.5)
+
+
+@pytest.mark.parametrize("state", [
+    only_open(ScoreCategory.SIXES, ScoreCategory.FULL_HOUSE, ScoreCategory.CHANCE, upper_total=50),
+    only_open(ScoreCategory.ONES, ScoreCategory.LARGE_STRAIGHT, ScoreCategory.FOUR_OF_A_KIND, yahtzee_scored=True),
+])
+def test_endgame_playouts_follow_the_exact_distribution(state):
+    scores = playout_scores(state, SIZE, np.random.default_rng(1))
+    exact = remaining_score_distribution(state)
+    assert exact[scores].min() > 0
+    for points in (20, 40, 60, 80):
+        chance = float(exact[points:].sum())
+        error = 4 * (chance * (1 - chance) / SIZE) ** 0.5 + 1e-9
+        assert (scores >= points).mean() == pytest.approx(chance, abs=error)
+
+
+def test_whole_game_averages_the_optimal_score():
+    scores = playout_scores(SolverState(0, 0, False), 2_000, np.random.default_rng(2))
+    assert scores.mean() == pytest.approx(load_value_table().expected_game_score(), abs=4 * scores.std() / 2_000 ** 0.5)
@@ -0,0 +1,43 @@
+# Tests for the exact category odds
+import pytest
+
+from app.game.scorecard import ScoreCategory
+from app.services.probability_service import get_category_odds
+
+
+def test_yahtzee_over_a_whole_turn():
+    # The well-known chance of a Yahtzee in three rolls keeping the most
+    # common face
+    odds = get_category_odds(None, 3)[ScoreCategory.YAHTZEE]
+    assert odds["probability"] == pytest.approx(0.046029, abs=1e-6)
+    assert odds["expected_score"] == pytest.approx(50 * 0.046029, abs=1e-4)
+
+
+@pytest.mark.parametrize("rolls_left, probability", [(0, 0.0), (1, 1 / 6), (2, 11 / 36)])
+def test_yahtzee_from_four_of_a_kind(rolls_left, probability):
+    odds = get_category_odds([3, 3, 3, 3, 5], rolls_left)[ScoreCategory.YAHTZEE]
+    assert odds["probability"] == pytest.approx(probability)
+    if rolls_left:
+        assert odds["keep"] == [3, 3, 3, 3]
+
+
+def test_final_dice_are_certain():
+    odds = get_category_odds([2, 3, 4, 5, 6], 0)
+    assert odds[ScoreCategory.LARGE_STRAIGHT] == {"probability": 1.0, "expected_score": 40.0, "keep": None}
+    assert odds[ScoreCategory.FULL_HOUSE]["probability"] == 0.0
+    # Upper categories count as hit at three of their face
+    assert odds[ScoreCategory.SIXES]["probability"] == 0.0
+    assert odds[ScoreCategory.SIXES]["expected_score"] == 6.0
+
+
+def test_large_straight_needing_one_end():
+    # Keeping 2-3-4-5 hits with a 1 or a 6 on either of two rerolls
+    odds = get_category_odds([2, 3, 4, 5, 5], 2)[ScoreCategory.LARGE_STRAIGHT]
+    assert odds["probability"] == pytest.approx(1 - (4 / 6) ** 2)
+    assert odds["keep"] == [2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("dice, rolls_left", [([1, 2, 3, 4, 5], 3), (None, 0), (None, 4)])
+def test_rejects_impossible_roll_counts(dice, rolls_left):
+    with pytest.raises(ValueError):
+        get_category_odds(dice, rolls_left)
@@ -0,0 +1,95 @@
+# Tests for the remaining score distributions, against distributions worked
+# out independently for small states
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from app.game.scorecard import ScoreCategory
+from app.solver.endgame import MAX_OPEN_CATEGORIES, remaining_score_distribution
+from app.solver.score_distribution import QUANTILES, load_score_distribution
+from app.solver.state import CATEGORIES, FULL_MASK, SolverState
+from app.solver.value_table import load_value_table
+
+P_YAHTZEE = 0.04602864
+
+
+def only_open(*categories, upper_total=0, yahtzee_scored=False) -> SolverState:
+    filled = FULL_MASK
+    for category in categories:
+        filled &= ~(1 << CATEGORIES.index(category))
+    return SolverState(filled, upper_total, yahtzee_scored)
+
+
+def chance_distribution():
+    # Optimal Chance play holds each die on its own: 5s and 6s after the
+    # first roll, 4s and up after the second
+    die = {face: Fraction(1, 6) * Fraction(4, 6) * Fraction(3, 6) for face in range(1, 7)}
+    for face in (4, 5, 6):
+        die[face] += Fraction(1, 6) * Fraction(4, 6)
+    for face in (5, 6):
+        die[face] += Fraction(1, 6)
+    total = {0: Fraction(1)}
+    for _ in range(5):
+        summed = {}
+        for points, mass in total.items():
+            for face, chance in die.items():
+                summed[points + face] = summed.get(points + face, 0) + mass * chance
+        total = summed
+    return total
+
+
+def test_yahtzee_only_keeps_its_two_point_masses():
+    table = load_score_distribution()
+    state = only_open(ScoreCategory.YAHTZEE)
+    assert table.probability_at_least(state, 1) == pytest.approx(P_YAHTZEE, abs=1e-8)
+    assert table.probability_at_least(state, 50) == pytest.approx(P_YAHTZEE, abs=1e-8)
+    assert table.probability_at_least(state, 51) == 0.0
+    assert table.percentile(state, 0.5) == 0.0
+    assert table.percentile(state, 0.99) == 50.0
+    assert set(table.quantiles(state)) == {0.0, 50.0}
+
+
+def test_chance_only_matches_independent_dice():
+    distribution = remaining_score_distribution(only_open(ScoreCategory.CHANCE))
+    expected = chance_distribution()
+    assert np.flatnonzero(distribution).tolist() == sorted(expected)
+    for points, mass in expected.items():
+        assert distribution[points] == pytest.approx(float(mass), abs=1e-12)
+
+
+def test_upper_bonus_is_one_atom():
+    # 57 up with only Sixes open: any six also earns the 35 point bonus
+    table = load_score_distribution()
+    state = only_open(ScoreCategory.SIXES, upper_total=57)
+    assert table.probability_at_least(state, 41) == pytest.approx(1 - (5 / 6) ** 15, abs=1e-9)
+    assert table.probability_at_least(state, 36) == pytest.approx(1 - (5 / 6) ** 15, abs=1e-9)
+
+
+def test_yahtzee_bonus_on_a_scored_yahtzee():
+    distribution = remaining_score_distribution(only_open(ScoreCategory.ONES, yahtzee_scored=True))
+    # Five ones score 5 in Ones plus the 100 point bonus
+    assert distribution[105] > 0
+    assert distribution[101:105].sum() == 0
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_exact_distributions_average_to_the_value_table(seed):
+    rng = random.Random(seed)
+    categories = rng.sample(CATEGORIES, rng.randint(1, MAX_OPEN_CATEGORIES))
+    state = only_open(*categories, upper_total=rng.randint(0, 63), yahtzee_scored=rng.random() < 0.5)
+    distribution = remaining_score_distribution(state)
+    assert distribution.sum() == pytest.approx(1.0)
+    mean = float(distribution @ np.arange(len(distribution)))
+    assert mean == pytest.approx(load_value_table().value(state), abs=1e-3)
+
+
+def test_sketch_of_a_whole_game_is_monotone():
+    table = load_score_distribution()
+    empty = SolverState(0, 0, False)
+    quantiles = table.quantiles(empty)
+    assert len(quantiles) == len(QUANTILES) and quantiles == sorted(quantiles)
+    assert 235 <= table.percentile(empty, 0.5) <= 260
+    chances = [table.probability_at_least(empty, points) for points in range(0, 600, 25)]
+    assert chances == sorted(chances, reverse=True) and chances[0] == 1.0
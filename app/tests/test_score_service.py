@@ -0,0 +1,104 @@
+# Tests for the SQLite score store: round trips, aggregates, exports and
+# flushing on shutdown
+import random
+
+import pytest
+
+from app.game.dice import DiceRoll
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.services import score_service
+from app.services.score_service import GameRecord, ScoreStore
+
+
+def played_scorecard(seed: int) -> Scorecard:
+    # A full game of random dice, opening with two Yahtzees so the bonus
+    # entry is exercised
+    rng = random.Random(seed)
+    card = Scorecard()
+    card.score_category(ScoreCategory.YAHTZEE, DiceRoll([3] * 5))
+    card.score_category(ScoreCategory.THREES, DiceRoll([3] * 5))
+    for category in card.get_available_categories():
+        card.score_category(category, DiceRoll([rng.randint(1, 6) for _ in range(5)]))
+    return card
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"), flush_interval=0.0)
+    yield store
+    store.close()
+
+
+def test_stored_games_load_back_as_the_same_scorecards(store):
+    alice, bob = played_scorecard(1), played_scorecard(2)
+    store.record_scorecards({"alice": alice, "bob": bob})
+    store.flush()
+    loaded = store.load_game(1)
+    assert list(loaded) == ["alice", "bob"]
+    for original, copy in zip((alice, bob), loaded.values()):
+        assert copy.scores == original.scores
+        assert copy.yahtzee_bonuses == original.yahtzee_bonuses == 1
+        assert copy.get_grand_total() == original.get_grand_total()
+        assert copy.score_entries == original.score_entries
+    with pytest.raises(KeyError):
+        store.load_game(2)
+
+
+def test_player_stats_accumulate(store):
+    scores = []
+    for seed in range(3):
+        alice, bob = played_scorecard(seed), played_scorecard(seed + 10)
+        scores.append((alice.get_grand_total(), bob.get_grand_total()))
+        store.record_scorecards({"alice": alice, "bob": bob})
+    store.flush()
+    stats = store.player_stats("alice")
+    assert stats["games_played"] == 3
+    assert stats["games_won"] == sum(a >= b for a, b in scores)
+    assert stats["average_score"] == pytest.approx(sum(a for a, _ in scores) / 3)
+    assert stats["best_score"] == max(a for a, _ in scores)
+    assert stats["yahtzee_bonuses"] == 3
+    assert store.player_stats("carol") is None
+
+
+@pytest.mark.parametrize("name", ["games.jsonl", "games.jsonl.gz"])
+def test_export_then_import_copies_every_game(store, tmp_path, name):
+    for seed in range(5):
+        store.record_game(GameRecord.from_scorecards({"alice": played_scorecard(seed)}, finished_at=1000.0 + seed))
+    store.flush()
+    path = str(tmp_path / name)
+    assert store.export_games(path, since=1002.0) == 3
+
+    copy = ScoreStore(str(tmp_path / "copy.db"))
+    try:
+        assert copy.import_games(path, batch_size=2) == 3
+        assert [game_id for game_id, *_ in copy.iter_final_scores()] == [1, 2, 3]
+        assert copy.load_game(1)["alice"].score_entries == store.load_game(3)["alice"].score_entries
+    finally:
+        copy.close()
+
+
+def test_close_commits_queued_games(tmp_path):
+    path = str(tmp_path / "scores.db")
+    store = ScoreStore(path, flush_interval=10.0)
+    for seed in range(3):
+        store.record_scorecards({"alice": played_scorecard(seed)})
+    store.close()
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.record_scorecards({"alice": played_scorecard(0)})
+    reopened = ScoreStore(path)
+    try:
+        assert reopened.player_stats("alice")["games_played"] == 3
+    finally:
+        reopened.close()
+
+
+def test_process_store_is_closed_at_exit(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(score_service, "DB_PATH", str(tmp_path / "scores.db"))
+    monkeypatch.setattr(score_service, "_store", None)
+    monkeypatch.setattr(score_service.atexit, "register", registered.append)
+    store = score_service.get_score_store()
+    assert score_service.get_score_store() is store
+    assert registered == [store.close]
+    store.close()
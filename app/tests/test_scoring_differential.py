@@ -0,0 +1,222 @@
+# Differential tests: every scoring backend must agree with a plain reading of
+# the rules, on every ordered roll and along random whole games. Bonus-aware
+# paths (the solver kernels and the endgame solver) are checked against the
+# points a scorecard actually gains.
+import itertools
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.game.dice import DiceRoll
+from app.game.engine import GameEngine, roll_codes, score_table
+from app.game.game import GameState, ScoreCategory as GameCategory
+from app.game.scorecard import ScoreCalculator, ScoreCategory, Scorecard
+from app.game.transitions import roll_index
+from app.solver.endgame import MAX_OPEN_CATEGORIES, EndgameSolver
+from app.solver.kernels import SCORES, category_outcomes, category_values
+from app.solver.state import ROLL_SCORES, SolverState, score_roll, scorecard_state
+from app.solver.value_table import load_value_table, state_index
+
+CATEGORIES = list(ScoreCategory)
+GAME_CATEGORIES = list(GameCategory)
+ALL_ROLLS = [list(dice) for dice in itertools.product(range(1, 7), repeat=5)]
+
+
+def reference_scores(dice):
+    counts = sorted(Counter(dice).values(), reverse=True)
+    faces = set(dice)
+    total = sum(dice)
+    small = any(set(run) <= faces for run in ((1, 2, 3, 4), (2, 3, 4, 5), (3, 4, 5, 6)))
+    large = faces in ({1, 2, 3, 4, 5}, {2, 3, 4, 5, 6})
+    return [face * dice.count(face) for face in range(1, 7)] + [
+        total if counts[0] >= 3 else 0,
+        total if counts[0] >= 4 else 0,
+        25 if counts[:2] == [3, 2] else 0,
+        30 if small else 0,
+        40 if large else 0,
+        50 if counts[0] == 5 else 0,
+        total
+    ]
+
+
+def reference_points(scores, dice, category):
+    # What scoring `dice` in `category` adds to a scorecard's grand total:
+    # its score, 100 for a Yahtzee once the Yahtzee box holds 50 (wherever
+    # it is scored), and 35 when it lifts the upper section to 63
+    score = reference_scores(dice)[category]
+    points = score
+    if len(set(dice)) == 1 and scores[ScoreCategory.YAHTZEE] == 50:
+        points += 100
+    if category < 6:
+        upper = sum(scores[upper_category] or 0 for upper_category in CATEGORIES[:6])
+        if upper < 63 <= upper + score:
+            points += 35
+    return points
+
+
+def kernel_outcomes(state, roll):
+    # kernels.category_outcomes for one state and roll: the points each
+    # category earns (-inf once filled) and the strategy table index it leads to
+    points, successors = category_outcomes(np.array([state.filled]), np.array([state.upper_total]),
+                                           np.array([int(state.yahtzee_scored)]), rolls=np.array([roll]))
+    return np.where(successors[0] >= 0, points[0], -np.inf), successors[0]
+
+
+def kernel_points(state, roll):
+    return kernel_outcomes(state, roll)[0]
+
+
+def check_endgame(solver, state):
+    # The endgame solver's best final-roll values, bonuses included, against
+    # the same maximum taken by the table builder's kernel over every roll
+    values = np.asarray(load_value_table().values, dtype=np.float64)
+    expected = category_values(np.array([state.filled]), np.array([state.upper_total]),
+                               np.array([int(state.yahtzee_scored)]), values).max(axis=1)[0]
+    np.testing.assert_allclose(solver.final_roll_values(state), expected, atol=1e-3)
+
+
+_engine_table = score_table()
+
+BACKENDS = {
+    "GameState._calculate_score": lambda dice: [
+        GameState()._calculate_score(category, dice) for category in GAME_CATEGORIES
+    ],
+    "ScoreCalculator.calculate_score": lambda dice: [
+        ScoreCalculator.calculate_score(category, DiceRoll(dice)) for category in CATEGORIES
+    ],
+    "ScoreCalculator.get_score_table": lambda dice: [
+        ScoreCalculator.get_score_table(tuple(dice))[category] for category in CATEGORIES
+    ],
+    "solver ROLL_SCORES": lambda dice: list(ROLL_SCORES[roll_index(dice)]),
+    "kernels SCORES": lambda dice: SCORES[roll_index(dice)].tolist(),
+    "engine score_table": lambda dice: _engine_table[roll_codes(np.array(dice))].tolist(),
+}
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_every_ordered_roll_matches_reference(backend):
+    score = BACKENDS[backend]
+    mismatches = [(dice, score(dice), reference_scores(dice)) for dice in ALL_ROLLS
+                  if score(dice) != reference_scores(dice)]
+    assert not mismatches, f"{len(mismatches)} rolls differ, first: {mismatches[0]}"
+
+
+def random_trajectory(rng):
+    # (dice, category index) for a full game; Yahtzees are forced often
+    # enough that most games exercise the bonus rules
+    order = rng.sample(range(len(CATEGORIES)), len(CATEGORIES))
+    turns = []
+    for category in order:
+        dice = [rng.randint(1, 6) for _ in range(5)]
+        if rng.random() < 0.25:
+            dice = [dice[0]] * 5
+        turns.append((dice, category))
+    return turns
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_random_games_agree_on_totals_and_bonuses(seed):
+    rng = random.Random(seed)
+    trajectories = [random_trajectory(rng) for _ in range(50)]
+
+    engine = GameEngine(capacity=len(trajectories))
+    games = np.array([engine.create_game() for _ in trajectories])
+
+    for turn in range(len(CATEGORIES)):
+        engine.start_turns(games)
+        engine.dice[games] = [trajectory[turn][0] for trajectory in trajectories]
+        engine.current_roll[games] = 1
+        engine.score_games(games, np.array([trajectory[turn][1] for trajectory in trajectories]))
+
+    engine_totals = engine.total_scores(games)[:, 0]
+    endgames = EndgameSolver()
+    for index, trajectory in enumerate(trajectories):
+        scorecard = Scorecard()
+        game = GameState()
+        state = SolverState(0, 0, False)
+        solver_total = 0
+        for dice, category in trajectory:
+            roll = roll_index(dice)
+            expected = [reference_points(scorecard.scores, dice, open_category) if state.is_open(open_category)
+                        else -np.inf for open_category in range(len(CATEGORIES))]
+            points, successors = kernel_outcomes(state, roll)
+            assert points.tolist() == expected, (trajectory, dice)
+            # Solving endgames is the slow part, so a few games cover them
+            if index < 3 and len(state.open_categories()) <= MAX_OPEN_CATEGORIES:
+                check_endgame(endgames, state)
+
+            before = scorecard.get_grand_total()
+            scorecard.score_category(CATEGORIES[category], DiceRoll(dice))
+            assert scorecard.get_grand_total() - before == expected[category]
+
+            game.start_turn()
+            game.current_dice = list(dice)
+            game.current_roll = 1
+            game.score_turn(GAME_CATEGORIES[category])
+
+            earned, state = score_roll(state, category, roll)
+            solver_total += earned
+            assert state == scorecard_state(scorecard)
+            assert successors[category] == state_index(state)
+
+            assert game.get_total_score() == scorecard.get_grand_total() == solver_total, (trajectory, dice)
+            assert game.yahtzee_bonuses == scorecard.yahtzee_bonuses
+
+        assert state.is_complete() and scorecard.is_complete() and game.is_game_complete()
+        assert int(engine_totals[index]) == scorecard.get_grand_total()
+        assert int(engine.yahtzee_bonuses[games[index], 0]) == scorecard.yahtzee_bonuses
+        assert game.get_upper_section_bonus() == scorecard.get_upper_section_bonus()
+        assert sum(entry.score for entry in scorecard.score_entries) == scorecard.get_grand_total() - \
+            scorecard.get_upper_section_bonus()
+
+
+UPPER_38 = {ScoreCategory.ONES: 2, ScoreCategory.TWOS: 6, ScoreCategory.THREES: 9, ScoreCategory.FOURS: 12,
+            ScoreCategory.SIXES: 9}
+
+
+@pytest.mark.parametrize("yahtzee_box", [None, 0, 50])
+@pytest.mark.parametrize("category", [
+    ScoreCategory.FIVES, ScoreCategory.FOUR_OF_A_KIND, ScoreCategory.FULL_HOUSE, ScoreCategory.CHANCE
+])
+def test_yahtzee_scored_outside_its_box(yahtzee_box, category):
+    # Five fives late in a game with 38 in the upper section: Fives also
+    # completes the upper bonus, the Yahtzee box decides the 100 point bonus,
+    # and a Yahtzee is no full house. Every other box is filled.
+    dice = [5] * 5
+    scorecard = Scorecard()
+    for other in CATEGORIES:
+        if other != category and (other != ScoreCategory.YAHTZEE or yahtzee_box is not None):
+            scorecard.scores[other] = UPPER_38.get(other, 0)
+    scorecard.scores[ScoreCategory.YAHTZEE] = yahtzee_box
+    game = GameState()
+    for other in GAME_CATEGORIES:
+        game.scorecard[other] = scorecard.scores[ScoreCategory(other.value)]
+    index = CATEGORIES.index(category)
+    expected = reference_points(scorecard.scores, dice, index)
+    assert expected == {None: 0, 0: 0, 50: 100}[yahtzee_box] + {
+        ScoreCategory.FIVES: 25 + 35, ScoreCategory.FOUR_OF_A_KIND: 25,
+        ScoreCategory.FULL_HOUSE: 0, ScoreCategory.CHANCE: 25
+    }[category]
+
+    state = scorecard_state(scorecard)
+    assert score_roll(state, index, roll_index(dice))[0] == expected
+    assert kernel_points(state, roll_index(dice))[index] == expected
+
+    before = scorecard.get_grand_total()
+    scorecard.score_category(category, DiceRoll(dice))
+    assert scorecard.get_grand_total() - before == expected
+
+    game.start_turn()
+    game.current_dice = list(dice)
+    game.current_roll = 1
+    before = game.get_total_score()
+    game.score_turn(GameCategory(category.value))
+    assert game.get_total_score() - before == expected
+
+    solver = EndgameSolver()
+    check_endgame(solver, state)
+    if yahtzee_box is not None:
+        # Only this box is open, so the final roll is worth its points alone
+        assert solver.final_roll_values(state)[roll_index(dice)] == expected
@@ -0,0 +1,90 @@
+# Tests for the time-budgeted expectimax search
+import time
+
+import pytest
+
+from app.game.game import GameState, ScoreCategory as GameCategory
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.solver.keep_ranker import best_category, rank_keeps
+from app.solver.search import ExpectimaxSearch, heuristic_value
+from app.solver.state import FULL_MASK, SolverState, state_from_scores
+from app.solver.value_table import load_value_table
+
+OPEN = (GameCategory.SIXES, GameCategory.FULL_HOUSE)
+
+
+def endgame(dice, roll):
+    game = GameState()
+    for category in GameCategory:
+        if category not in OPEN:
+            game.scorecard[category] = 2 if category == GameCategory.ONES else 0
+    game.start_turn()
+    game.current_dice = list(dice)
+    game.current_roll = roll
+    return game
+
+
+def matching_scorecard(game):
+    scorecard = Scorecard()
+    for category, score in game.scorecard.items():
+        scorecard.scores[ScoreCategory(category.value)] = score
+    return scorecard
+
+
+def test_exact_search_agrees_with_the_keep_ranker():
+    game = endgame([6, 6, 3, 3, 2], roll=1)
+    decision = ExpectimaxSearch().search(game, budget=10.0)
+    best = rank_keeps(game.current_dice, 2, matching_scorecard(game))[0]
+    assert decision.exact
+    assert decision.keep == best.keep
+    assert decision.expected_value == pytest.approx(best.expected_value, abs=1e-3)
+
+
+def test_scores_once_rolls_run_out():
+    game = endgame([6, 6, 6, 3, 3], roll=3)
+    decision = ExpectimaxSearch().search(game, budget=10.0)
+    assert decision.keep is None
+    assert decision.category.value == best_category(game.current_dice, matching_scorecard(game)).value
+
+
+def test_tiny_budget_still_answers():
+    game = GameState()
+    game.start_turn()
+    game.current_dice = [1, 2, 3, 4, 6]
+    game.current_roll = 1
+    decision = ExpectimaxSearch().search(game, budget=0.0)
+    assert decision.keep is not None and not decision.exact
+
+
+@pytest.mark.parametrize("open_categories, table_size", [(len(GameCategory), 200_000), (5, 50)])
+def test_holding_a_yahtzee_scores_it_within_budget(open_categories, table_size):
+    # The best keep is all five dice, which has to come back as a category
+    # without searching past the deadline, even once the transposition
+    # table has been cleared mid-search
+    game = GameState()
+    kept_open = (GameCategory.YAHTZEE, GameCategory.SIXES, GameCategory.FULL_HOUSE, GameCategory.CHANCE,
+                 GameCategory.FOURS)
+    for category in GameCategory:
+        if open_categories < len(GameCategory) and category not in kept_open:
+            game.scorecard[category] = 0
+    game.start_turn()
+    game.current_dice = [6] * 5
+    game.current_roll = 1
+    start = time.perf_counter()
+    decision = ExpectimaxSearch(table_size=table_size).search(game, budget=0.1)
+    assert time.perf_counter() - start < 0.1 + 0.05
+    assert decision.keep is None
+    assert decision.category == GameCategory.YAHTZEE
+
+
+def test_heuristic_undervalues_the_game_and_ignores_finished_ones():
+    # Each category is priced as if a whole turn chased it alone, so the
+    # estimate is a cautious one
+    assert 0 < heuristic_value(SolverState(0, 0, False)) < load_value_table().expected_game_score()
+    assert heuristic_value(state_from_scores(endgame([1] * 5, 1).scorecard)) > 0
+    assert heuristic_value(SolverState(FULL_MASK, 0, False)) == 0
+
+
+def test_needs_dice():
+    with pytest.raises(ValueError):
+        ExpectimaxSearch().search(GameState())
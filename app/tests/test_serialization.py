@@ -0,0 +1,88 @@
+# Tests for the compact Scorecard and GameState encoding
+import random
+
+import pytest
+
+from app.game.dice import DiceRoll
+from app.game.game import GameState
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.serialization import (
+    FORMAT_VERSION, pack_game_state, pack_scorecard, unpack_game_state, unpack_scorecard
+)
+
+
+def played_scorecard(seed: int, turns: int = 13) -> Scorecard:
+    rng = random.Random(seed)
+    scorecard = Scorecard()
+    # Score a Yahtzee first so later ones earn bonus entries
+    scorecard.score_category(ScoreCategory.YAHTZEE, DiceRoll([4] * 5))
+    for category in rng.sample(scorecard.get_available_categories(), turns - 1):
+        dice = [rng.randint(1, 6) for _ in range(5)]
+        if rng.random() < 0.2:
+            dice = [dice[0]] * 5
+        scorecard.score_category(category, DiceRoll(dice))
+    scorecard.get_upper_section_bonus()
+    return scorecard
+
+
+def played_game(seed: int, turns: int) -> GameState:
+    rng = random.Random(seed)
+    game = GameState()
+    for _ in range(turns):
+        game.start_turn()
+        game.roll_dice()
+        game.score_turn(rng.choice([c for c, score in game.scorecard.items() if score is None]))
+    return game
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scorecard_round_trip(seed):
+    scorecard = played_scorecard(seed)
+    restored = unpack_scorecard(pack_scorecard(scorecard))
+    assert restored.to_dict() == scorecard.to_dict()
+    assert restored.score_entries == scorecard.score_entries
+
+
+def test_partial_and_empty_scorecards_round_trip():
+    for scorecard in (Scorecard(), played_scorecard(1, turns=4)):
+        assert unpack_scorecard(pack_scorecard(scorecard)).to_dict() == scorecard.to_dict()
+
+
+def test_scorecard_blob_is_compact():
+    scorecard = played_scorecard(3)
+    assert len(pack_scorecard(scorecard)) < 8 + 13 + 4 * len(scorecard.score_entries)
+
+
+def test_scorecard_from_dict_round_trip():
+    scorecard = played_scorecard(5)
+    assert Scorecard.from_dict(scorecard.to_dict()).to_dict() == scorecard.to_dict()
+
+
+@pytest.mark.parametrize("turns", [0, 1, 7, 13])
+def test_game_state_round_trip(turns):
+    game = played_game(turns, turns)
+    if not game.game_complete:
+        game.start_turn()
+        game.roll_dice()
+    restored = unpack_game_state(pack_game_state(game))
+    assert vars(restored) == vars(game)
+    assert len(pack_game_state(game)) <= 24
+
+
+def test_rejects_other_versions_and_kinds():
+    blob = pack_scorecard(played_scorecard(2))
+    with pytest.raises(ValueError):
+        unpack_scorecard(bytes([FORMAT_VERSION + 1]) + blob[1:])
+    with pytest.raises(ValueError):
+        unpack_game_state(blob)
+
+
+def test_rejects_truncated_blobs():
+    scorecard_blob = pack_scorecard(played_scorecard(4))
+    game_blob = pack_game_state(played_game(4, 5))
+    for size in range(len(scorecard_blob)):
+        with pytest.raises(ValueError):
+            unpack_scorecard(scorecard_blob[:size])
+    for size in range(len(game_blob)):
+        with pytest.raises(ValueError):
+            unpack_game_state(game_blob[:size])
@@ -0,0 +1,49 @@
+# Tests for request coalescing
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", compute)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("key", compute))) for _ in range(4)]
+    for follower in followers:
+        follower.start()
+    # Followers count as coalesced as soon as they join the flight
+    while flights.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert results == ["result"] * 5 and len(calls) == 1
+    assert flights.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_finished_calls_are_not_cached_and_errors_propagate():
+    flights = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.do("key", lambda: 2) == 2
+    with pytest.raises(RuntimeError):
+        flights.do("key", fail)
+    assert flights.stats() == {"executed": 3, "coalesced": 0, "in_flight": 0}
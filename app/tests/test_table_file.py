@@ -0,0 +1,32 @@
+# Tests for the memory-mapped solver table format
+import pytest
+
+from app.solver.table_file import HEADER, VERSION, read_table, write_table
+
+
+def test_round_trip_as_float32(tmp_path):
+    path = str(tmp_path / "table.bin")
+    write_table(path, b"TEST", [0.0, 1.5, -2.25, 253.9702])
+    values = read_table(path, b"TEST")
+    assert len(values) == 4
+    assert list(values[:3]) == [0.0, 1.5, -2.25]
+    assert values[3] == pytest.approx(253.9702, abs=1e-4)
+
+
+def test_rejects_another_tables_magic(tmp_path):
+    path = str(tmp_path / "table.bin")
+    write_table(path, b"TEST", [1.0])
+    with pytest.raises(ValueError, match="not a version"):
+        read_table(path, b"BTZV")
+
+
+@pytest.mark.parametrize("contents", [
+    b"TE",
+    HEADER.pack(b"TEST", VERSION, 3) + b"\0" * 8,
+    HEADER.pack(b"TEST", VERSION + 1, 0),
+])
+def test_rejects_truncated_and_unknown_files(tmp_path, contents):
+    path = tmp_path / "table.bin"
+    path.write_bytes(contents)
+    with pytest.raises(ValueError):
+        read_table(str(path), b"TEST")
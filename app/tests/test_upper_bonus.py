@@ -0,0 +1,38 @@
+# Tests for the upper bonus probability table
+import pytest
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.solver.upper_bonus import FULL_UPPER_MASK, load_upper_bonus_table
+
+SIXES_ONLY = FULL_UPPER_MASK & ~(1 << 5)
+
+
+def test_one_six_needed_from_the_last_upper_box():
+    # Chasing sixes, the bonus is missed only if all 15 dice thrown miss
+    assert load_upper_bonus_table().probability(SIXES_ONLY, 57) == pytest.approx(1 - (5 / 6) ** 15, abs=1e-6)
+
+
+def test_unreachable_and_reached_totals():
+    table = load_upper_bonus_table()
+    assert table.probability(SIXES_ONLY, 32) == 0.0
+    assert table.probability(SIXES_ONLY, 63) == 1.0
+    assert table.probability(FULL_UPPER_MASK, 62) == 0.0
+
+
+def test_probability_grows_with_the_total():
+    table = load_upper_bonus_table()
+    chances = [table.probability(0, total) for total in range(64)]
+    assert chances == sorted(chances)
+    assert 0.0 < chances[0] < 1.0
+
+
+def test_scorecard_progress_reports_the_table_probability():
+    scorecard = Scorecard()
+    for category, score in zip(ScoreCategory.upper_section()[:5], (3, 6, 9, 12, 15)):
+        scorecard.scores[category] = score
+    progress = scorecard.get_upper_section_progress()
+    assert progress["needed_for_bonus"] == 18
+    assert progress["bonus_achievable"]
+    assert progress["bonus_probability"] == pytest.approx(
+        load_upper_bonus_table().probability(SIXES_ONLY, 45)
+    )
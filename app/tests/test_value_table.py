@@ -0,0 +1,38 @@
+# Tests for the optimal value table and the expected value analysis built on it
+import pytest
+
+from app.game.dice import DiceRoll
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.game.transitions import expected_turn_value
+from app.solver.keep_ranker import final_roll_values
+from app.solver.state import FULL_MASK, SolverState
+from app.solver.value_table import load_value_table
+
+CHANCE_ONLY = SolverState(FULL_MASK & ~(1 << list(ScoreCategory).index(ScoreCategory.CHANCE)), 0, False)
+
+
+def test_expected_score_of_optimal_play():
+    assert load_value_table().expected_game_score() == pytest.approx(253.9702, abs=1e-3)
+
+
+def test_last_turn_and_finished_states():
+    table = load_value_table()
+    # Three rolls at Chance: a die is worth 3.5, then 4.25, then 14/3
+    assert table.value(CHANCE_ONLY) == pytest.approx(70 / 3, abs=1e-4)
+    assert table.value(SolverState(FULL_MASK, 0, False)) == 0.0
+
+
+@pytest.mark.parametrize("state", [SolverState(0, 0, False), SolverState(0b1010000101000, 40, True), CHANCE_ONLY])
+def test_values_satisfy_one_turn_of_backward_induction(state):
+    # Each entry is the best play of one turn into the entries after it
+    assert load_value_table().value(state) == pytest.approx(expected_turn_value(final_roll_values(state)), abs=1e-3)
+
+
+def test_expected_value_analysis_prefers_the_best_category():
+    scorecard = Scorecard()
+    analysis = scorecard.get_expected_value_analysis(DiceRoll([6, 6, 6, 6, 6]))
+    assert set(analysis) == set(ScoreCategory)
+    best = max(analysis, key=lambda category: analysis[category]["expected_final_score"])
+    assert best == ScoreCategory.YAHTZEE
+    assert analysis[best]["is_optimal"] and analysis[best]["expected_loss"] == 0.0
+    assert all(entry["expected_loss"] >= 0 for entry in analysis.values())
@@ -0,0 +1,58 @@
+# Tests for live win probabilities, against endgames worked out by hand
+import pytest
+
+from app.game.scorecard import ScoreCategory, Scorecard
+from app.services.win_probability_service import estimate_win_probabilities
+
+P_YAHTZEE = 0.04602864
+
+
+def scorecard(*open_categories, chance: int = 20) -> Scorecard:
+    card = Scorecard()
+    for category in ScoreCategory:
+        if category not in open_categories:
+            card.scores[category] = 0
+    card.scores[ScoreCategory.CHANCE] = chance
+    return card
+
+
+def test_tied_players_with_only_yahtzee_open():
+    first, second = estimate_win_probabilities([scorecard(ScoreCategory.YAHTZEE)] * 2)
+    # One of them rolls a Yahtzee and the other does not, or it stays a tie
+    assert first.exact and first.rollouts == 0
+    assert first.win == pytest.approx(P_YAHTZEE * (1 - P_YAHTZEE), abs=1e-7)
+    assert first.tie == pytest.approx(P_YAHTZEE ** 2 + (1 - P_YAHTZEE) ** 2, abs=1e-7)
+    assert second == first
+    assert first.win_interval == (first.win, first.win)
+
+
+def test_one_point_lead_with_only_yahtzee_open():
+    leader, trailer = estimate_win_probabilities([
+        scorecard(ScoreCategory.YAHTZEE, chance=21), scorecard(ScoreCategory.YAHTZEE)
+    ])
+    assert leader.win == pytest.approx(1 - P_YAHTZEE * (1 - P_YAHTZEE), abs=1e-7)
+    assert trailer.win == pytest.approx(P_YAHTZEE * (1 - P_YAHTZEE), abs=1e-7)
+    assert leader.tie == trailer.tie == 0.0
+
+
+def test_finished_games_are_decided():
+    estimates = estimate_win_probabilities([scorecard(chance=25), scorecard(chance=30), scorecard(chance=30)])
+    assert [(estimate.win, estimate.tie) for estimate in estimates] == [(0.0, 0.0), (0.0, 1.0), (0.0, 1.0)]
+
+
+def test_early_positions_are_played_out():
+    # 20 points with three categories left never catch a fresh scorecard
+    estimates = estimate_win_probabilities([
+        Scorecard(), scorecard(ScoreCategory.YAHTZEE, ScoreCategory.ONES, ScoreCategory.TWOS)
+    ], budget=0.0, batch_size=500, seed=3)
+    for estimate in estimates:
+        assert not estimate.exact and estimate.rollouts == 500
+        low, high = estimate.win_interval
+        assert low <= estimate.win <= high
+    assert estimates[0].win + estimates[1].win + estimates[0].tie <= 1.0
+    assert estimates[0].win > 0.99
+
+
+def test_needs_two_players():
+    with pytest.raises(ValueError):
+        estimate_win_probabilities([Scorecard()])
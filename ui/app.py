@@ -8,10 +8,13 @@ sys.path.insert(0, parent_dir)
 
 from app.game.scorecard import Scorecard, ScoreCategory, ScoreCalculator
 from app.game.dice import DiceRoll, DiceManager
-from app.game.game import GameState
+from app.game.fairness import start_recording
 
 st.set_page_config(page_title="Botzee - AI Yahtzee", layout="wide")
 
+# Games played here count towards the dice fairness snapshot
+start_recording()
+
 def initialize_session_state():
     if 'player1_scorecard' not in st.session_state:
         st.session_state.player1_scorecard = Scorecard()
@@ -43,6 +46,10 @@ def display_turn_info():
     with col2:
         st.markdown(f"### 🎲 Rolls Left: **{st.session_state.rolls_left}**")
 
+# Dice, scorecard and chat are fragments: a keep toggle or chat message only
+# reruns its own fragment, while rolling and scoring still rerun the whole
+# app because they change the turn state every section depends on.
+@st.fragment
 def display_dice():
     st.subheader("🎲 Current Dice Roll")
     
@@ -152,7 +159,22 @@ def confirm_score_dialog(player_name, category, score, scorecard, dice_roll):
         'dice_roll': dice_roll
     }
 
+def save_finished_game():
+    # Hand the game to the score store once every scorecard is full; the
+    # write happens on the store's background thread
+    scorecards = {
+        "Player 1": st.session_state.player1_scorecard,
+        "Player 2": st.session_state.player2_scorecard,
+        "Botzee": st.session_state.botzee_scorecard
+    }
+    if all(card.is_complete() for card in scorecards.values()) and not st.session_state.get('game_saved'):
+        from app.services.score_service import get_score_store
+
+        get_score_store().record_scorecards(scorecards)
+        st.session_state.game_saved = True
+
 def end_turn():
+    save_finished_game()
     turns = ["Player 1", "Player 2", "Botzee"]
     current_index = turns.index(st.session_state.current_turn)
     next_index = (current_index + 1) % len(turns)
@@ -164,13 +186,53 @@ def end_turn():
     st.session_state.confirm_score = None
     st.rerun()
 
+def get_turn_scores():
+    # One DiceRoll and one score table per rerun, shared by every cell
+    if not st.session_state.current_dice:
+        return None, {}
+    dice_roll = DiceRoll(st.session_state.current_dice)
+    return dice_roll, ScoreCalculator.get_score_table(tuple(st.session_state.current_dice))
+
+def display_score_cell(player_name, key_prefix, scorecard, category, dice_roll, possible_scores):
+    score = scorecard.get_category_score(category)
+    if score is not None:
+        st.write(str(score))
+    elif dice_roll is not None and st.session_state.current_turn == player_name:
+        possible_score = possible_scores[category]
+        if st.button(f"Score {possible_score}", key=f"{key_prefix}_{category.value}"):
+            confirm_score_dialog(player_name, category, possible_score, scorecard, dice_roll)
+            st.rerun()
+    else:
+        st.write("—")
+
+def display_category_rows(categories, players, dice_roll, possible_scores):
+    for name, category in categories:
+        cols = st.columns([3, 1.5, 1.5, 1.5])
+        
+        with cols[0]:
+            st.write(name)
+        
+        for col, (player_name, key_prefix, scorecard) in zip(cols[1:], players):
+            with col:
+                display_score_cell(player_name, key_prefix, scorecard, category, dice_roll, possible_scores)
+
+@st.fragment
 def display_scorecard():
+    from app.services.win_probability_service import estimate_win_probabilities
+
     st.subheader("📊 Yahtzee Scoresheet")
     
     player1_card = st.session_state.player1_scorecard
     player2_card = st.session_state.player2_scorecard
     botzee_card = st.session_state.botzee_scorecard
     
+    players = [
+        ("Player 1", "p1", player1_card),
+        ("Player 2", "p2", player2_card),
+        ("Botzee", "botzee", botzee_card)
+    ]
+    dice_roll, possible_scores = get_turn_scores()
+    
     col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
     
     with col1:
@@ -193,47 +255,7 @@ def display_scorecard():
         ("Sixes", ScoreCategory.SIXES)
     ]
     
-    for name, category in upper_categories:
-        col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
-        
-        with col1:
-            st.write(name)
-        
-        with col2:
-            score = player1_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Player 1":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"p1_{category.value}"):
-                    confirm_score_dialog("Player 1", category, possible_score, player1_card, dice_roll)
-            else:
-                st.write("—")
-        
-        with col3:
-            score = player2_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Player 2":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"p2_{category.value}"):
-                    confirm_score_dialog("Player 2", category, possible_score, player2_card, dice_roll)
-            else:
-                st.write("—")
-        
-        with col4:
-            score = botzee_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Botzee":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"botzee_{category.value}"):
-                    confirm_score_dialog("Botzee", category, possible_score, botzee_card, dice_roll)
-            else:
-                st.write("—")
+    display_category_rows(upper_categories, players, dice_roll, possible_scores)
     
     col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
     with col1:
@@ -267,47 +289,7 @@ def display_scorecard():
         ("Chance", ScoreCategory.CHANCE)
     ]
     
-    for name, category in lower_categories:
-        col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
-        
-        with col1:
-            st.write(name)
-        
-        with col2:
-            score = player1_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Player 1":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"p1_{category.value}"):
-                    confirm_score_dialog("Player 1", category, possible_score, player1_card, dice_roll)
-            else:
-                st.write("—")
-        
-        with col3:
-            score = player2_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Player 2":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"p2_{category.value}"):
-                    confirm_score_dialog("Player 2", category, possible_score, player2_card, dice_roll)
-            else:
-                st.write("—")
-        
-        with col4:
-            score = botzee_card.get_category_score(category)
-            if score is not None:
-                st.write(str(score))
-            elif st.session_state.current_dice and st.session_state.current_turn == "Botzee":
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
-                if st.button(f"Score {possible_score}", key=f"botzee_{category.value}"):
-                    confirm_score_dialog("Botzee", category, possible_score, botzee_card, dice_roll)
-            else:
-                st.write("—")
+    display_category_rows(lower_categories, players, dice_roll, possible_scores)
     
     col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
     with col1:
@@ -338,7 +320,16 @@ def display_scorecard():
         st.write(f"**{player2_card.get_grand_total()}**")
     with col4:
         st.write(f"**{botzee_card.get_grand_total()}**")
+    
+    win_estimates = estimate_win_probabilities([player1_card, player2_card, botzee_card])
+    col1, col2, col3, col4 = st.columns([3, 1.5, 1.5, 1.5])
+    with col1:
+        st.write("**Win Chance**")
+    for col, estimate in zip((col2, col3, col4), win_estimates):
+        with col:
+            st.write(f"{estimate.win:.0%}")
 
+@st.fragment
 def display_chat():
     st.subheader("💬 Chat with Botzee")
     
@@ -347,11 +338,15 @@ def display_chat():
         for message in st.session_state.chat_history:
             st.write(message)
     
-    user_input = st.text_input("Your message:", key="chat_input")
-    if st.button("Send") and user_input:
+    st.text_input("Your message:", key="chat_input")
+    # Handled in a callback so the new messages show on this fragment rerun
+    st.button("Send", on_click=send_chat_message)
+
+def send_chat_message():
+    user_input = st.session_state.chat_input
+    if user_input:
         st.session_state.chat_history.append(f"You: {user_input}")
         st.session_state.chat_history.append("Botzee: I'm still learning! Let me know what you'd like to do.")
-        st.rerun()
 
 def main():
     st.title("🎲 Botzee - AI Yahtzee Game")
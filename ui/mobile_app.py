@@ -1,6 +1,8 @@
 import streamlit as st
 import sys
 import os
+import re
+import textwrap
 
 # Add parent directory to path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -8,7 +10,7 @@ sys.path.insert(0, parent_dir)
 
 from app.game.scorecard import Scorecard, ScoreCategory, ScoreCalculator
 from app.game.dice import DiceRoll, DiceManager
-from app.game.game import GameState
+from app.game.fairness import start_recording
 
 # Mobile-specific page config
 st.set_page_config(
@@ -17,9 +19,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Games played here count towards the dice fairness snapshot
+start_recording()
+
 # PWA Configuration
-def add_pwa_meta():
-    st.markdown("""
+PWA_META = """
     <link rel="manifest" href="./manifest.json">
     <meta name="theme-color" content="#667eea">
     <meta name="apple-mobile-web-app-capable" content="yes">
@@ -40,11 +44,10 @@ def add_pwa_meta():
       });
     }
     </script>
-    """, unsafe_allow_html=True)
+    """
 
 # Mobile-first CSS styling
-def load_mobile_css():
-    st.markdown("""
+MOBILE_CSS = """
     <style>
     /* iPhone 14/15 specific styling - more compact */
     .main .block-container {
@@ -424,9 +427,34 @@ def load_mobile_css():
         }
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a CSS block."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+
+@st.cache_resource
+def build_static_assets():
+    """Build the PWA meta tags and mobile CSS once per process as one payload."""
+    return textwrap.dedent(PWA_META).strip() + "\n\n" + minify_css(MOBILE_CSS)
+
+def add_static_assets():
+    """Inject the cached PWA meta and CSS payload in a single element."""
+    st.markdown(build_static_assets(), unsafe_allow_html=True)
+
+@st.cache_resource
+def build_dice_pips():
+    """Precompute pip HTML for faces 1-6, with 0 as the empty slot."""
+    return {value: render_dice_pips(value) for value in range(7)}
 
 def get_dice_pips(value):
+    """Return cached HTML for dice with correct number of pips."""
+    pips = build_dice_pips()
+    return pips.get(value, pips[0])
+
+def render_dice_pips(value):
     """Return HTML for dice with correct number of pips using CSS grid."""
     base_style = "width: 50px; height: 50px; border: 3px solid #333; border-radius: 8px; background: white; display: grid; margin: 0 auto; position: relative;"
     
@@ -529,6 +557,9 @@ def display_turn_info():
             st.button("🎲 No Rolls Left", disabled=True, use_container_width=True)
 
 
+# Tapping a die reruns only this fragment; Roll and Score still trigger a
+# full rerun so the turn info and scorecard pick up the new dice.
+@st.fragment
 def display_mobile_dice():
     # Always show 5 dice at the top, regardless of game state
     cols = st.columns(5)
@@ -545,18 +576,21 @@ def display_mobile_dice():
                 button_type = "primary" if is_selected else "secondary"
                 button_text = str(dice_value)
                 
-                if st.button(button_text, key=f"dice_btn_{i}", type=button_type, use_container_width=True):
-                    # Toggle selection when clicked
-                    if i in st.session_state.selected_dice:
-                        st.session_state.selected_dice.remove(i)
-                    else:
-                        st.session_state.selected_dice.append(i)
-                    st.rerun()
+                # Toggle selection in a callback so the fragment redraws with it
+                st.button(button_text, key=f"dice_btn_{i}", type=button_type, use_container_width=True,
+                          on_click=toggle_die, args=(i,))
             else:
                 # Empty dice slot - show blank disabled button
                 st.button("", key=f"empty_dice_{i}", disabled=True, use_container_width=True)
     
 
+def toggle_die(index):
+    if index in st.session_state.selected_dice:
+        st.session_state.selected_dice.remove(index)
+    else:
+        st.session_state.selected_dice.append(index)
+
+@st.fragment
 def display_mobile_scorecard():
     # Traditional Yahtzee scorecard table layout
     
@@ -587,6 +621,9 @@ def display_mobile_scorecard():
         ("Chance", ScoreCategory.CHANCE)
     ]
     
+    # Score every category for the current dice once, shared by all rows
+    dice_roll, possible_scores = get_turn_scores()
+    
     # Create table header
     col_score, col_p1, col_p2, col_botzee = st.columns([2, 1, 1, 1])
     
@@ -613,7 +650,7 @@ def display_mobile_scorecard():
     # Upper section
     st.markdown("**UPPER SECTION**")
     for name, category in upper_categories:
-        display_table_score_row(name, category, scorecards)
+        display_table_score_row(name, category, scorecards, dice_roll, possible_scores)
     
     # Upper totals
     st.markdown("---")
@@ -625,14 +662,22 @@ def display_mobile_scorecard():
     
     # Lower section
     for name, category in lower_categories:
-        display_table_score_row(name, category, scorecards)
+        display_table_score_row(name, category, scorecards, dice_roll, possible_scores)
     
     # Final totals
     st.markdown("---")
     display_table_total_row("Yahtzee Bonus", "get_yahtzee_bonus_total", scorecards)
     display_table_total_row("**GRAND TOTAL**", "get_grand_total", scorecards, bold=True)
+    display_table_win_row(scorecards)
+
+def get_turn_scores():
+    """Return the current DiceRoll and its cached score for every category."""
+    if not st.session_state.current_dice:
+        return None, {}
+    dice_roll = DiceRoll(st.session_state.current_dice)
+    return dice_roll, ScoreCalculator.get_score_table(tuple(st.session_state.current_dice))
 
-def display_table_score_row(name, category, scorecards):
+def display_table_score_row(name, category, scorecards, dice_roll, possible_scores):
     """Display a table row for score categories."""
     col_score, col_p1, col_p2, col_botzee = st.columns([2, 1, 1, 1])
     
@@ -647,10 +692,9 @@ def display_table_score_row(name, category, scorecards):
             if score is not None:
                 # Confirmed score - bold and normal color
                 st.markdown(f"**{score}**")
-            elif st.session_state.current_dice and can_score:
+            elif dice_roll is not None and can_score:
                 # Show potential score with custom HTML button
-                dice_roll = DiceRoll(st.session_state.current_dice)
-                possible_score = ScoreCalculator.calculate_score(category, dice_roll)
+                possible_score = possible_scores[category]
                 
                 # Create unique button ID
                 button_id = f"score_{player_name.replace(' ', '_')}_{category.value}"
@@ -684,21 +728,34 @@ def display_table_total_row(label, method_name, scorecards, bold=False):
             else:
                 st.write(f"**{total}**")
 
-def display_compact_score_row(name, category, scorecard, can_score, player_name):
+def display_table_win_row(scorecards):
+    """Display each player's chance of winning from the current scores."""
+    from app.services.win_probability_service import estimate_win_probabilities
+
+    estimates = estimate_win_probabilities([scorecard for _, scorecard, _ in scorecards])
+    col_score, col_p1, col_p2, col_botzee = st.columns([2, 1, 1, 1])
+    
+    with col_score:
+        st.write("Win Chance")
+    
+    for col, estimate in zip([col_p1, col_p2, col_botzee], estimates):
+        with col:
+            st.write(f"{estimate.win:.0%}")
+
+def display_compact_score_row(name, category, scorecard, can_score, player_name, dice_roll, possible_scores):
     """Display a compact score row for the three-column layout."""
     score = scorecard.get_category_score(category)
     if score is not None:
         st.write(f"{name}: **{score}**")
-    elif st.session_state.current_dice and can_score:
-        dice_roll = DiceRoll(st.session_state.current_dice)
-        possible_score = ScoreCalculator.calculate_score(category, dice_roll)
+    elif dice_roll is not None and can_score:
+        possible_score = possible_scores[category]
         if st.button(f"{name}: {possible_score}", key=f"score_{player_name}_{category.value}", use_container_width=True):
             confirm_score_dialog(player_name, category, possible_score, scorecard, dice_roll)
             st.rerun()
     else:
         st.write(f"{name}: —")
 
-def display_score_row(name, category, scorecard, can_score):
+def display_score_row(name, category, scorecard, can_score, dice_roll, possible_scores):
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -708,9 +765,8 @@ def display_score_row(name, category, scorecard, can_score):
         score = scorecard.get_category_score(category)
         if score is not None:
             st.write(f"**{score}**")
-        elif st.session_state.current_dice and can_score:
-            dice_roll = DiceRoll(st.session_state.current_dice)
-            possible_score = ScoreCalculator.calculate_score(category, dice_roll)
+        elif dice_roll is not None and can_score:
+            possible_score = possible_scores[category]
             if st.button(f"Score {possible_score}", key=f"score_{st.session_state.active_scorecard_tab}_{category.value}", use_container_width=True):
                 confirm_score_dialog(st.session_state.active_scorecard_tab, category, possible_score, scorecard, dice_roll)
                 st.rerun()
@@ -749,6 +805,7 @@ def display_confirmation_dialog():
         return True
     return False
 
+@st.fragment
 def display_mobile_chat():
     # Compact chat section without white bars
     st.markdown("💬 **Chat with Botzee**")
@@ -760,12 +817,15 @@ def display_mobile_chat():
     # Compact chat input
     col1, col2 = st.columns([3, 1])
     with col1:
-        user_input = st.text_input("Message:", placeholder="Ask Botzee...", label_visibility="collapsed")
+        st.text_input("Message:", placeholder="Ask Botzee...", label_visibility="collapsed", key="chat_input")
     with col2:
-        if st.button("Send") and user_input:
-            st.session_state.chat_history.append(f"You: {user_input}")
-            st.session_state.chat_history.append("Botzee: Great question! I'm learning to give better advice.")
-            st.rerun()
+        st.button("Send", on_click=send_chat_message)
+
+def send_chat_message():
+    user_input = st.session_state.chat_input
+    if user_input:
+        st.session_state.chat_history.append(f"You: {user_input}")
+        st.session_state.chat_history.append("Botzee: Great question! I'm learning to give better advice.")
 
 def start_turn():
     roll_result = st.session_state.dice_manager.roll_all_dice()
@@ -785,7 +845,22 @@ def next_roll():
         st.session_state.selected_dice = keep_indices
         st.rerun()
 
+def save_finished_game():
+    # Hand the game to the score store once every scorecard is full; the
+    # write happens on the store's background thread
+    scorecards = {
+        "Player 1": st.session_state.player1_scorecard,
+        "Player 2": st.session_state.player2_scorecard,
+        "Botzee": st.session_state.botzee_scorecard
+    }
+    if all(card.is_complete() for card in scorecards.values()) and not st.session_state.get('game_saved'):
+        from app.services.score_service import get_score_store
+
+        get_score_store().record_scorecards(scorecards)
+        st.session_state.game_saved = True
+
 def end_turn():
+    save_finished_game()
     turns = ["Player 1", "Player 2", "Botzee"]
     current_index = turns.index(st.session_state.current_turn)
     next_index = (current_index + 1) % len(turns)
@@ -801,8 +876,7 @@ def end_turn():
     st.rerun()
 
 def main():
-    add_pwa_meta()
-    load_mobile_css()
+    add_static_assets()
     initialize_session_state()
     
     